@@ -10,6 +10,8 @@ from typing import List, Dict, Tuple, Optional
 import pandas as pd
 from google.cloud import storage
 
+from src.utils.download_gcs import baixar_blob
+
 BLANK_LINE_RE = re.compile(r'^[\s,;"]*$')
 
 def ensure_trailing_slash(p: str) -> str:
@@ -39,12 +41,8 @@ def find_text_col(cols: List[str]) -> Optional[str]:
     return None
 
 def download_blob_to_file(bucket_name: str, blob_name: str, local_path: str) -> None:
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    if not blob.exists(client):
-        raise FileNotFoundError(f"Não achei: gs://{bucket_name}/{blob_name}")
-    blob.download_to_filename(local_path)
+    # fatias em paralelo + crc32c + cache local; FileNotFoundError se o blob não existe
+    baixar_blob(storage.Client().bucket(bucket_name), blob_name, local_path)
 
 def upload_file_to_blob(bucket_name: str, blob_name: str, local_path: str) -> None:
     client = storage.Client()
@@ -0,0 +1,149 @@
+"""
+Checkpoint do Tybyria como log de scores só de acréscimo.
+
+O checkpoint antigo reescrevia o DataFrame parcial inteiro (todos os textos)
+em CSV e subia para o GCS a cada CHECKPOINT_EVERY linhas: arquivos de GB
+reenviados milhares de vezes, mais I/O que inferência. Agora:
+
+  - o estado é (input limpo, que não muda) + pares (linha, score) já feitos;
+  - cada checkpoint sobe só os pares novos num objeto pequeno (seg-NNNNNN,
+    12 bytes por linha: alguns KB), numa requisição;
+  - objetos do GCS não aceitam append, então a cada `compactar` segmentos
+    (base + segmentos <= 32, o limite do compose) o GCS junta tudo na base
+    com um compose, no servidor, sem baixar nada, e os segmentos são apagados;
+  - cada compactação soma os componentes dos segmentos aos da base, e o GCS
+    recusa objetos compostos com mais de LIMITE_COMPONENTES: antes de passar
+    disso a base é reescrita como objeto simples (baixa e sobe de novo; são
+    12 bytes por linha);
+  - meta.json guarda o número de linhas e o hash dos textos limpos: se o
+    input ou a limpeza mudarem, o log não é aplicado (recomeça do zero).
+
+Ao retomar: base + segmentos em ordem, na ordem de gravação (uma linha
+repetida fica com o último score). Uma queda entre o compose e a remoção dos
+segmentos só repete pares iguais.
+
+O rótulo não vai no log: sai do score com o THRESHOLD da execução.
+"""
+
+import json
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+from src.utils.armazenamento_gcs import DEFAULT_RETRY, LIMITE_COMPONENTES, LIMITE_COMPOSE, NotFound
+
+REGISTRO = struct.Struct("<Id")  # (linha uint32, score float64): o float volta idêntico, str(score) também
+VERSAO = 1
+
+
+def codificar(pares: Iterable[Tuple[int, float]]) -> bytes:
+    return b"".join(REGISTRO.pack(linha, score) for linha, score in pares)
+
+
+def decodificar(dados: bytes) -> List[Tuple[int, float]]:
+    """Pares (linha, score); um registro incompleto no fim é ignorado."""
+    inteiros = len(dados) - len(dados) % REGISTRO.size
+    return list(REGISTRO.iter_unpack(dados[:inteiros]))
+
+
+def _numero(nome: str) -> int:
+    return int(nome.rsplit("-", 1)[1])
+
+
+class LogScores:
+    """Log de (linha, score) em gs://<bucket>/<prefixo> (base, seg-NNNNNN e meta.json)."""
+
+    def __init__(self, client, bucket_name: str, prefixo: str, compactar: int = LIMITE_COMPOSE - 1):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.bucket = client.bucket(bucket_name)
+        self.prefixo = prefixo.rstrip("/") + "/"
+        self.compactar_a_cada = max(1, min(compactar, LIMITE_COMPOSE - 1))
+        self.segmentos: List[str] = []
+        self.proximo = 0
+        self.bytes_enviados = 0
+
+    # --------------------------------------------------
+    def _nome(self, nome: str) -> str:
+        return self.prefixo + nome
+
+    def _existentes(self) -> List[str]:
+        return sorted(b.name for b in self.client.list_blobs(self.bucket_name, prefix=self.prefixo))
+
+    def _ler(self, nome: str) -> Optional[bytes]:
+        try:
+            return self.bucket.blob(nome).download_as_bytes()
+        except NotFound:
+            return None
+
+    def _subir(self, nome: str, dados: bytes, content_type: str = "application/octet-stream") -> None:
+        self.bucket.blob(nome).upload_from_string(dados, content_type=content_type, retry=DEFAULT_RETRY)
+
+    # --------------------------------------------------
+    def carregar(self, linhas: int, hash_textos: str) -> Optional[List[Tuple[int, float]]]:
+        """Pares já gravados, ou None se não há log (ou ele é de outro input)."""
+        meta = self._ler(self._nome("meta.json"))
+        if meta is None:
+            return None
+        meta = json.loads(meta)
+        if meta.get("versao") != VERSAO or meta.get("linhas") != linhas or meta.get("hash_textos") != hash_textos:
+            print(f"⚠️  Log de scores em {self.prefixo} é de outro input (linhas/hash diferentes): ignorado.")
+            return None
+
+        nomes = self._existentes()
+        self.segmentos = sorted((n for n in nomes if n.startswith(self._nome("seg-"))), key=_numero)
+        self.proximo = _numero(self.segmentos[-1]) + 1 if self.segmentos else 0
+
+        pares: List[Tuple[int, float]] = []
+        base = self._nome("base")
+        for nome in ([base] if base in nomes else []) + self.segmentos:
+            pares.extend(p for p in decodificar(self._ler(nome) or b"") if p[0] < linhas)
+        return pares
+
+    def iniciar(self, linhas: int, hash_textos: str) -> None:
+        """Começa um log vazio para este input (apaga o que houver no prefixo)."""
+        self.apagar()
+        meta = {"versao": VERSAO, "linhas": linhas, "hash_textos": hash_textos, "registro": "<Id"}
+        self._subir(self._nome("meta.json"), json.dumps(meta).encode("utf-8"), "application/json")
+
+    def acrescentar(self, pares: List[Tuple[int, float]]) -> int:
+        """Sobe os pares num segmento novo (compacta se preciso). Retorna os bytes enviados."""
+        if not pares:
+            return 0
+        dados = codificar(pares)
+        nome = self._nome(f"seg-{self.proximo:06d}")
+        self._subir(nome, dados)
+        self.segmentos.append(nome)
+        self.proximo += 1
+        self.bytes_enviados += len(dados)
+        if len(self.segmentos) >= self.compactar_a_cada:
+            self.compactar()
+        return len(dados)
+
+    def compactar(self) -> None:
+        """base + segmentos -> base (compose no servidor); depois apaga os segmentos."""
+        if not self.segmentos:
+            return
+        nome_base = self._nome("base")
+        base = self.bucket.get_blob(nome_base)
+        componentes = (base.component_count or 1) if base is not None else 0
+        if componentes + len(self.segmentos) > LIMITE_COMPONENTES:
+            self._subir(nome_base, base.download_as_bytes())
+            print(f"🗜️ Log de scores: base com {componentes:,} componentes reescrita como objeto simples")
+        origens = ([self.bucket.blob(nome_base)] if base is not None else []) + [self.bucket.blob(n) for n in self.segmentos]
+        self.bucket.blob(nome_base).compose(origens, retry=DEFAULT_RETRY)
+        for nome in self.segmentos:
+            try:
+                self.bucket.blob(nome).delete()
+            except NotFound:
+                pass
+        self.segmentos = []
+        self.proximo = 0
+
+    def apagar(self) -> None:
+        for nome in self._existentes():
+            try:
+                self.bucket.blob(nome).delete()
+            except NotFound:
+                pass
+        self.segmentos = []
+        self.proximo = 0
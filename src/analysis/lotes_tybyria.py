@@ -0,0 +1,64 @@
+"""
+Lotes do Tybyria agrupados por comprimento em tokens.
+
+Em ordem de arquivo, com BATCH_SIZE fixo e padding=True, um comentário longo
+faz o lote inteiro ser preenchido até MAX_LEN, e na CPU quase todo o tempo da
+atenção vai para o padding. Aqui:
+
+  - os input_ids (sem padding) vêm de src/analysis/tokens_cache.py, tokenizados
+    uma vez por arquivo; os textos pendentes são agrupados em janelas de `janela`;
+  - dentro da janela os textos são ordenados por comprimento e agrupados em
+    lotes de no máximo `orcamento_tokens` tokens com padding
+    (linhas x maior comprimento do lote) e `max_lote` linhas: lote de textos
+    curtos leva muitas linhas, lote de textos longos leva poucas;
+  - cada lote devolve as posições originais, para o score voltar à linha
+    certa do DataFrame.
+
+Só Python puro: o bench (src/bench/lotes_tybyria.py) usa sem torch para
+medir o padding.
+"""
+
+from typing import Iterator, List, Sequence, Tuple
+
+
+def fatiar(itens: Sequence, tamanho: int) -> Iterator[Sequence]:
+    """Pedaços consecutivos de `tamanho` itens (o último pode ser menor)."""
+    tamanho = max(1, tamanho)
+    for i in range(0, len(itens), tamanho):
+        yield itens[i:i + tamanho]
+
+
+def montar_lotes(comprimentos: Sequence[int], orcamento_tokens: int, max_lote: int) -> List[List[int]]:
+    """
+    Posições de `comprimentos` agrupadas em lotes, do mais longo para o mais
+    curto (o lote mais pesado vem primeiro: falta de memória aparece logo).
+    Cada lote respeita linhas x maior comprimento <= orcamento_tokens (um
+    texto sozinho sempre cabe) e no máximo max_lote linhas.
+    """
+    ordem = sorted(range(len(comprimentos)), key=lambda i: comprimentos[i], reverse=True)
+    lotes: List[List[int]] = []
+    atual: List[int] = []
+    maior = 0
+    for i in ordem:
+        if not atual:
+            maior = max(comprimentos[i], 1)
+        elif len(atual) >= max_lote or (len(atual) + 1) * maior > orcamento_tokens:
+            lotes.append(atual)
+            atual = []
+            maior = max(comprimentos[i], 1)
+        atual.append(i)
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
+def lotes_fixos(n: int, tamanho_lote: int) -> List[List[int]]:
+    """Lotes em ordem de arquivo com tamanho fixo (o agendamento antigo; para comparação)."""
+    return [list(range(i, min(i + tamanho_lote, n))) for i in range(0, n, max(1, tamanho_lote))]
+
+
+def custo_padding(comprimentos: Sequence[int], lotes: List[List[int]]) -> Tuple[int, int]:
+    """(tokens de verdade, tokens processados com o padding de cada lote)."""
+    uteis = sum(comprimentos)
+    com_padding = sum(len(lote) * max(comprimentos[i] for i in lote) for lote in lotes if lote)
+    return uteis, com_padding
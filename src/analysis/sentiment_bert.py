@@ -5,6 +5,8 @@ from tqdm import tqdm
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch.nn.functional as F
 
+from src.analysis.tokens_cache import obter_tokens
+
 
 # ====== CONFIG GERAL ======
 
@@ -112,8 +114,15 @@ def main():
 
     # 3) Processa em batch
     batch_size = 32
+    max_length = 256
     texts = df["text"].tolist()
 
+    # tokeniza tudo uma vez (em paralelo, com cache em disco): rodar de novo só faz o forward
+    print("🔤 Tokenizando...")
+    tokens = obter_tokens(tokenizer, texts, max_length, nome=os.path.basename(INPUT_CSV))
+    print(f"🔤 Tokens: {tokens.descrever()}")
+    pad_id = tokenizer.pad_token_id or 0
+
     all_stars = []
     all_labels = []
     all_polarity = []
@@ -127,16 +136,11 @@ def main():
     print("⚙️ Calculando sentimento (BERT - nlptown 5 classes)...")
 
     for i in tqdm(range(0, len(texts), batch_size)):
-        batch_texts = texts[i: i + batch_size]
-
-        encodings = tokenizer(
-            batch_texts,
-            padding=True,
-            truncation=True,
-            max_length=256,
-            return_tensors="pt",
-        )
-        encodings = {k: v.to(device) for k, v in encodings.items()}
+        input_ids, attention_mask = tokens.lote(range(i, min(i + batch_size, len(texts))), pad_id)
+        encodings = {
+            "input_ids": torch.from_numpy(input_ids).to(device),
+            "attention_mask": torch.from_numpy(attention_mask).to(device),
+        }
 
         with torch.no_grad():
             outputs = model(**encodings)
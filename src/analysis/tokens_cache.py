@@ -0,0 +1,224 @@
+"""
+Tokenização separada da inferência, com o resultado guardado em disco.
+
+Rodar o Tybyria (ou o BERT de sentimento) de novo no mesmo arquivo, depois de
+mudar o threshold ou de uma queda, tokenizava tudo outra vez. Aqui:
+
+  - a tokenização usa o modo em lote do tokenizer rápido, em pedaços de
+    TOKENS_PEDACO textos repartidos entre TOKENS_PROCESSOS processos
+    (multiprocessing.Pool, tokenizer enviado uma vez a cada worker);
+  - o resultado vai para TOKENS_CACHE_DIR/<arquivo>-<chave>/ em dois .npy
+    (abertos com mmap, sem carregar tudo na RAM):
+        ids.npy      int32, os input_ids de todas as linhas concatenados
+        offsets.npy  int64, onde começa cada linha (n + 1 posições)
+    A attention_mask é 1 em todo token guardado e 0 no padding, então ela sai
+    dos comprimentos: cada lote é completado só até o maior texto dele
+    (lote(), com os lotes por comprimento de lotes_tybyria.py), sem gravar
+    padding em disco;
+  - a chave é o hash do tokenizer (vocabulário + normalização, sem o estado de
+    truncation/padding), o max_length e o hash dos textos do arquivo de
+    entrada: outro modelo, outro max_length ou outro conteúdo geram outra
+    entrada; a mesma entrada é reaproveitada e a inferência só faz forward.
+
+TOKENS_CACHE=0 tokeniza (em paralelo) sem gravar nada.
+"""
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TOKENS_CACHE = os.getenv("TOKENS_CACHE", "1") == "1"
+TOKENS_CACHE_DIR = os.getenv("TOKENS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "lgbtminas_tokens"))
+TOKENS_PROCESSOS = int(os.getenv("TOKENS_PROCESSOS", str(max(1, (os.cpu_count() or 2) // 2))))
+TOKENS_PEDACO = int(os.getenv("TOKENS_PEDACO", "20000"))
+
+VERSAO = 1
+
+# Estado de cada worker (montado uma vez no initializer do Pool)
+_ESTADO: dict = {}
+
+
+# ==========================================================
+# chave
+# ==========================================================
+def hash_tokenizer(tokenizer) -> str:
+    """Identifica vocabulário + pré-processamento do tokenizer (não o estado de truncation/padding)."""
+    h = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        # o __call__ liga truncation/padding no backend: isso não muda os ids, fica fora do hash
+        config = json.loads(backend.to_str())
+        config.pop("truncation", None)
+        config.pop("padding", None)
+        h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    else:
+        h.update(json.dumps(tokenizer.get_vocab(), sort_keys=True).encode("utf-8"))
+        h.update(str(getattr(tokenizer, "do_lower_case", "")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def hash_textos(textos: Sequence[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(textos)).encode("ascii"))
+    for texto in textos:
+        h.update(texto.encode("utf-8", errors="surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def chave_cache(tokenizer, textos: Sequence[str], max_len: int) -> str:
+    identidade = f"v{VERSAO}|{hash_tokenizer(tokenizer)}|{max_len}|{hash_textos(textos)}"
+    return hashlib.sha256(identidade.encode("ascii")).hexdigest()[:32]
+
+
+# ==========================================================
+# resultado
+# ==========================================================
+def preencher(seqs: Sequence[Sequence[int]], pad_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(input_ids, attention_mask) int64 [n, maior], padding à direita até o maior da lista."""
+    maior = max((len(s) for s in seqs), default=0)
+    input_ids = np.full((len(seqs), maior), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(seqs), maior), dtype=np.int64)
+    for k, s in enumerate(seqs):
+        input_ids[k, : len(s)] = s
+        attention_mask[k, : len(s)] = 1
+    return input_ids, attention_mask
+
+
+class TextosTokenizados:
+    """input_ids de n textos (ids concatenados + offsets), em memória ou mmap do cache."""
+
+    def __init__(self, ids: np.ndarray, offsets: np.ndarray, diretorio: str = "", reaproveitado: bool = False):
+        self.ids = ids
+        self.offsets = offsets
+        self.diretorio = diretorio  # "" = só em memória (TOKENS_CACHE=0)
+        self.reaproveitado = reaproveitado  # True = veio do cache, sem tokenizar
+
+    def descrever(self) -> str:
+        origem = "do cache" if self.reaproveitado else ("tokenizados e gravados" if self.diretorio else "tokenizados (sem cache)")
+        return f"{len(self):,} linhas, {int(self.offsets[-1]):,} tokens {origem}" + (f" em {self.diretorio}" if self.diretorio else "")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def comprimentos(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def linha(self, i: int) -> np.ndarray:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def lote(self, posicoes: Sequence[int], pad_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(input_ids, attention_mask) das linhas em `posicoes`, completadas até a maior delas."""
+        return preencher([self.linha(i) for i in posicoes], pad_id)
+
+
+# ==========================================================
+# tokenização em paralelo
+# ==========================================================
+def _juntar(listas_ids: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    comprimentos = np.fromiter((len(x) for x in listas_ids), dtype=np.int64, count=len(listas_ids))
+    ids = np.fromiter((t for x in listas_ids for t in x), dtype=np.int32, count=int(comprimentos.sum()))
+    return ids, comprimentos
+
+
+def _init_worker(tokenizer, max_len: int) -> None:
+    # cada worker já é um processo: sem as threads do próprio tokenizer disputando CPU
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _ESTADO["tokenizer"] = tokenizer
+    _ESTADO["max_len"] = max_len
+
+
+def _tokenizar_pedaco(textos: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    ids = _ESTADO["tokenizer"](textos, truncation=True, max_length=_ESTADO["max_len"])["input_ids"]
+    return _juntar(ids)
+
+
+def tokenizar(tokenizer, textos: Sequence[str], max_len: int, processos: int = TOKENS_PROCESSOS, pedaco: int = TOKENS_PEDACO):
+    """(ids int32 concatenados, offsets int64) de todos os textos, na ordem."""
+    pedacos = [list(textos[i:i + pedaco]) for i in range(0, len(textos), max(1, pedaco))]
+    if processos <= 1 or len(pedacos) <= 1:
+        _init_worker(tokenizer, max_len)
+        partes = [_tokenizar_pedaco(p) for p in pedacos]
+    else:
+        with mp.Pool(processes=min(processos, len(pedacos)), initializer=_init_worker, initargs=(tokenizer, max_len)) as pool:
+            partes = pool.map(_tokenizar_pedaco, pedacos)
+
+    ids = np.concatenate([p[0] for p in partes]) if partes else np.zeros(0, dtype=np.int32)
+    comprimentos = np.concatenate([p[1] for p in partes]) if partes else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(comprimentos) + 1, dtype=np.int64)
+    np.cumsum(comprimentos, out=offsets[1:])
+    return ids, offsets
+
+
+# ==========================================================
+# cache em disco
+# ==========================================================
+def _abrir(diretorio: str, reaproveitado: bool) -> TextosTokenizados:
+    ids = np.load(os.path.join(diretorio, "ids.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(diretorio, "offsets.npy"), mmap_mode="r")
+    return TextosTokenizados(ids, offsets, diretorio, reaproveitado)
+
+
+def _gravar(diretorio: str, ids: np.ndarray, offsets: np.ndarray, meta: dict) -> None:
+    pai = os.path.dirname(diretorio)
+    os.makedirs(pai, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=pai, suffix=".parcial")
+    try:
+        np.save(os.path.join(tmp, "ids.npy"), ids)
+        np.save(os.path.join(tmp, "offsets.npy"), offsets)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # a entrada só aparece completa (outro processo pode ter gravado a mesma chave antes)
+        try:
+            os.rename(tmp, diretorio)
+        except OSError:
+            if not os.path.exists(os.path.join(diretorio, "meta.json")):
+                raise
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def obter_tokens(
+    tokenizer,
+    textos: Sequence[str],
+    max_len: int,
+    nome: str = "",
+    usar_cache: bool = TOKENS_CACHE,
+    diretorio: str = TOKENS_CACHE_DIR,
+    processos: int = TOKENS_PROCESSOS,
+    pedaco: int = TOKENS_PEDACO,
+) -> TextosTokenizados:
+    """
+    Tokens dos `textos` (truncados em max_len, sem padding): do cache se a
+    chave (tokenizer + max_len + textos) já existe, senão tokeniza em
+    paralelo e grava. `nome` (ex.: o arquivo de entrada) só entra no nome da pasta.
+    """
+    entrada: Optional[str] = None
+    if usar_cache:
+        chave = chave_cache(tokenizer, textos, max_len)
+        prefixo = os.path.splitext(os.path.basename(nome))[0] if nome else "textos"
+        entrada = os.path.join(diretorio, f"{prefixo}-{chave}")
+        if os.path.exists(os.path.join(entrada, "meta.json")):
+            return _abrir(entrada, reaproveitado=True)
+
+    ids, offsets = tokenizar(tokenizer, textos, max_len, processos, pedaco)
+    if entrada is None:
+        return TextosTokenizados(ids, offsets)
+
+    meta = {
+        "versao": VERSAO,
+        "nome": nome,
+        "tokenizer": getattr(tokenizer, "name_or_path", ""),
+        "max_len": max_len,
+        "linhas": len(offsets) - 1,
+        "tokens": int(offsets[-1]),
+    }
+    _gravar(entrada, ids, offsets, meta)
+    return _abrir(entrada, reaproveitado=False)
@@ -5,6 +5,7 @@ import os
 import sys
 import io
 import hashlib
+import time
 from dataclasses import dataclass
 from typing import Iterable, List, Optional, Set, Tuple
 
@@ -12,16 +13,36 @@ import pandas as pd
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from tqdm import tqdm
-from google.cloud import storage
+
+from src.analysis.log_scores import LogScores
+from src.analysis.lotes_tybyria import custo_padding, fatiar, montar_lotes
+from src.analysis.tokens_cache import hash_textos, obter_tokens, preencher
+from src.analysis.tybyria_onnx import BACKENDS, SessaoOnnx, preparar_onnx
+from src.analysis.tybyria_paralelo import PoolTybyria, resolver_processos
+from src.utils.armazenamento_gcs import cliente_gcs, enviar_arquivo
+from src.utils.download_gcs import baixar_blob
+from src.utils.tabela import eh_parquet, eh_tabela, preferir_parquet, sem_extensao
+from src.utils.limpeza_df import dtype_texto, ler_csv_limpo, normalizar_textos, substituir_coluna
 
 
 # ==========================================================
 # CONFIG (via env vars ou defaults)
 # ==========================================================
-MODEL_NAME = os.getenv("TYBYRIA_MODEL_NAME", "Veronyka/tybyria-v2.1")
+MODEL_NAME = os.getenv("TYBYRIA_MODEL_NAME", "Veronyka/tybyria-v2.1")  # nome no Hub ou pasta local
+# torch (fp32), onnx ou onnx-int8 (ONNX Runtime na CPU, ver src/analysis/tybyria_onnx.py)
+BACKEND = os.getenv("TYBYRIA_BACKEND", "torch").strip().lower()
 THRESHOLD = float(os.getenv("TYBYRIA_THRESHOLD", "0.30"))
 BATCH_SIZE = int(os.getenv("TYBYRIA_BATCH_SIZE", "32"))
 MAX_LEN = int(os.getenv("TYBYRIA_MAX_LEN", "64"))
+# Lotes por comprimento (ver src/analysis/lotes_tybyria.py): até TOKENS_LOTE tokens com padding e
+# MAX_LOTE linhas por lote; os textos são tokenizados e ordenados em janelas de JANELA_LOTES
+TOKENS_LOTE = int(os.getenv("TYBYRIA_TOKENS_LOTE", str(BATCH_SIZE * MAX_LEN)))
+MAX_LOTE = int(os.getenv("TYBYRIA_MAX_LOTE", "256"))
+JANELA_LOTES = int(os.getenv("TYBYRIA_JANELA_LOTES", "20000"))
+# Vários processos na CPU (ver src/analysis/tybyria_paralelo.py): número ou "auto";
+# threads por worker: 0 = núcleos / processos
+PROCESSOS = resolver_processos(os.getenv("TYBYRIA_PROCESSOS", "1"))
+THREADS_WORKER = int(os.getenv("TYBYRIA_THREADS_WORKER", "0"))
 
 # Bucket/prefixos
 BUCKET_NAME = os.getenv("TYBYRIA_BUCKET", "").strip()
@@ -38,6 +59,9 @@ CHECKPOINT_EVERY = int(os.getenv("TYBYRIA_CHECKPOINT_EVERY", "128"))
 
 # Nome das colunas esperadas
 TEXT_COL = os.getenv("TYBYRIA_TEXT_COL", "text_original").strip()
+
+# Lê as colunas como string[pyarrow] (bem menos memória que objetos str do Python), se o pyarrow existir
+TEXTO_ARROW = os.getenv("TYBYRIA_TEXTO_ARROW", "1") == "1"
 SCORE_COL = "tybyria_score"
 LABEL_COL = "tybyria_label"
 
@@ -73,19 +97,18 @@ def clean_df_for_tybyria(df: pd.DataFrame, text_col: str = TEXT_COL) -> pd.DataF
     if df is None or df.empty:
         return df
 
-    df = df.dropna(how="all").copy()
+    df = df.dropna(how="all")
 
     if text_col not in df.columns:
-        return df
+        return df.copy()
 
-    # Normaliza texto
-    s = df[text_col].astype(str).str.strip()
-    s = s.replace("nan", "", regex=False)
+    # Normaliza texto (str + strip + "nan" -> "") e já descarta vazios, numa passada só
+    mantidas, textos = normalizar_textos(df[text_col])
+    dtype = df[text_col].dtype
 
-    df[text_col] = s
-
-    # Remove linhas com texto vazio
-    df = df[df[text_col].notna() & (df[text_col] != "")]
+    # df[mantidas] já é um DataFrame novo (copy-on-write): um .copy() aqui seria a 2ª cópia de todas as colunas
+    df = df[mantidas]
+    substituir_coluna(df, text_col, textos, dtype)
     return df
 
 
@@ -94,19 +117,20 @@ def clean_df_for_tybyria(df: pd.DataFrame, text_col: str = TEXT_COL) -> pd.DataF
 # ==========================================================
 class GCS:
     def __init__(self, bucket_name: str):
-        self.client = storage.Client()
+        self.client = cliente_gcs()
         self.bucket_name = bucket_name
         self.bucket = self.client.bucket(bucket_name)
 
     def blob_exists(self, gcs_path: str) -> bool:
         return self.bucket.blob(gcs_path).exists(self.client)
 
-    def download_to(self, gcs_path: str, local_path: str):
-        ensure_dir(os.path.dirname(local_path))
-        self.bucket.blob(gcs_path).download_to_filename(local_path)
+    def download_to(self, gcs_path: str, local_path: str, usar_cache: bool = True):
+        # fatias em paralelo + crc32c + cache local (rodar de novo o mesmo mês não baixa nada)
+        baixar_blob(self.bucket, gcs_path, local_path, usar_cache=usar_cache)
 
     def upload_from(self, local_path: str, gcs_path: str):
-        self.bucket.blob(gcs_path).upload_from_filename(local_path)
+        # resumível (composto em partes paralelas se for grande) + conferência do crc32c
+        enviar_arquivo(local_path, f"gs://{self.bucket_name}/{gcs_path}", client=self.client)
 
     def delete_blob(self, gcs_path: str):
         self.bucket.blob(gcs_path).delete()
@@ -116,6 +140,11 @@ class GCS:
             if b.name.endswith(".csv"):
                 yield b.name
 
+    def list_tabelas(self, prefix: str) -> List[str]:
+        """CSV e Parquet; se o mesmo arquivo existe nos dois formatos, fica o Parquet."""
+        nomes = [b.name for b in self.client.list_blobs(self.bucket_name, prefix=prefix) if eh_tabela(b.name)]
+        return preferir_parquet(nomes)
+
 
 # ==========================================================
 # TYBYRIA INFERENCE
@@ -123,11 +152,29 @@ class GCS:
 @dataclass
 class TybyriaRuntime:
     tokenizer: AutoTokenizer
-    model: AutoModelForSequenceClassification
+    model: Optional[AutoModelForSequenceClassification]
     device: torch.device
+    backend: str = "torch"
+    onnx: Optional[SessaoOnnx] = None  # backends onnx/onnx-int8 (model fica None)
+
+
+def load_tybyria_runtime(backend: str = BACKEND) -> TybyriaRuntime:
+    if backend not in BACKENDS:
+        die(f"TYBYRIA_BACKEND desconhecido: {backend} (use {', '.join(BACKENDS)})")
+
+    if backend != "torch":
+        print(f"🚀 Backend: {backend} (ONNX Runtime, CPU)")
+        print("📦 Carregando tokenizer/modelo ONNX...")
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        sessao = preparar_onnx(
+            MODEL_NAME,
+            backend,
+            tokenizer,
+            lambda: AutoModelForSequenceClassification.from_pretrained(MODEL_NAME),
+        )
+        print(f"⚙️ Modelo: {sessao.caminho}")
+        return TybyriaRuntime(tokenizer=tokenizer, model=None, device=torch.device("cpu"), backend=backend, onnx=sessao)
 
-
-def load_tybyria_runtime() -> TybyriaRuntime:
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"🚀 Dispositivo: {device}")
 
@@ -139,36 +186,65 @@ def load_tybyria_runtime() -> TybyriaRuntime:
     return TybyriaRuntime(tokenizer=tokenizer, model=model, device=device)
 
 
+def _scores(rt: TybyriaRuntime, inputs) -> List[float]:
+    with torch.no_grad():
+        outputs = rt.model(**inputs)
+        probs = torch.nn.functional.softmax(outputs.logits, dim=1)
+        return probs[:, 1].detach().cpu().numpy().tolist()
+
+
 def infer_batch(rt: TybyriaRuntime, texts: List[str]) -> List[float]:
     inputs = rt.tokenizer(
         texts,
         padding=True,
         truncation=True,
         max_length=MAX_LEN,
-        return_tensors="pt",
-    ).to(rt.device)
+        return_tensors="np",
+    )
+    return infer_arrays(rt, inputs["input_ids"], inputs["attention_mask"])
 
-    with torch.no_grad():
-        outputs = rt.model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=1)
-        scores = probs[:, 1].detach().cpu().numpy().tolist()
 
-    return scores
+def tokenize_texts(rt: TybyriaRuntime, texts: List[str]) -> List[List[int]]:
+    """input_ids sem padding (truncados em MAX_LEN), para montar os lotes por comprimento."""
+    return rt.tokenizer(texts, truncation=True, max_length=MAX_LEN)["input_ids"]
+
+
+def infer_ids(rt: TybyriaRuntime, ids: List[List[int]]) -> List[float]:
+    """Scores de textos já tokenizados: padding só até o maior do lote (à direita, com máscara)."""
+    input_ids, attention_mask = preencher(ids, rt.tokenizer.pad_token_id or 0)
+    return infer_arrays(rt, input_ids, attention_mask)
+
+
+def infer_arrays(rt: TybyriaRuntime, input_ids, attention_mask) -> List[float]:
+    """Scores a partir de input_ids/attention_mask já montados (arrays NumPy int64): só o forward."""
+    if rt.onnx is not None:
+        return rt.onnx.scores(input_ids, attention_mask)
+    inputs = {
+        "input_ids": torch.from_numpy(input_ids).to(rt.device),
+        "attention_mask": torch.from_numpy(attention_mask).to(rt.device),
+    }
+    return _scores(rt, inputs)
 
 
 # ==========================================================
 # PIPELINE (processed -> clean -> tybyria -> analysis)
 # ==========================================================
 def output_name_from_input(gcs_in: str) -> str:
-    """processed/RC_2025-02_BR.csv -> analysis/RC_2025-02_BR_tybyria.csv"""
-    base = os.path.basename(gcs_in)
-    return f"{OUTPUT_PREFIX}{base.replace('.csv', '_tybyria.csv')}"
+    """processed/RC_2025-02_BR.csv (ou .parquet) -> analysis/RC_2025-02_BR_tybyria.csv"""
+    base = sem_extensao(os.path.basename(gcs_in))
+    return f"{OUTPUT_PREFIX}{base}_tybyria.csv"
 
 
 def checkpoint_name_from_input(gcs_in: str) -> str:
-    """checkpoint em tmp/ com nome estável"""
-    base = os.path.basename(gcs_in)
-    return f"{TMP_PREFIX}{base.replace('.csv', '_parcial.csv')}"
+    """checkpoint CSV do formato antigo em tmp/ (só lido, para retomar execuções antigas)"""
+    base = sem_extensao(os.path.basename(gcs_in))
+    return f"{TMP_PREFIX}{base}_parcial.csv"
+
+
+def score_log_prefix_from_input(gcs_in: str) -> str:
+    """log de scores (checkpoint) em tmp/<base>_scores/ (ver src/analysis/log_scores.py)"""
+    base = sem_extensao(os.path.basename(gcs_in))
+    return f"{TMP_PREFIX}{base}_scores/"
 
 
 def local_paths_for_input(gcs_in: str) -> Tuple[str, str, str, str]:
@@ -176,41 +252,75 @@ def local_paths_for_input(gcs_in: str) -> Tuple[str, str, str, str]:
     Retorna:
     - local_in (baixado)
     - local_clean (limpo)
-    - local_tmp (checkpoint)
+    - local_tmp (checkpoint CSV antigo, só para retomar)
     - local_out (final)
     """
-    base = os.path.basename(gcs_in)
-    local_in = os.path.join(LOCAL_WORKDIR, base)
-    local_clean = os.path.join(LOCAL_WORKDIR, base.replace(".csv", "_clean.csv"))
-    local_tmp = os.path.join(LOCAL_WORKDIR, base.replace(".csv", "_parcial.csv"))
-    local_out = os.path.join(LOCAL_WORKDIR, base.replace(".csv", "_tybyria.csv"))
+    local_in = os.path.join(LOCAL_WORKDIR, os.path.basename(gcs_in))
+    base = sem_extensao(os.path.basename(gcs_in))
+    local_clean = os.path.join(LOCAL_WORKDIR, f"{base}_clean.csv")
+    local_tmp = os.path.join(LOCAL_WORKDIR, f"{base}_parcial.csv")
+    local_out = os.path.join(LOCAL_WORKDIR, f"{base}_tybyria.csv")
     return local_in, local_clean, local_tmp, local_out
 
 
 def read_csv_safely(path: str) -> pd.DataFrame:
+    if eh_parquet(path):
+        # mesmo contrato do read_csv abaixo: tudo string, nulo vira ""
+        df = pd.read_parquet(path)
+        return df.astype(object).where(df.notna(), "").astype(str)
+
     # dtype=str + keep_default_na=False evita NaNs chatos e preserva strings
+    # (string[pyarrow] guarda os mesmos textos num buffer Arrow, sem um objeto por célula)
     return pd.read_csv(
         path,
-        dtype=str,
+        dtype=dtype_texto(TEXTO_ARROW),
         keep_default_na=False,
         skip_blank_lines=True,
     )
 
 
+def read_clean_for_tybyria(path: str, text_col: str = TEXT_COL) -> Optional[pd.DataFrame]:
+    """
+    read_csv_safely + clean_df_for_tybyria. CSV com TEXTO_ARROW e pyarrow é
+    lido e limpo em blocos (ler_csv_limpo), sem o input inteiro na memória
+    junto com o limpo. None se não tem a coluna de texto.
+    """
+    if TEXTO_ARROW and not eh_parquet(path):
+        try:
+            df = ler_csv_limpo(path, text_col)
+        except KeyError:
+            return None
+        if df is not None:
+            return df
+
+    df = read_csv_safely(path)
+    if text_col not in df.columns:
+        return None
+    return clean_df_for_tybyria(df, text_col)
+
+
 def write_csv(df: pd.DataFrame, path: str):
     ensure_dir(os.path.dirname(path))
     df.to_csv(path, index=False)
 
 
-def compute_start_idx_from_checkpoint(df_ckpt: pd.DataFrame) -> int:
-    if df_ckpt is None or df_ckpt.empty:
-        return 0
-    if SCORE_COL not in df_ckpt.columns:
-        return 0
-    # conta quantos já têm score preenchido
+def read_legacy_checkpoint(gcs: GCS, gcs_tmp: str, local_tmp: str, total: int) -> List[Tuple[int, float]]:
+    """(linha, score) de um checkpoint CSV do formato antigo, se houver um com as mesmas linhas."""
+    if not gcs.blob_exists(gcs_tmp):
+        return []
+    print(f"🔄 Checkpoint CSV antigo encontrado no GCS: {gcs_tmp}")
+    try:
+        gcs.download_to(gcs_tmp, local_tmp, usar_cache=False)
+        df_ckpt = read_csv_safely(local_tmp)
+    except Exception as e:
+        print(f"⚠️  Falha ao ler checkpoint ({e}). Vou recomeçar do zero.")
+        return []
+    if SCORE_COL not in df_ckpt.columns or len(df_ckpt) != total:
+        print("⚠️  Checkpoint antigo não bate com o input limpo. Vou recomeçar do zero.")
+        return []
     # como dtype=str pode vir string vazia, então normaliza
-    filled = df_ckpt[SCORE_COL].astype(str).str.strip()
-    return int((filled != "").sum())
+    preenchidos = df_ckpt[SCORE_COL].astype(str).str.strip().tolist()
+    return [(i, float(s)) for i, s in enumerate(preenchidos) if s]
 
 
 def process_one_file(
@@ -218,6 +328,7 @@ def process_one_file(
     rt: TybyriaRuntime,
     gcs_in: str,
     delete_checkpoint_after: bool = True,
+    pool: Optional[PoolTybyria] = None,
 ):
     name = os.path.basename(gcs_in)
 
@@ -234,81 +345,110 @@ def process_one_file(
     print(f"⬇️  Baixando processed...")
     gcs.download_to(gcs_in, local_in)
 
-    # 2) Tenta retomar checkpoint
-    df_proc: Optional[pd.DataFrame] = None
-    start_idx = 0
-
-    if gcs.blob_exists(gcs_tmp):
-        print(f"🔄 Checkpoint encontrado no GCS: {gcs_tmp}")
-        try:
-            gcs.download_to(gcs_tmp, local_tmp)
-            df_proc = read_csv_safely(local_tmp)
-            start_idx = compute_start_idx_from_checkpoint(df_proc)
-            print(f"🔁 Retomando da linha {start_idx}")
-        except Exception as e:
-            print(f"⚠️  Falha ao ler checkpoint ({e}). Vou recomeçar do zero.")
-            df_proc = None
-            start_idx = 0
-
-    # 3) Se não retomou, inicia do zero: lê, limpa, cria colunas
-    if df_proc is None or start_idx == 0:
-        df_original = read_csv_safely(local_in)
-
-        if TEXT_COL not in df_original.columns:
-            print(f"⚠️  {name} não tem coluna '{TEXT_COL}'. Pulando.")
-            return
-
-        # ✅ limpeza
-        df_clean = clean_df_for_tybyria(df_original, TEXT_COL)
-        if df_clean is None or df_clean.empty:
-            print(f"⚠️  {name}: vazio após limpeza. Pulando.")
-            return
-
-        # opcional: salvar o "clean" local pra debug
-        write_csv(df_clean, local_clean)
+    # 2) Lê e limpa o input: o estado de uma retomada é (input limpo + log de scores)
+    df_proc = read_clean_for_tybyria(local_in, TEXT_COL)
+    if df_proc is None:
+        print(f"⚠️  {name} não tem coluna '{TEXT_COL}'. Pulando.")
+        return
+    if df_proc.empty:
+        print(f"⚠️  {name}: vazio após limpeza. Pulando.")
+        return
 
-        df_proc = df_clean.copy()
-        df_proc[SCORE_COL] = ""
-        df_proc[LABEL_COL] = ""
-        start_idx = 0
+    # opcional: salvar o "clean" local pra debug
+    write_csv(df_proc, local_clean)
 
-    # 4) roda batches
     texts = df_proc[TEXT_COL].astype(str).tolist()
     total = len(texts)
-    if total == 0:
-        print(f"⚠️  {name}: sem textos após limpeza. Pulando.")
-        return
-
-    pbar = tqdm(range(start_idx, total, BATCH_SIZE), desc=f"Analisando {name}")
-
-    for i in pbar:
-        end = min(i + BATCH_SIZE, total)
-        batch_texts = texts[i:end]
-
-        scores = infer_batch(rt, batch_texts)
-
-        # escreve nos índices corretos do df (preserva index original)
-        idx_slice = df_proc.index[i:end]
-        df_proc.loc[idx_slice, SCORE_COL] = [str(x) for x in scores]
-        df_proc.loc[idx_slice, LABEL_COL] = ["1" if x >= THRESHOLD else "0" for x in scores]
-
-        # checkpoint
-        if CHECKPOINT_EVERY > 0 and (i > start_idx) and (i % CHECKPOINT_EVERY == 0):
-            write_csv(df_proc, local_tmp)
-            gcs.upload_from(local_tmp, gcs_tmp)
-            tqdm.write(f"💾 Checkpoint salvo: linha {i}/{total}")
+    scores = [""] * total
+    labels = [""] * total
+
+    # 3) Retoma do log de scores (ou de um checkpoint CSV do formato antigo)
+    log = LogScores(gcs.client, BUCKET_NAME, score_log_prefix_from_input(gcs_in))
+    identidade = hash_textos(texts)
+    feitos = log.carregar(total, identidade)
+    if feitos is None:
+        feitos = read_legacy_checkpoint(gcs, gcs_tmp, local_tmp, total)
+        log.iniciar(total, identidade)
+        log.acrescentar(feitos)
+    for i, score in feitos:
+        scores[i] = str(score)
+        labels[i] = "1" if score >= THRESHOLD else "0"
+
+    # 4) roda lotes por comprimento em tokens, só nas linhas ainda sem score
+    # (com lotes fora de ordem o log tem linhas pontuadas espalhadas, não um prefixo)
+    pendentes = [i for i, s in enumerate(scores) if not s]
+    start_idx = total - len(pendentes)
+    if start_idx:
+        print(f"🔁 Retomando: {start_idx:,} linhas já têm score")
+
+    def gravar_colunas():
+        # mesma ordem de linhas do df: o score volta para a linha de onde o texto saiu
+        df_proc[SCORE_COL] = scores
+        df_proc[LABEL_COL] = labels
+
+    # tokens de todas as linhas (não só das pendentes): a chave do cache não muda ao retomar
+    tokens = obter_tokens(rt.tokenizer, texts, MAX_LEN, nome=name)
+    print(f"🔤 Tokens: {tokens.descrever()}")
+    todos_comprimentos = tokens.comprimentos()
+    pad_id = rt.tokenizer.pad_token_id or 0
+
+    pbar = tqdm(total=len(pendentes), desc=f"Analisando {name}")
+    novos: List[Tuple[int, float]] = []
+    tokens_uteis = tokens_com_padding = 0
+    t0 = time.perf_counter()
+
+    for janela in fatiar(pendentes, JANELA_LOTES):
+        comprimentos = [int(todos_comprimentos[i]) for i in janela]
+        lotes = montar_lotes(comprimentos, TOKENS_LOTE, MAX_LOTE)
+        uteis, com_padding = custo_padding(comprimentos, lotes)
+        tokens_uteis += uteis
+        tokens_com_padding += com_padding
+
+        entradas = (tokens.lote([janela[j] for j in lote], pad_id) for lote in lotes)
+        if pool is not None:
+            resultados = pool.pontuar(entradas)
+        else:
+            resultados = (infer_arrays(rt, input_ids, attention_mask) for input_ids, attention_mask in entradas)
+
+        # os scores chegam na ordem dos lotes (mesmo vindo de vários workers)
+        for lote, lote_scores in zip(lotes, resultados):
+            for pos, score in zip(lote, lote_scores):
+                i = janela[pos]
+                scores[i] = str(score)
+                labels[i] = "1" if score >= THRESHOLD else "0"
+                novos.append((i, score))
+            pbar.update(len(lote))
+
+            # checkpoint: só os pares novos (linha, score) vão para o log
+            if CHECKPOINT_EVERY > 0 and len(novos) >= CHECKPOINT_EVERY:
+                enviados = log.acrescentar(novos)
+                novos = []
+                tqdm.write(f"💾 Checkpoint salvo: {pbar.n + start_idx}/{total} linhas (+{enviados / 1024:,.1f} KB no log)")
+
+    pbar.close()
+    dt = time.perf_counter() - t0
+    if pendentes and dt > 0:
+        print(f"⏱️ {len(pendentes):,} textos em {dt:,.1f} s ({len(pendentes) / dt:,.1f} textos/s, {pool.descrever() if pool else 'um processo'})")
+    if tokens_com_padding:
+        print(
+            f"🧮 Tokens: {tokens_uteis:,} de verdade em {tokens_com_padding:,} processados "
+            f"({100 * (1 - tokens_uteis / tokens_com_padding):.1f}% padding)"
+        )
 
     # 5) finaliza
+    gravar_colunas()
     write_csv(df_proc, local_out)
     gcs.upload_from(local_out, gcs_out)
     print(f"✅ Finalizado: gs://{BUCKET_NAME}/{gcs_out}")
 
     # 6) remove checkpoint (opcional)
-    if delete_checkpoint_after and gcs.blob_exists(gcs_tmp):
+    if delete_checkpoint_after:
         try:
-            gcs.delete_blob(gcs_tmp)
+            log.apagar()
+            if gcs.blob_exists(gcs_tmp):
+                gcs.delete_blob(gcs_tmp)
         except Exception as e:
-            print(f"⚠️  Não consegui deletar checkpoint {gcs_tmp}: {e}")
+            print(f"⚠️  Não consegui deletar checkpoint {log.prefixo}: {e}")
 
     # 7) limpa local (opcional)
     for p in (local_in, local_clean, local_tmp, local_out):
@@ -332,7 +472,7 @@ def main():
     rt = load_tybyria_runtime()
 
     # 1) lista processed e analysis
-    processed_files = sorted(list(gcs.list_csv(INPUT_PREFIX)))
+    processed_files = sorted(gcs.list_tabelas(INPUT_PREFIX))
     if not processed_files:
         die(f"Nenhum CSV encontrado em gs://{BUCKET_NAME}/{INPUT_PREFIX}")
 
@@ -352,6 +492,16 @@ def main():
         print("✨ Nada a fazer. Tudo em processed já tem output em analysis.")
         return
 
+    # criado antes de qualquer inferência no processo principal (os workers herdam o modelo via fork)
+    # na GPU fica um processo só: CUDA não pode ser reinicializado num filho de fork
+    pool = None
+    if PROCESSOS > 1 and rt.device.type == "cuda":
+        print(f"⚠️ TYBYRIA_PROCESSOS={PROCESSOS} ignorado: modelo na GPU, seguindo com um processo")
+    elif PROCESSOS > 1:
+        pool = PoolTybyria(rt, infer_arrays, PROCESSOS, THREADS_WORKER)
+    if pool is not None:
+        print(f"🧵 Workers: {pool.descrever()}")
+
     # 3) processa pendentes
     for gcs_in in to_process:
         # segurança: se por algum motivo apareceu output enquanto você roda, pula
@@ -361,15 +511,19 @@ def main():
             continue
 
         try:
-            process_one_file(gcs, rt, gcs_in, delete_checkpoint_after=True)
+            process_one_file(gcs, rt, gcs_in, delete_checkpoint_after=True, pool=pool)
         except KeyboardInterrupt:
             print("\n⛔ Interrompido pelo usuário (Ctrl+C).")
+            if pool is not None:
+                pool.terminar()
             raise
         except Exception as e:
             print(f"❌ Erro processando {os.path.basename(gcs_in)}: {e}", file=sys.stderr)
             # continua para o próximo
             continue
 
+    if pool is not None:
+        pool.fechar()
     print("\n✨ Análise concluída!")
 
 
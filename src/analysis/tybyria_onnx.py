@@ -0,0 +1,204 @@
+"""
+Backend ONNX Runtime para o Tybyria na CPU (fp32 ou int8 dinâmico).
+
+As VMs do Tybyria não têm GPU e o PyTorch fp32 leva dias por mês de dados.
+Aqui o modelo (TYBYRIA_MODEL_NAME: nome no Hub ou pasta local) é:
+
+  - exportado uma vez para ONNX (torch.onnx.export, eixos dinâmicos de lote e
+    de sequência, saída = logits) em TYBYRIA_ONNX_DIR/<modelo>/model.onnx;
+  - opcionalmente quantizado com quantize_dynamic (pesos int8, ativações
+    quantizadas em tempo de execução) em model.int8.onnx;
+  - rodado numa InferenceSession do onnxruntime (CPUExecutionProvider, todas
+    as otimizações de grafo), com o mesmo softmax -> P(classe 1) do PyTorch.
+
+Os arquivos são refeitos se faltarem ou se a pasta local do modelo for mais
+nova que eles (ou com --refazer). A paridade com o PyTorch (diferença de score
+e de rótulo no TYBYRIA_THRESHOLD) é medida em src/bench/tybyria_onnx.py.
+
+Uso (só exportar/quantizar, sem processar nada):
+  python -m src.analysis.tybyria_onnx --modelo /modelos/tybyria-v2.1 --int8
+"""
+
+import argparse
+import os
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # opcional
+    ort = None
+
+try:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+except ImportError:  # opcional
+    quantize_dynamic = None
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_DIR = os.getenv("TYBYRIA_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "lgbtminas_onnx"))
+# 0 = padrão do onnxruntime (um thread por núcleo físico)
+ONNX_THREADS = int(os.getenv("TYBYRIA_ONNX_THREADS", "0"))
+ONNX_OPSET = int(os.getenv("TYBYRIA_ONNX_OPSET", "14"))
+
+
+# ==========================================================
+# arquivos
+# ==========================================================
+def caminhos_onnx(modelo: str, diretorio: str = ONNX_DIR) -> Tuple[str, str]:
+    """(model.onnx, model.int8.onnx) do modelo (nome do Hub ou pasta local)."""
+    nome = os.path.abspath(modelo) if os.path.isdir(modelo) else modelo
+    pasta = os.path.join(diretorio, nome.strip("/").replace("/", "__"))
+    return os.path.join(pasta, "model.onnx"), os.path.join(pasta, "model.int8.onnx")
+
+
+def _mtime_mais_novo(caminho: str) -> float:
+    if not os.path.isdir(caminho):
+        return os.path.getmtime(caminho)
+    return max((os.path.getmtime(os.path.join(raiz, a)) for raiz, _, arqs in os.walk(caminho) for a in arqs), default=0.0)
+
+
+def _desatualizado(arquivo: str, origem: str) -> bool:
+    """True se `arquivo` não existe ou se `origem` (arquivo ou pasta local) mudou depois dele."""
+    if not os.path.exists(arquivo):
+        return True
+    return os.path.exists(origem) and _mtime_mais_novo(origem) > os.path.getmtime(arquivo)
+
+
+def exportar_onnx(modelo_torch, tokenizer, destino: str, opset: int = ONNX_OPSET) -> str:
+    """Exporta o classificador (input_ids, attention_mask -> logits) para `destino`."""
+    import torch
+
+    class _Logits(torch.nn.Module):
+        def __init__(self, modelo):
+            super().__init__()
+            self.modelo = modelo
+
+        def forward(self, input_ids, attention_mask):
+            return self.modelo(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    exemplo = tokenizer(["texto de exemplo para exportar", "outro"], padding=True, return_tensors="pt")
+    tmp = destino + ".parcial"
+    with torch.no_grad():
+        torch.onnx.export(
+            _Logits(modelo_torch.cpu().eval()),
+            (exemplo["input_ids"], exemplo["attention_mask"]),
+            tmp,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "lote", 1: "seq"},
+                "attention_mask": {0: "lote", 1: "seq"},
+                "logits": {0: "lote"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    os.replace(tmp, destino)
+    return destino
+
+
+def quantizar_int8(origem: str, destino: str) -> str:
+    """Quantização dinâmica: pesos das camadas lineares em int8 (bem menor e mais rápido na CPU)."""
+    if quantize_dynamic is None:
+        raise ImportError("Quantização int8 pedida, mas onnxruntime.quantization não está disponível.")
+    tmp = destino + ".parcial"
+    quantize_dynamic(origem, tmp, weight_type=QuantType.QInt8)
+    os.replace(tmp, destino)
+    return destino
+
+
+# ==========================================================
+# inferência
+# ==========================================================
+def prob_classe1(logits: np.ndarray) -> np.ndarray:
+    """softmax(logits)[:, 1], como o torch.nn.functional.softmax do backend PyTorch."""
+    logits = logits.astype(np.float64)
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp[:, 1] / exp.sum(axis=1)
+
+
+class SessaoOnnx:
+    """InferenceSession do onnxruntime que devolve o score (P(classe 1)) de cada linha."""
+
+    def __init__(self, caminho: str, threads: int = ONNX_THREADS):
+        if ort is None:
+            raise ImportError("Backend ONNX pedido, mas onnxruntime não está instalado.")
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            opcoes.intra_op_num_threads = threads
+        self.caminho = caminho
+        self.sessao = ort.InferenceSession(caminho, opcoes, providers=["CPUExecutionProvider"])
+
+    def scores(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> List[float]:
+        entradas = {
+            "input_ids": np.ascontiguousarray(input_ids, dtype=np.int64),
+            "attention_mask": np.ascontiguousarray(attention_mask, dtype=np.int64),
+        }
+        logits = self.sessao.run(["logits"], entradas)[0]
+        return prob_classe1(logits).tolist()
+
+
+def preparar_onnx(
+    modelo: str,
+    backend: str,
+    tokenizer,
+    carregar_torch: Callable[[], object],
+    diretorio: str = ONNX_DIR,
+    refazer: bool = False,
+    threads: int = ONNX_THREADS,
+) -> SessaoOnnx:
+    """
+    Sessão do backend "onnx" ou "onnx-int8", exportando/quantizando antes se
+    preciso. `carregar_torch` só é chamado quando o ONNX tem que ser (re)feito.
+    """
+    if backend not in ("onnx", "onnx-int8"):
+        raise ValueError(f"Backend Tybyria desconhecido: {backend} (use {', '.join(BACKENDS)})")
+    if ort is None:
+        raise ImportError(f"Backend '{backend}' pedido, mas onnxruntime não está instalado.")
+
+    fp32, int8 = caminhos_onnx(modelo, diretorio)
+    if refazer or _desatualizado(fp32, modelo):
+        print(f"📦 Exportando {modelo} para ONNX: {fp32}")
+        exportar_onnx(carregar_torch(), tokenizer, fp32)
+
+    caminho = fp32
+    if backend == "onnx-int8":
+        if refazer or _desatualizado(int8, fp32):
+            print(f"🗜️ Quantizando (int8 dinâmico): {int8}")
+            quantizar_int8(fp32, int8)
+        caminho = int8
+    return SessaoOnnx(caminho, threads)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exporta o Tybyria para ONNX (e int8) sem processar arquivos.")
+    ap.add_argument("--modelo", default=os.getenv("TYBYRIA_MODEL_NAME", "Veronyka/tybyria-v2.1"), help="nome no Hub ou pasta local")
+    ap.add_argument("--diretorio", default=ONNX_DIR)
+    ap.add_argument("--int8", action="store_true", help="também gera a versão quantizada")
+    ap.add_argument("--refazer", action="store_true")
+    args = ap.parse_args()
+
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.modelo)
+    backend = "onnx-int8" if args.int8 else "onnx"
+    sessao = preparar_onnx(
+        args.modelo,
+        backend,
+        tokenizer,
+        lambda: AutoModelForSequenceClassification.from_pretrained(args.modelo),
+        diretorio=args.diretorio,
+        refazer=args.refazer,
+    )
+    for caminho in caminhos_onnx(args.modelo, args.diretorio):
+        if os.path.exists(caminho):
+            print(f"✅ {caminho}: {os.path.getsize(caminho) / 2**20:,.1f} MB")
+    print(f"⚙️ Sessão {backend} ok: {sessao.caminho}")
+
+
+if __name__ == "__main__":
+    main()
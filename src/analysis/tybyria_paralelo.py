@@ -0,0 +1,132 @@
+"""
+Tybyria em vários processos na CPU (paralelismo de dados).
+
+Com lotes pequenos, o paralelismo intra-op do PyTorch não ocupa uma VM com
+muitos núcleos: um processo com 32 threads passa boa parte do tempo
+sincronizando. Aqui:
+
+  processo principal (tybyria_gcs)   : tokens, lotes por comprimento, checkpoint
+  workers (multiprocessing.Pool)     : forward de um lote por tarefa, com
+                                       `threads` threads intra-op cada
+  processo principal                 : recebe os scores NA ORDEM dos lotes
+                                       (pool.imap) e grava na linha de origem
+
+As linhas do arquivo são repartidas lote a lote (imap, chunksize=1): quem
+termina primeiro pega o próximo lote. Isso equilibra melhor do que fatias
+fixas, porque os lotes por comprimento têm custos diferentes.
+
+Pesos: com o start method "fork" (Linux) os workers herdam o modelo já
+carregado pelo processo principal. Os tensores não são escritos na
+inferência, então as páginas ficam compartilhadas (copy-on-write) em vez de
+uma cópia de ~0,5 GB por worker. O processo principal não pode rodar
+inferência antes do fork. No backend ONNX cada worker abre a própria sessão
+sobre o mesmo .onnx, porque uma InferenceSession não sobrevive a um fork.
+
+threads_por_worker(): núcleos disponíveis / processos (no mínimo 1), ou
+TYBYRIA_THREADS_WORKER.
+"""
+
+import multiprocessing as mp
+import os
+from dataclasses import replace
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# Estado de cada worker (montado uma vez no initializer do Pool)
+_ESTADO: dict = {}
+
+
+def nucleos_disponiveis() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sem sched_getaffinity (macOS/Windows)
+        return os.cpu_count() or 1
+
+
+def resolver_processos(valor: str) -> int:
+    """TYBYRIA_PROCESSOS: número, ou "auto" (um worker a cada 4 núcleos)."""
+    valor = (valor or "1").strip().lower()
+    if valor == "auto":
+        return max(1, nucleos_disponiveis() // 4)
+    return max(1, int(valor))
+
+
+def threads_por_worker(processos: int, forcado: int = 0) -> int:
+    if forcado > 0:
+        return forcado
+    return max(1, nucleos_disponiveis() // max(1, processos))
+
+
+def _init_worker(rt, caminho_onnx: str, inferir: Callable, threads: int) -> None:
+    import torch
+
+    # antes de qualquer operação: o pool de threads de cada worker fica do tamanho da sua fatia de núcleos
+    torch.set_num_threads(threads)
+    torch.set_grad_enabled(False)
+    if caminho_onnx:
+        from src.analysis.tybyria_onnx import SessaoOnnx
+
+        rt = replace(rt, onnx=SessaoOnnx(caminho_onnx, threads))
+    _ESTADO["rt"] = rt
+    _ESTADO["inferir"] = inferir
+
+
+def _pontuar_lote(entrada: Tuple[np.ndarray, np.ndarray]) -> List[float]:
+    input_ids, attention_mask = entrada
+    return _ESTADO["inferir"](_ESTADO["rt"], input_ids, attention_mask)
+
+
+class PoolTybyria:
+    """
+    Pool de `processos` workers com o runtime `rt` (já carregado) e
+    `inferir(rt, input_ids, attention_mask) -> scores` (tybyria_gcs.infer_arrays).
+    """
+
+    def __init__(self, rt, inferir: Callable, processos: int, threads: int = 0):
+        """
+        Cria os workers na hora. Com fork, o processo principal não pode ter
+        rodado inferência antes (o pool de threads do PyTorch/OpenMP não
+        sobrevive ao fork e os workers travam), e o modelo tem que estar na
+        CPU: CUDA não pode ser reinicializado num filho de fork.
+        """
+        if rt.device.type == "cuda":
+            raise ValueError("PoolTybyria é só para CPU: o modelo está na GPU (use um processo só).")
+        self.processos = processos
+        self.threads = threads_por_worker(processos, threads)
+        metodos = mp.get_all_start_methods()
+        # fork: os pesos do processo principal ficam compartilhados; spawn: cada worker recebe uma cópia
+        self.metodo = "fork" if "fork" in metodos else metodos[0]
+        ctx = mp.get_context(self.metodo)
+        # a sessão ONNX não é herdável nem serializável: vai só o caminho do .onnx
+        caminho_onnx = rt.onnx.caminho if rt.onnx is not None else ""
+        self.pool = ctx.Pool(
+            processes=processos,
+            initializer=_init_worker,
+            initargs=(replace(rt, onnx=None), caminho_onnx, inferir, self.threads),
+        )
+
+    def descrever(self) -> str:
+        return f"{self.processos} processos x {self.threads} threads ({self.metodo})"
+
+    def pontuar(self, entradas: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Iterator[List[float]]:
+        """Scores de cada (input_ids, attention_mask), na ordem das entradas."""
+        return self.pool.imap(_pontuar_lote, entradas, chunksize=1)
+
+    def fechar(self) -> None:
+        self.pool.close()
+        self.pool.join()
+
+    def terminar(self) -> None:
+        """Para os workers sem esperar os lotes em andamento (Ctrl+C, erro)."""
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.terminar()
+        else:
+            self.fechar()
@@ -4,12 +4,14 @@ import os
 import csv
 import time
 import logging
-import subprocess
 
 from google.cloud import storage
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from src.utils.armazenamento_gcs import cliente_gcs, enviar_arquivo
+from src.utils.download_gcs import baixar_blob
 from src.utils.logger import setup_logger
+from src.utils.tabela import LeitorTabela, preferir_parquet, sem_extensao
 
 
 BUCKET = os.getenv("TYBYRIA_BUCKET", "lgbtminas-dados")
@@ -50,19 +52,21 @@ def gcs_write_checkpoint(client: storage.Client, bucket: str, ck_blob_path: str,
 
 def list_processed_files(client: storage.Client, bucket: str, prefix: str):
 
-    for blob in client.list_blobs(bucket, prefix=prefix):
+    nomes = [
+        blob.name
+        for blob in client.list_blobs(bucket, prefix=prefix)
+        if blob.name.endswith(("_BR.csv", "_BR.parquet"))
+    ]
 
-        name = blob.name
-
-        if name.endswith("_BR.csv"):
-            yield name
+    # mesmo mês em CSV e Parquet: usa o Parquet
+    yield from preferir_parquet(nomes)
 
 
 def out_name_for(processed_blob_name: str) -> str:
 
     base = processed_blob_name.split("/")[-1]
 
-    return base.replace(".csv", "_vader.csv")
+    return f"{sem_extensao(base)}_vader.csv"
 
 
 def already_done(client: storage.Client, bucket: str, out_blob_path: str) -> bool:
@@ -84,7 +88,7 @@ def run_one_file(client: storage.Client, logger: logging.Logger, processed_blob_
 
         return
 
-    ck_blob_path = f"{TMP_PREFIX}{filename.replace('.csv','')}_vader_checkpoint.txt"
+    ck_blob_path = f"{TMP_PREFIX}{sem_extensao(filename)}_vader_checkpoint.txt"
 
     skip_to = gcs_read_checkpoint(client, bucket, ck_blob_path)
 
@@ -94,11 +98,11 @@ def run_one_file(client: storage.Client, logger: logging.Logger, processed_blob_
 
     local_in = f"/tmp/{filename}"
 
-    local_out = f"/tmp/{filename.replace('.csv','')}_vader.csv"
+    local_out = f"/tmp/{sem_extensao(filename)}_vader.csv"
 
     logger.info(f"⬇️ Baixando: gs://{bucket}/{processed_blob_path} -> {local_in}")
 
-    client.bucket(bucket).blob(processed_blob_path).download_to_filename(local_in)
+    baixar_blob(client.bucket(bucket), processed_blob_path, local_in, logger=logger)
 
     analyzer = SentimentIntensityAnalyzer()
 
@@ -106,11 +110,13 @@ def run_one_file(client: storage.Client, logger: logging.Logger, processed_blob_
 
     started_at = time.time()
 
-    with open(local_in, "r", encoding="utf-8", newline="") as fin, open(local_out, "w", encoding="utf-8", newline="") as fout:
+    with open(local_in, "rb") as fin, open(local_out, "w", encoding="utf-8", newline="") as fout:
+
+        leitor = LeitorTabela(fin, filename)
 
-        reader = csv.DictReader(fin)
+        reader = leitor.linhas()
 
-        fieldnames = reader.fieldnames or []
+        fieldnames = leitor.campos
 
         if TEXT_COL not in fieldnames:
 
@@ -166,11 +172,7 @@ def run_one_file(client: storage.Client, logger: logging.Logger, processed_blob_
 
     gcs_out = f"gs://{bucket}/{out_blob_path}"
 
-    cmd = ["gsutil", "-q", "cp", local_out, gcs_out]
-
-    logger.info(f"☁️ Upload via gsutil: {' '.join(cmd)}")
-
-    subprocess.check_call(cmd)
+    enviar_arquivo(local_out, gcs_out, logger, client=client)
 
     ck_blob = client.bucket(bucket).blob(ck_blob_path)
 
@@ -205,7 +207,7 @@ def main():
 
     logger.info(f"BUCKET={BUCKET} PROCESSED_PREFIX={PROCESSED_PREFIX} OUT_PREFIX={OUT_PREFIX}")
 
-    client = storage.Client()
+    client = cliente_gcs()
 
     files = list(list_processed_files(client, BUCKET, PROCESSED_PREFIX))
 
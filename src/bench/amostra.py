@@ -0,0 +1,56 @@
+import json
+import random
+from typing import List
+
+# Subreddits "de fora" (maioria esmagadora num dump real) e os BR do config
+SUBREDDITS_FORA = ["AskReddit", "funny", "gaming", "worldnews", "pics", "soccer", "politics", "movies"]
+SUBREDDITS_BR = ["MinasGerais", "BeloHorizonte", "juizdefora", "Uberlandia", "OuroPreto", "Uberaba", "montesclaros_"]
+
+PALAVRAS = (
+    "the of and to in is you that it for was on are with as this be at have not "
+    "belo horizonte uberlândia contagem betim viado bicha travesti lgbt sapatão "
+    "que de não uma para com por mais como mas foi ele ela isso muito já também "
+    "https://www.reddit.com/r/brasil 123 456 :) 🏳️‍🌈 ção ã é ô"
+).split()
+
+
+def gerar_registro(rng: random.Random, idx: int, frac_br: float = 0.01) -> dict:
+    """Gera um comentário no formato RC_* (campos reais + campos que ignoramos)."""
+    if rng.random() < frac_br:
+        sub = rng.choice(SUBREDDITS_BR)
+    else:
+        sub = rng.choice(SUBREDDITS_FORA)
+
+    n = int(rng.expovariate(1 / 30)) + 1
+    body = " ".join(rng.choice(PALAVRAS) for _ in range(n))
+    if rng.random() < 0.05:
+        body = rng.choice(["[deleted]", "[removed]"])
+
+    return {
+        "all_awardings": [],
+        "author": f"user_{rng.randrange(100_000)}",
+        "author_flair_text": None,
+        "body": body,
+        "controversiality": 0,
+        "created_utc": 1_700_000_000 + idx,
+        "distinguished": None,
+        "edited": False,
+        "gilded": 0,
+        "id": f"k{idx:07x}",
+        "link_id": f"t3_{rng.randrange(10**8):x}",
+        "parent_id": f"t1_{rng.randrange(10**8):x}",
+        "retrieved_on": 1_700_100_000,
+        "score": rng.randrange(-10, 500),
+        "subreddit": sub,
+        "subreddit_id": f"t5_{abs(hash(sub)) % 10**6:x}",
+    }
+
+
+def gerar_jsonl(n_linhas: int, seed: int = 0, frac_br: float = 0.01) -> bytes:
+    """JSONL sintético (bytes, 1 registro por linha) parecido com um dump RC_*."""
+    rng = random.Random(seed)
+    linhas: List[str] = [
+        json.dumps(gerar_registro(rng, i, frac_br), ensure_ascii=False, separators=(",", ":"))
+        for i in range(n_linhas)
+    ]
+    return ("\n".join(linhas) + "\n").encode("utf-8")
@@ -0,0 +1,100 @@
+"""
+Mede o acesso ao GCS de src/utils/armazenamento_gcs.py num bucket de verdade
+ou no emulador (STORAGE_EMULATOR_HOST=http://localhost:4443 com o
+fake-gcs-server):
+
+  - latência de um checkpoint (escrever_texto) no cliente compartilhado e,
+    com --gsutil, no `gsutil -q cp` em subprocesso que os scripts usavam;
+  - vazão do enviar_arquivo de um arquivo aleatório de --mb MB com upload
+    resumível simples e com upload composto em partes paralelas, conferindo
+    os bytes que voltam.
+
+Tudo é criado e apagado debaixo de --uri.
+
+Uso:
+  python -m src.bench.armazenamento_gcs --uri gs://lgbtminas-dados/tmp/bench/ --gsutil
+  STORAGE_EMULATOR_HOST=http://localhost:4443 python -m src.bench.armazenamento_gcs --uri gs://teste/bench/
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from src.utils.armazenamento_gcs import (
+    UPLOAD_PARTES,
+    cliente_gcs,
+    enviar_arquivo,
+    escrever_texto,
+    ler_bytes,
+    ler_texto,
+    remover,
+)
+from src.reddit.zst_frames import MarcaFrame, formatar_checkpoint
+
+
+def _mediana_ms(tempos: list) -> str:
+    return f"mediana {1000 * statistics.median(tempos):,.1f} ms | máx {1000 * max(tempos):,.1f} ms"
+
+
+def medir_checkpoints(uri: str, n: int, gsutil: bool) -> None:
+    tempos = []
+    for i in range(n):
+        texto = formatar_checkpoint((i + 1) * 100_000, MarcaFrame(i * 2**20, (i + 1) * 100_000, False))
+        t0 = time.perf_counter()
+        escrever_texto(uri, texto)
+        tempos.append(time.perf_counter() - t0)
+    assert ler_texto(uri) == texto
+    print(f"☁️ checkpoint (cliente):   {_mediana_ms(tempos)} em {n} escritas")
+
+    if gsutil:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(texto)
+        tempos = []
+        for _ in range(min(n, 5)):
+            t0 = time.perf_counter()
+            subprocess.run(["gsutil", "-q", "cp", f.name, uri], check=True)
+            tempos.append(time.perf_counter() - t0)
+        os.remove(f.name)
+        print(f"🐢 checkpoint (gsutil cp): {_mediana_ms(tempos)} em {len(tempos)} escritas")
+    remover(uri)
+
+
+def medir_upload(uri: str, mb: int, partes: int) -> None:
+    dados = os.urandom(mb * 2**20)
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(dados)
+    try:
+        for rotulo, n, composto_mb in (("resumível", 1, 0), (f"composto x{partes}", partes, 0)):
+            t0 = time.perf_counter()
+            enviar_arquivo(f.name, uri, partes=n, composto_mb=composto_mb)
+            dt = time.perf_counter() - t0
+            assert ler_bytes(uri) == dados, "bytes diferentes no GCS"
+            print(f"⬆️ upload {rotulo:<12} {mb:,} MB em {dt:,.2f} s ({mb / dt:,.1f} MB/s) ✅ idêntico")
+            remover(uri)
+    finally:
+        os.remove(f.name)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Latência de checkpoint e vazão de upload no GCS.")
+    ap.add_argument("--uri", required=True, help="prefixo gs://bucket/pasta/ onde criar os objetos de teste")
+    ap.add_argument("--checkpoints", type=int, default=20)
+    ap.add_argument("--mb", type=int, default=256)
+    ap.add_argument("--partes", type=int, default=UPLOAD_PARTES)
+    ap.add_argument("--gsutil", action="store_true", help="compara com `gsutil cp` em subprocesso")
+    args = ap.parse_args()
+
+    prefixo = args.uri.rstrip("/") + "/"
+    t0 = time.perf_counter()
+    cliente_gcs()
+    print(f"🔑 cliente criado em {1000 * (time.perf_counter() - t0):,.0f} ms (uma vez por processo)")
+
+    medir_checkpoints(prefixo + "checkpoint.txt", args.checkpoints, args.gsutil)
+    medir_upload(prefixo + "upload.bin", args.mb, args.partes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Confere e mede o CasadorTermos e o modo por_tokens (src/reddit/filters.py)
+contra o texto_casa_mg_lgbt original (uma regex "\\b...\\b" por termo).
+
+Antes do benchmark roda os CASOS_UNICODE: acentos, cedilha, "_", dígitos,
+ordinais, ligaduras, maiúsculas especiais e pontuação colada, onde o \\w do
+re em Unicode decide o que é palavra.
+
+Usa os termos do config e, com --extras N, mais N termos sintéticos por lista
+(simples, compostos e com pontuação) para ver como escala com listas grandes.
+A saída (ok, matched_termos, matched_cidades) tem que ser idêntica, na mesma ordem.
+
+Uso:
+  python -m src.bench.casador_termos --textos 20000 --extras 2000
+"""
+
+import argparse
+import random
+import time
+
+from src.bench.amostra import PALAVRAS
+from src.reddit.config import carregar_config_reddit
+from src.reddit.filters import CasadorTermos, texto_casa_mg_lgbt
+
+# casos que pegam a borda de palavra do "\b...\b" com pontuação
+TERMOS_BORDA = ["lgbt+", "e-mail", "+18", "trans", "s.p", "são joão", "c++", "_x_"]
+
+# (termos, textos) com as pegadinhas de Unicode do \w
+CASOS_UNICODE = [
+    (["sapatão", "lésbica", "viado"], ["SAPATÃO!", "sapatao", "sapatãozinho", "lésbica_", "é lésbica.", "viado\u0301"]),
+    (["uberlândia", "poços de caldas"], ["Uberlândia-MG", "uberlandia", "POÇOS DE CALDAS", "poços  de caldas"]),
+    (["ção", "são"], ["não ção são", "ação", "são-paulo", "são_paulo", "SÃO"]),
+    (["bh", "2º", "1ª", "x²"], ["bh2", "bh_", "2º turno", "2 º", "1ª vez", "x² + 1", "bh"]),
+    (["ﬁm", "straße", "istanbul", "ǆ"], ["FIM", "ﬁm", "STRASSE", "straße", "İstanbul", "istanbul", "ǅ", "Ǆ"]),
+    (["lgbt+", "+18", "e-mail", "c++", "_x_", "s.p"], ["lgbt+a", "lgbt+ a", "a+18", "+18", "e-mail!", "xe-mail", "c+++", "_x_y", "s.p.", "s.pa"]),
+    (["gay", "τρανς", "гей", "ゲイ"], ["gay🏳️‍🌈", "🏳️‍🌈gay", "ΤΡΑΝΣ", "τρανςς", "гей!", "ゲイです", "ゲイ"]),
+]
+
+
+def conferir_casos_unicode() -> int:
+    """Roda os CASOS_UNICODE nos três modos. Retorna quantos casos conferiu."""
+    n = 0
+    for termos, textos in CASOS_UNICODE:
+        # cada lista de termos entra como LGBT, ódio e cidade (com cidades fixas para o "ok")
+        listas = (termos, termos[::-1], termos + ["belo horizonte"])
+        casador = CasadorTermos(*listas)
+        for texto in textos + [" ".join(textos)]:
+            ref = texto_casa_mg_lgbt(texto, *listas)
+            for nome, obtido in (
+                ("por_tokens", texto_casa_mg_lgbt(texto, *listas, por_tokens=True)),
+                ("CasadorTermos", casador.casar(texto)),
+            ):
+                if obtido != ref:
+                    raise SystemExit(f"❌ {nome} divergiu em {texto!r} (termos {termos}):\n  regex {ref}\n  {nome} {obtido}")
+            n += 1
+    return n
+
+
+def gerar_termos(rng: random.Random, n: int, prefixo: str) -> list:
+    termos = []
+    for i in range(n):
+        tipo = rng.random()
+        if tipo < 0.6:
+            termos.append(f"{prefixo}{i}")
+        elif tipo < 0.9:
+            termos.append(f"{prefixo}{i} {rng.choice(PALAVRAS)}")
+        else:
+            termos.append(f"{prefixo}-{i}")
+    return termos
+
+
+def gerar_textos(rng: random.Random, n: int, vocab: list) -> list:
+    textos = []
+    for _ in range(n):
+        k = int(rng.expovariate(1 / 30)) + 1
+        textos.append(" ".join(rng.choice(vocab) for _ in range(k)))
+    return textos
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CasadorTermos x texto_casa_mg_lgbt.")
+    ap.add_argument("--textos", type=int, default=20_000)
+    ap.add_argument("--extras", type=int, default=0, help="termos sintéticos a mais em cada lista")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    print(f"✅ casos Unicode: {conferir_casos_unicode()} textos idênticos nos três modos")
+
+    rng = random.Random(args.seed)
+    cfg = carregar_config_reddit()
+    lgbt = cfg["termos_lgbt"] + TERMOS_BORDA + gerar_termos(rng, args.extras, "lg")
+    odio = cfg["termos_odio"] + gerar_termos(rng, args.extras, "od")
+    cidades = cfg["cidades_mg"] + gerar_termos(rng, args.extras, "ci")
+
+    # vocabulário com os próprios termos, pedaços deles e variações de caixa/pontuação
+    vocab = list(PALAVRAS) + lgbt[:200] + odio[:200] + cidades[:200] + TERMOS_BORDA
+    vocab += [t.upper() for t in vocab[:50]] + ["lgbt+a", "xe-mail", "são joãozinho", "c+++", "(trans)"]
+    textos = gerar_textos(rng, args.textos, vocab)
+
+    print(f"🧪 {len(textos):,} textos | termos: {len(lgbt)} lgbt, {len(odio)} ódio, {len(cidades)} cidades\n")
+
+    t0 = time.perf_counter()
+    casador = CasadorTermos(lgbt, odio, cidades)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ref = [texto_casa_mg_lgbt(t, lgbt, odio, cidades) for t in textos]
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tokens = [texto_casa_mg_lgbt(t, lgbt, odio, cidades, por_tokens=True) for t in textos]
+    t_tokens = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    novo = [casador.casar(t) for t in textos]
+    t_novo = time.perf_counter() - t0
+
+    for texto, a, b, c in zip(textos, ref, tokens, novo):
+        if not (a == b == c):
+            raise SystemExit(f"❌ divergiu em {texto!r}:\n  original   {a}\n  por_tokens {b}\n  casador    {c}")
+
+    com_match = sum(1 for r in ref if r[1] or r[2])
+    print(f"✅ idêntico ({com_match:,} textos com algum termo)")
+    print(f"texto_casa_mg_lgbt {len(textos) / t_ref:>12,.0f} textos/s")
+    print(f"  por_tokens=True  {len(textos) / t_tokens:>12,.0f} textos/s   {t_ref / t_tokens:6.1f}x")
+    print(f"CasadorTermos      {len(textos) / t_novo:>12,.0f} textos/s   {t_ref / t_novo:6.1f}x  (montagem {t_build * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
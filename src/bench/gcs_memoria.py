@@ -0,0 +1,118 @@
+"""
+Bucket do GCS em memória para os benches que conferem lógica de checkpoint
+(src/bench/parcial_gcs.py, src/bench/log_scores.py) sem bucket nem emulador.
+
+Só o que o código de checkpoint usa: get_blob, blob(...).upload_from_file /
+upload_from_string / download_as_bytes / compose / delete / exists e
+client.list_blobs. O compose segue as regras do GCS que importam aqui: no
+máximo LIMITE_COMPOSE origens e component_count (soma dos componentes das
+origens, None num objeto simples) até LIMITE_COMPONENTES.
+
+`antes` (opcional) é chamado com (operação, nome) antes de cada escrita ou
+remoção: um bench simula uma queda levantando uma exceção ali.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from src.utils.armazenamento_gcs import LIMITE_COMPONENTES, LIMITE_COMPOSE, NotFound
+
+
+class ErroCompose(Exception):
+    """O que o GCS devolve (400) para um compose fora dos limites."""
+
+
+class BlobMemoria:
+    def __init__(self, bucket: "BucketMemoria", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def size(self) -> int:
+        return len(self.bucket.dados[self.name])
+
+    @property
+    def component_count(self) -> Optional[int]:
+        return self.bucket.componentes.get(self.name)
+
+    def exists(self, client=None) -> bool:
+        return self.name in self.bucket.dados
+
+    def _gravar(self, dados: bytes, componentes: Optional[int] = None) -> None:
+        self.bucket.dados[self.name] = dados
+        self.bucket.componentes.pop(self.name, None)
+        if componentes is not None:
+            self.bucket.componentes[self.name] = componentes
+
+    def upload_from_file(self, f, size: Optional[int] = None, rewind: bool = False, **kwargs) -> None:
+        self.bucket.avisar("upload", self.name)
+        if rewind:
+            f.seek(0)
+        dados = f.read() if size is None else f.read(size)
+        self._gravar(dados)
+        self.bucket.enviados += len(dados)
+
+    def upload_from_string(self, dados, content_type: Optional[str] = None, **kwargs) -> None:
+        self.bucket.avisar("upload", self.name)
+        dados = dados.encode("utf-8") if isinstance(dados, str) else bytes(dados)
+        self._gravar(dados)
+        self.bucket.enviados += len(dados)
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        if self.name not in self.bucket.dados:
+            raise NotFound(self.name)
+        return self.bucket.dados[self.name]
+
+    def download_as_text(self, **kwargs) -> str:
+        return self.download_as_bytes().decode("utf-8")
+
+    def compose(self, fontes: list, client=None, **kwargs) -> None:
+        self.bucket.avisar("compose", self.name)
+        if len(fontes) > LIMITE_COMPOSE:
+            raise ErroCompose(f"compose com {len(fontes)} origens (máximo {LIMITE_COMPOSE})")
+        for b in fontes:
+            if b.name not in self.bucket.dados:
+                raise NotFound(b.name)
+        componentes = sum(self.bucket.componentes.get(b.name) or 1 for b in fontes)
+        if componentes > LIMITE_COMPONENTES:
+            raise ErroCompose(f"{self.name}: {componentes} componentes (máximo {LIMITE_COMPONENTES})")
+        self._gravar(b"".join(self.bucket.dados[b.name] for b in fontes), componentes)
+        self.bucket.maior_composto = max(self.bucket.maior_composto, componentes)
+
+    def delete(self, **kwargs) -> None:
+        self.bucket.avisar("delete", self.name)
+        if self.name not in self.bucket.dados:
+            raise NotFound(self.name)
+        del self.bucket.dados[self.name]
+        self.bucket.componentes.pop(self.name, None)
+
+
+class BucketMemoria:
+    def __init__(self):
+        self.dados: Dict[str, bytes] = {}
+        self.componentes: Dict[str, int] = {}
+        self.enviados = 0
+        self.maior_composto = 0
+        self.antes: Optional[Callable[[str, str], None]] = None
+
+    def avisar(self, operacao: str, nome: str) -> None:
+        if self.antes is not None:
+            self.antes(operacao, nome)
+
+    def blob(self, nome: str) -> BlobMemoria:
+        return BlobMemoria(self, nome)
+
+    def get_blob(self, nome: str) -> Optional[BlobMemoria]:
+        return BlobMemoria(self, nome) if nome in self.dados else None
+
+
+class ClienteMemoria:
+    """Um bucket só, qualquer que seja o nome pedido."""
+
+    def __init__(self):
+        self.b = BucketMemoria()
+
+    def bucket(self, nome: str) -> BucketMemoria:
+        return self.b
+
+    def list_blobs(self, bucket, prefix: str = "") -> List[BlobMemoria]:
+        return [BlobMemoria(self.b, n) for n in sorted(self.b.dados) if n.startswith(prefix)]
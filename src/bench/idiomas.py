@@ -0,0 +1,139 @@
+"""
+Compara os backends de idioma (src/utils/lang/detector.py) em acerto e velocidade.
+
+Os textos rotulados vêm de --arquivo (JSONL com {"texto", "lang"}) ou, sem
+ele, de frases curtas em pt/es/en/it/fr combinadas ao acaso (pt x es é o par
+que mais confunde). Para cada backend mede:
+  - acerto geral e do "é português?" (precisão / revocação com threshold);
+  - textos/s do detect_many sem cache e com cache (lote com repetição,
+    como "[deleted]" e copypasta num dump real).
+
+Uso:
+  python -m src.bench.idiomas --textos 20000
+  LANG_FASTTEXT_MODELO=models/lid.176.bin python -m src.bench.idiomas --arquivo rotulados.jsonl
+"""
+
+import argparse
+import json
+import random
+import time
+
+from src.utils.lang.detector import LANG_FASTTEXT_MODELO, DetectorIdioma, backends_disponiveis, obter_backend
+
+FRASES = {
+    "pt": [
+        "hoje o trânsito em belo horizonte tava impossível",
+        "não acredito que o ônibus atrasou de novo",
+        "alguém sabe onde tem um pão de queijo bom perto da savassi?",
+        "essa prefeitura não faz nada pela cidade",
+        "meu cachorro fugiu e eu passei a tarde inteira procurando",
+        "o jogo do galo ontem foi sofrido demais",
+        "vocês acham que vale a pena morar em uberlândia?",
+        "a chuva derrubou uma árvore aqui na rua",
+    ],
+    "es": [
+        "hoy el tráfico en la ciudad estaba imposible",
+        "no puedo creer que el autobús llegó tarde otra vez",
+        "alguien sabe dónde hay una panadería buena cerca de aquí?",
+        "el gobierno no hace nada por la gente",
+        "mi perro se escapó y pasé toda la tarde buscándolo",
+        "el partido de ayer fue muy sufrido",
+    ],
+    "en": [
+        "traffic downtown was a nightmare today",
+        "i can't believe the bus was late again",
+        "does anyone know a good bakery around here?",
+        "the city council never does anything useful",
+        "my dog ran away and i spent the whole afternoon looking for him",
+        "last night's game was painful to watch",
+    ],
+    "it": [
+        "oggi il traffico in città era impossibile",
+        "non ci credo che l'autobus è arrivato in ritardo di nuovo",
+        "qualcuno conosce un buon forno qui vicino?",
+        "il mio cane è scappato e l'ho cercato tutto il pomeriggio",
+    ],
+    "fr": [
+        "aujourd'hui la circulation en ville était impossible",
+        "je n'arrive pas à croire que le bus soit encore en retard",
+        "quelqu'un connaît une bonne boulangerie près d'ici ?",
+        "mon chien s'est enfui et je l'ai cherché tout l'après-midi",
+    ],
+}
+
+REPETIDOS = ["[deleted]", "[removed]", "kkkkkkkkk", "isso aí", "this is the way"]
+
+
+def gerar_rotulados(rng: random.Random, n: int) -> list:
+    idiomas = list(FRASES)
+    # metade em português, como nos subreddits BR
+    pesos = [len(idiomas) - 1] + [1] * (len(idiomas) - 1)
+    casos = []
+    for _ in range(n):
+        lang = rng.choices(idiomas, weights=pesos)[0]
+        k = rng.randint(1, 3)
+        casos.append({"texto": ". ".join(rng.choice(FRASES[lang]) for _ in range(k)), "lang": lang})
+    return casos
+
+
+def ler_rotulados(caminho: str) -> list:
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def _medir(detector_fn, textos: list) -> float:
+    t0 = time.perf_counter()
+    detector_fn(textos)
+    return len(textos) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Acerto e throughput dos backends de idioma.")
+    ap.add_argument("--textos", type=int, default=20_000)
+    ap.add_argument("--arquivo", default=None, help="JSONL com {\"texto\", \"lang\"}")
+    ap.add_argument("--threshold", type=float, default=0.80)
+    ap.add_argument("--modelo", default=LANG_FASTTEXT_MODELO)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    casos = ler_rotulados(args.arquivo) if args.arquivo else gerar_rotulados(rng, args.textos)
+    textos = [c["texto"] for c in casos]
+    esperados = [c["lang"] for c in casos]
+    n_pt = sum(1 for lang in esperados if lang == "pt")
+
+    # lote "de dump": 30% de textos repetidos
+    com_repeticao = [rng.choice(REPETIDOS) if rng.random() < 0.3 else t for t in textos]
+
+    backends = backends_disponiveis(args.modelo)
+    print(f"🧪 {len(textos):,} textos ({n_pt:,} pt) | backends: {', '.join(backends) or 'nenhum'}\n")
+    if not backends:
+        raise SystemExit("❌ nenhum backend instalado (fasttext + modelo lid.176, ou langdetect)")
+
+    for nome in backends:
+        backend = obter_backend(nome, args.modelo)
+        sem_cache = DetectorIdioma(backend, capacidade_cache=0)
+        vel = _medir(sem_cache.detect_many, textos)
+        resultados = sem_cache.detect_many(textos)
+
+        acertos = sum(1 for (lang, _), esp in zip(resultados, esperados) if lang == esp)
+        pt_previsto = [lang == "pt" and prob >= args.threshold for lang, prob in resultados]
+        vp = sum(1 for p, esp in zip(pt_previsto, esperados) if p and esp == "pt")
+        precisao = vp / max(sum(pt_previsto), 1)
+        revocacao = vp / max(n_pt, 1)
+
+        com_cache = DetectorIdioma(backend)
+        vel_cache = _medir(com_cache.detect_many, com_repeticao)
+
+        print(
+            f"{nome:<11} acerto {100 * acertos / len(textos):5.1f}% | pt≥{args.threshold}: "
+            f"precisão {100 * precisao:5.1f}% revocação {100 * revocacao:5.1f}%"
+        )
+        print(
+            f"{'':<11} {vel:>10,.0f} textos/s sem cache | {vel_cache:>10,.0f} textos/s com cache "
+            f"({com_cache.hits:,} hits)\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
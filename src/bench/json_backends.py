@@ -0,0 +1,57 @@
+"""
+Micro-benchmark dos backends de JSON (src/reddit/json_decoder.py) sobre linhas
+sintéticas no formato RC_*, com e sem projeção de campos.
+
+Também confere se cada backend devolve os mesmos campos que o json da stdlib.
+
+Uso:
+  python -m src.bench.json_backends --linhas 200000
+"""
+
+import argparse
+import time
+
+from src.bench.amostra import gerar_jsonl
+from src.reddit.json_decoder import CAMPOS_REDDIT, backends_disponiveis, obter_decoder
+
+
+def _medir(decoder, linhas, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        for linha in linhas:
+            decoder(linha)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return len(linhas) / melhor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compara backends de JSON nas linhas do dump.")
+    ap.add_argument("--linhas", type=int, default=200_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    linhas = gerar_jsonl(args.linhas).split(b"\n")[:-1]
+    print(f"🧪 {len(linhas):,} linhas sintéticas | backends: {', '.join(backends_disponiveis())}\n")
+
+    referencia = [obter_decoder("json")(linha) for linha in linhas[:2000]]
+    base = None
+
+    for backend in backends_disponiveis()[::-1]:
+        for projecao in (False, True):
+            decoder = obter_decoder(backend, projecao=projecao)
+
+            for linha, ref in zip(linhas, referencia):
+                obj = decoder(linha)
+                esperado = {k: ref[k] for k in CAMPOS_REDDIT if k in ref} if projecao else ref
+                if obj != esperado:
+                    raise SystemExit(f"❌ {backend} (projecao={projecao}) divergiu do json da stdlib")
+
+            taxa = _medir(decoder, linhas, args.repeticoes)
+            base = base or taxa
+            nome = f"{backend}{' + projeção' if projecao else ''}"
+            print(f"{nome:<22} {taxa:>12,.0f} linhas/s   {taxa / base:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Confere e mede a limpeza de DataFrames de src/utils/limpeza_df.py contra o
+caminho antigo do pandas:
+
+  - normalizar_textos x astype(str).str.strip().replace("nan", "") + filtro
+    notna() & != "" (o clean_df_for_tybyria antigo);
+  - mascara_texto_nao_vazio x notna() & (str.strip() != "") (o
+    limpar_dataframe_resultados antigo).
+
+A coluna vem dos comentários sintéticos de src/bench/amostra.py, misturados
+com os casos chatos (NaN, "", só espaços, "nan", " nan ", tab/quebra de
+linha, espaço não separável), como object e como string[pyarrow] (se o
+pyarrow existir). Primeiro confere que máscara e textos batem 100%; depois
+mede cada variante num processo filho (fork) e mostra o tempo e o pico de
+memória acima da coluna já carregada (VmHWM; ru_maxrss fora do Linux).
+
+Com --arquivo-linhas > 0 mede também o input do Tybyria de ponta a ponta
+(ler o CSV e limpar), que é onde fica o pico de memória: um CSV sintético
+com as colunas de src/reddit/registro.py (textos com vírgula, aspas e
+quebra de linha) passa por
+  - o caminho antigo: read_csv(string[pyarrow]) + dropna + astype(str)/strip/
+    replace + df[mantidas].copy();
+  - read_csv + normalizar_textos + df[mantidas] (o clean_df_for_tybyria de
+    hoje, usado sem pyarrow ou com Parquet);
+  - ler_csv_limpo (o que tybyria_gcs.read_clean_for_tybyria usa);
+conferindo que os três DataFrames têm os mesmos valores. Cada variante roda
+num processo novo (spawn) e o pico é medido acima dele antes da leitura.
+
+Uso:
+  python -m src.bench.limpeza_df --linhas 1000000
+  python -m src.bench.limpeza_df --linhas 0 --arquivo-linhas 1000000
+"""
+
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.bench.amostra import gerar_registro
+from src.reddit.registro import CAMPOS_CSV
+from src.utils.limpeza_df import ler_csv_limpo, mascara_texto_nao_vazio, normalizar_textos, pa, substituir_coluna
+
+CHATOS = [None, float("nan"), "", "   ", "nan", " nan ", "\t texto com tab \n", "\u00a0nbsp\u00a0", "\u2003em\u2003", "\x1c sep", "NaN", " ok "]
+
+
+def gerar_coluna(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    base = [gerar_registro(rng, i, frac_br=1.0)["body"] for i in range(min(n, 20_000))]
+    return [rng.choice(CHATOS) if rng.random() < 0.2 else base[i % len(base)] for i in range(n)]
+
+
+def normalizar_antigo(serie: pd.Series):
+    s = serie.astype(str).str.strip().replace("nan", "", regex=False)
+    mantidas = (s.notna() & (s != "")).to_numpy(dtype=bool)
+    return mantidas, s[mantidas]
+
+
+def mascara_antiga(serie: pd.Series) -> np.ndarray:
+    return (serie.notna() & (serie.str.strip() != "")).to_numpy(dtype=bool)
+
+
+def _normalizar_novo(serie: pd.Series):
+    mantidas, textos = normalizar_textos(serie)
+    return mantidas, list(textos)
+
+
+VARIANTES = {
+    "normalizar antigo": normalizar_antigo,
+    "normalizar_textos": normalizar_textos,
+    "máscara antiga": mascara_antiga,
+    "mascara_texto_nao_vazio": mascara_texto_nao_vazio,
+}
+
+
+def conferir(serie: pd.Series, rotulo: str) -> None:
+    m_antiga, t_antigos = normalizar_antigo(serie)
+    t_antigos = t_antigos.tolist()
+    m_nova, t_novos = _normalizar_novo(serie)
+    if not np.array_equal(m_antiga, m_nova) or t_antigos != t_novos:
+        i = int(np.argmax(m_antiga != m_nova)) if not np.array_equal(m_antiga, m_nova) else -1
+        raise SystemExit(f"❌ normalizar_textos divergiu ({rotulo}) na linha {i}: {serie.iloc[i]!r}")
+    if not np.array_equal(mascara_antiga(serie), mascara_texto_nao_vazio(serie)):
+        raise SystemExit(f"❌ mascara_texto_nao_vazio divergiu ({rotulo})")
+    print(f"✅ paridade {rotulo}: {int(m_nova.sum()):,} de {len(serie):,} linhas mantidas, textos idênticos")
+
+
+def _pico_bytes() -> int:
+    # VmHWM é do processo novo; o ru_maxrss de um filho spawn herda o pico do pai (sobrevive ao exec)
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _medir_filho(n: int, seed: int, dtype, variante: str, saida) -> None:
+    serie = pd.Series(gerar_coluna(n, seed), dtype=dtype)
+    antes = _pico_bytes()
+    t0 = time.perf_counter()
+    VARIANTES[variante](serie)
+    dt = time.perf_counter() - t0
+    saida.send((dt, _pico_bytes() - antes))
+
+
+def medir(n: int, seed: int, dtype, variante: str):
+    ctx = mp.get_context("fork")
+    receber, enviar = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_medir_filho, args=(n, seed, dtype, variante, enviar))
+    proc.start()
+    resultado = receber.recv()
+    proc.join()
+    return resultado
+
+
+# ==========================================================
+# input do Tybyria: ler o CSV + limpar
+# ==========================================================
+COLUNA = "text_original"
+ESTRANHOS = ['com "aspas", e vírgula', "primeira linha\nsegunda linha", "  \n  "]
+
+
+def gerar_csv(caminho: str, n: int, seed: int) -> None:
+    textos = gerar_coluna(n, seed)
+    rng = random.Random(seed + 1)
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=CAMPOS_CSV)
+        w.writeheader()
+        for i, texto in enumerate(textos):
+            if rng.random() < 0.01:
+                texto = rng.choice(ESTRANHOS)
+            texto = "" if texto is None or texto != texto else texto
+            w.writerow(
+                {
+                    "id": f"k{i:07x}",
+                    "author": f"user_{rng.randrange(100_000)}",
+                    "created_utc": 1_700_000_000 + i,
+                    "subreddit": "brasil",
+                    COLUNA: texto,
+                    "text_clean": texto.lower(),
+                    "has_lgbt_term": rng.random() < 0.1,
+                    "has_hate_term": False,
+                    "has_mg_city": rng.random() < 0.05,
+                }
+            )
+
+
+def _read_csv(caminho: str) -> pd.DataFrame:
+    # o mesmo read_csv de tybyria_gcs.read_csv_safely
+    return pd.read_csv(caminho, dtype="string[pyarrow]", keep_default_na=False, skip_blank_lines=True)
+
+
+def tybyria_antigo(caminho: str) -> pd.DataFrame:
+    df = _read_csv(caminho).dropna(how="all")
+    df[COLUNA] = df[COLUNA].astype(str).str.strip().replace("nan", "", regex=False)
+    df = df[df[COLUNA].notna() & (df[COLUNA] != "")].copy()
+    return df
+
+
+def tybyria_sem_copia(caminho: str) -> pd.DataFrame:
+    df = _read_csv(caminho).dropna(how="all")
+    mantidas, textos = normalizar_textos(df[COLUNA])
+    dtype = df[COLUNA].dtype
+    df = df[mantidas]
+    substituir_coluna(df, COLUNA, textos, dtype)
+    return df
+
+
+def tybyria_blocos(caminho: str) -> pd.DataFrame:
+    return ler_csv_limpo(caminho, COLUNA)
+
+
+ARQUIVO = {
+    "read_csv + limpeza antiga": tybyria_antigo,
+    "read_csv + normalizar_textos": tybyria_sem_copia,
+    "ler_csv_limpo": tybyria_blocos,
+}
+
+
+def conferir_arquivo(caminho: str) -> None:
+    base = tybyria_antigo(caminho).reset_index(drop=True)
+    for rotulo, f in list(ARQUIVO.items())[1:]:
+        # o astype(str) do caminho antigo deixava a coluna de texto em "str" em vez de string[pyarrow]
+        pd.testing.assert_frame_equal(f(caminho).reset_index(drop=True), base, check_dtype=False)
+    print(f"✅ paridade do input do Tybyria: {len(base):,} linhas, mesmos valores em todas as colunas")
+
+
+def _medir_arquivo_filho(caminho: str, variante: str, saida) -> None:
+    antes = _pico_bytes()
+    t0 = time.perf_counter()
+    df = ARQUIVO[variante](caminho)
+    dt = time.perf_counter() - t0
+    saida.send((dt, _pico_bytes() - antes, len(df)))
+
+
+def medir_arquivo(caminho: str, variante: str):
+    # spawn: processo novo, sem o RSS que o pai acumulou na conferência
+    ctx = mp.get_context("spawn")
+    receber, enviar = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_medir_arquivo_filho, args=(caminho, variante, enviar))
+    proc.start()
+    resultado = receber.recv()
+    proc.join()
+    return resultado
+
+
+def bench_arquivo(n: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "RC_sintetico_BR.csv")
+        gerar_csv(caminho, n, seed)
+        print(f"\n🧪 input do Tybyria: {n:,} linhas, CSV de {os.path.getsize(caminho) / 2**20:,.1f} MB")
+        conferir_arquivo(caminho)
+        for variante in ARQUIVO:
+            dt, pico, linhas = medir_arquivo(caminho, variante)
+            print(f"{variante:<30} {dt:>7.3f} s | pico +{pico / 2**20:>7,.1f} MB | {linhas:,} linhas")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Limpeza de coluna de texto: pandas antigo x limpeza_df.")
+    ap.add_argument("--linhas", type=int, default=500_000)
+    ap.add_argument("--arquivo-linhas", type=int, default=0, help="linhas do CSV do input do Tybyria (0 = não mede)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    dtypes = [("object", object)]
+    if pa is not None:
+        dtypes.append(("string[pyarrow]", "string[pyarrow]"))
+    else:
+        print("ℹ️ sem pyarrow: só a coluna object (caminho .str do pandas)")
+
+    if args.linhas > 0:
+        for rotulo, dtype in dtypes:
+            conferir(pd.Series(gerar_coluna(min(args.linhas, 200_000), args.seed), dtype=dtype), rotulo)
+
+        print(f"\n🧪 {args.linhas:,} linhas")
+        for rotulo, dtype in dtypes:
+            for variante in VARIANTES:
+                dt, pico = medir(args.linhas, args.seed, dtype, variante)
+                print(f"{rotulo:<16} {variante:<24} {dt:>7.3f} s | pico +{pico / 2**20:>7,.1f} MB")
+
+    if args.arquivo_linhas > 0:
+        if pa is None:
+            print("ℹ️ sem pyarrow: o input do Tybyria não é medido (ler_csv_limpo precisa dele)")
+        else:
+            bench_arquivo(args.arquivo_linhas, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Confere e mede o limpar_texto / limpar_textos (src/utils/limpeza.py).
+
+1) Golden: src/bench/golden/limpeza.jsonl tem {"texto", "limpo"} gerados
+   com a implementação antiga (4 re.sub + filtro por unicodedata), com
+   acentos, emojis, URLs, dígitos de outros alfabetos, \\w Unicode etc.
+   As duas funções novas têm que bater 100%.
+2) Throughput: antiga x limpar_texto x limpar_textos nos textos sintéticos.
+
+Uso:
+  python -m src.bench.limpeza_textos --linhas 100000
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+
+from src.bench.amostra import gerar_jsonl
+from src.utils.limpeza import limpar_texto, limpar_textos
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "limpeza.jsonl")
+
+
+def limpar_texto_antigo(texto: str) -> str:
+    """Implementação original, só para comparar velocidade."""
+    if not isinstance(texto, str):
+        return ""
+    texto = re.sub(r"http\S+|www\S+|https\S+", "", texto)
+    texto = "".join(c for c in texto if unicodedata.category(c)[0] != "So")
+    texto = re.sub(r"[^\w\s]", " ", texto)
+    texto = re.sub(r"\d+", " ", texto)
+    texto = texto.lower()
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def conferir_golden() -> int:
+    with open(GOLDEN, encoding="utf-8") as f:
+        casos = [json.loads(linha) for linha in f]
+
+    textos = [c["texto"] for c in casos]
+    lote = limpar_textos(textos)
+    for caso, em_lote in zip(casos, lote):
+        obtido = limpar_texto(caso["texto"])
+        if obtido != caso["limpo"] or em_lote != caso["limpo"]:
+            raise SystemExit(
+                f"❌ divergiu do golden em {caso['texto']!r}:\n"
+                f"  esperado      {caso['limpo']!r}\n  limpar_texto  {obtido!r}\n  limpar_textos {em_lote!r}"
+            )
+    return len(casos)
+
+
+def _medir(fn, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Golden + throughput do limpar_texto.")
+    ap.add_argument("--linhas", type=int, default=100_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"✅ golden: {conferir_golden():,} casos idênticos ({os.path.relpath(GOLDEN)})\n")
+
+    textos = [json.loads(l)["body"] for l in gerar_jsonl(args.linhas, frac_br=1.0).split(b"\n")[:-1]]
+    print(f"🧪 {len(textos):,} textos sintéticos\n")
+
+    base = None
+    for nome, fn in (
+        ("antigo", lambda: [limpar_texto_antigo(t) for t in textos]),
+        ("limpar_texto", lambda: [limpar_texto(t) for t in textos]),
+        ("limpar_textos (lote)", lambda: limpar_textos(textos)),
+    ):
+        dt = _medir(fn, args.repeticoes)
+        base = base or dt
+        print(f"{nome:<22} {len(textos) / dt:>12,.0f} textos/s   {base / dt:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
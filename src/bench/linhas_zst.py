@@ -0,0 +1,91 @@
+"""
+Benchmark do leitor de linhas dos dumps .zst.
+
+Compara o leitor antigo (decode do chunk inteiro + buffer str + split) com o
+leitor em bytes de src/reddit/zst_reader.py, sobre um JSONL sintético, e mede
+o ganho do pré-filtro de subreddit (src/reddit/prefiltro.py).
+
+Uso:
+  python -m src.bench.linhas_zst --linhas 500000
+"""
+
+import argparse
+import io
+import json
+import time
+
+from src.bench.amostra import SUBREDDITS_BR, gerar_jsonl
+from src.reddit.prefiltro import compilar_prefiltro_subreddit
+from src.reddit.zst_reader import CHUNK_SIZE, iter_linhas_bytes, iter_registros
+
+
+def _iter_linhas_str_antigo(reader, chunk_size: int = CHUNK_SIZE):
+    # cópia fiel do laço que existia em iter_zst / iter_zst_from_gsutil / iter_zst_stream
+    buffer = ""
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            break
+        text = chunk.decode("utf-8", errors="ignore")
+        buffer += text
+        linhas = buffer.split("\n")
+        buffer = linhas[-1]
+        for linha in linhas[:-1]:
+            yield linha
+
+
+def _iter_registros_antigo(reader):
+    for linha in _iter_linhas_str_antigo(reader):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            yield json.loads(linha)
+        except Exception:
+            continue
+
+
+def _medir(nome: str, fn, dados: bytes, n_linhas: int, repeticoes: int) -> float:
+    # taxa = linhas de ENTRADA por segundo (com prefiltro, emite bem menos itens)
+    melhor = float("inf")
+    n = 0
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        n = sum(1 for _ in fn(io.BytesIO(dados)))
+        melhor = min(melhor, time.perf_counter() - t0)
+    taxa = n_linhas / melhor
+    print(f"{nome:<34} {n:>10,} emitidos  {melhor:8.3f} s  {taxa:>14,.0f} linhas/s")
+    return taxa
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark do leitor de linhas JSONL (antes x depois).")
+    ap.add_argument("--linhas", type=int, default=500_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"🧪 Gerando {args.linhas:,} linhas sintéticas...")
+    dados = gerar_jsonl(args.linhas)
+    print(f"   {len(dados) / 2**20:.1f} MB descomprimidos\n")
+
+    antes = _medir("split (str, antigo)", _iter_linhas_str_antigo, dados, args.linhas, args.repeticoes)
+    depois = _medir("split (bytes, novo)", iter_linhas_bytes, dados, args.linhas, args.repeticoes)
+    print(f"   ➜ ganho: {depois / antes:.2f}x\n")
+
+    antes = _medir("split + json.loads (antigo)", _iter_registros_antigo, dados, args.linhas, args.repeticoes)
+    depois = _medir("split + json.loads (novo)", iter_registros, dados, args.linhas, args.repeticoes)
+    print(f"   ➜ ganho: {depois / antes:.2f}x\n")
+
+    prefiltro = compilar_prefiltro_subreddit(SUBREDDITS_BR)
+    com_prefiltro = _medir(
+        "split + prefiltro + json.loads",
+        lambda r: iter_registros(r, prefiltro=prefiltro),
+        dados,
+        args.linhas,
+        args.repeticoes,
+    )
+    print(f"   ➜ ganho sobre o antigo: {com_prefiltro / antes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
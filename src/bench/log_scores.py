@@ -0,0 +1,185 @@
+"""
+Confere o log de scores do Tybyria (src/analysis/log_scores.py) contra o
+bucket em memória de src/bench/gcs_memoria.py, que recusa compose acima de
+LIMITE_COMPONENTES como o GCS. Em cada cenário, o que uma nova execução lê
+com carregar() tem que ser exatamente o último score gravado de cada linha:
+
+  - retomada: base + segmentos que ainda não foram compactados;
+  - queda entre o compose e a remoção dos segmentos (eles ficam no GCS e
+    também já estão na base);
+  - input diferente: outro hash dos textos ou outro número de linhas não
+    aplicam o log;
+  - checkpoint CSV antigo: o log semeado com read_legacy_checkpoint, como
+    em process_one_file (esse cenário carrega tybyria_gcs, com torch e
+    transformers);
+  - muitas compactações: milhares de checkpoints pequenos, bem mais
+    componentes que LIMITE_COMPONENTES no total.
+
+Uso:
+  python -m src.bench.log_scores
+  python -m src.bench.log_scores --sem-legado
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from src.analysis.log_scores import LogScores
+from src.bench.gcs_memoria import ClienteMemoria
+from src.utils.armazenamento_gcs import LIMITE_COMPONENTES
+
+PREFIXO = "tmp/RC_2025-03_BR_scores/"
+HASH = "a" * 64
+
+
+class _Queda(Exception):
+    pass
+
+
+def _pares(rng: random.Random, linhas: int, n: int) -> list:
+    return [(rng.randrange(linhas), rng.random()) for _ in range(n)]
+
+
+def _conferir(cenario: str, cliente: ClienteMemoria, linhas: int, esperado: dict) -> None:
+    pares = LogScores(cliente, "bucket", PREFIXO).carregar(linhas, HASH)
+    if pares is None or dict(pares) != esperado:
+        lidos = "nenhum log" if pares is None else f"{len(dict(pares)):,} linhas"
+        raise SystemExit(f"❌ {cenario}: carregar() leu {lidos}, esperado {len(esperado):,} linhas")
+    b = cliente.b
+    print(
+        f"✅ {cenario}: {len(esperado):,} linhas com o último score | {len(pares):,} pares lidos | "
+        f"{b.enviados:,} bytes enviados | maior compose com {b.maior_composto:,} componentes"
+    )
+
+
+def _gravar(log: LogScores, rng: random.Random, linhas: int, lotes: int, por_lote: int, esperado: dict) -> None:
+    for _ in range(lotes):
+        pares = _pares(rng, linhas, por_lote)
+        # o segmento sobe antes da compactação: os pares contam mesmo se ela cair
+        esperado.update(pares)
+        log.acrescentar(pares)
+
+
+def retomada(seed: int) -> None:
+    rng, cliente, esperado = random.Random(seed), ClienteMemoria(), {}
+    log = LogScores(cliente, "bucket", PREFIXO, compactar=4)
+    log.iniciar(1000, HASH)
+    _gravar(log, rng, 1000, 23, 17, esperado)
+    assert log.segmentos, "o cenário tem que deixar segmentos fora da base"
+    _conferir("retomada (base + segmentos)", cliente, 1000, esperado)
+
+    # a execução retomada continua gravando no mesmo log
+    log = LogScores(cliente, "bucket", PREFIXO, compactar=4)
+    log.carregar(1000, HASH)
+    _gravar(log, rng, 1000, 9, 17, esperado)
+    _conferir("retomada continuada", cliente, 1000, esperado)
+
+
+def queda_entre_compose_e_remocao(seed: int) -> None:
+    rng, cliente, esperado = random.Random(seed), ClienteMemoria(), {}
+    log = LogScores(cliente, "bucket", PREFIXO, compactar=5)
+    log.iniciar(1000, HASH)
+    _gravar(log, rng, 1000, 7, 11, esperado)
+
+    def cair(operacao: str, nome: str) -> None:
+        if operacao == "delete" and "/seg-" in nome:
+            raise _Queda(nome)
+
+    cliente.b.antes = cair
+    try:
+        _gravar(log, rng, 1000, 5, 11, esperado)
+        raise SystemExit("❌ queda entre compose e remoção: a compactação não aconteceu")
+    except _Queda:
+        pass
+    cliente.b.antes = None
+    _conferir("queda entre compose e remoção", cliente, 1000, esperado)
+
+    log = LogScores(cliente, "bucket", PREFIXO, compactar=5)
+    log.carregar(1000, HASH)
+    _gravar(log, rng, 1000, 12, 11, esperado)
+    _conferir("queda entre compose e remoção, retomada", cliente, 1000, esperado)
+
+
+def input_diferente(seed: int) -> None:
+    rng, cliente = random.Random(seed), ClienteMemoria()
+    log = LogScores(cliente, "bucket", PREFIXO)
+    log.iniciar(1000, HASH)
+    log.acrescentar(_pares(rng, 1000, 50))
+    outro_hash = LogScores(cliente, "bucket", PREFIXO).carregar(1000, "b" * 64)
+    outras_linhas = LogScores(cliente, "bucket", PREFIXO).carregar(1001, HASH)
+    if outro_hash is not None or outras_linhas is not None:
+        raise SystemExit("❌ input diferente: um log de outro input foi aplicado")
+    print("✅ input diferente: outro hash e outro número de linhas ignoram o log")
+
+
+def legado(seed: int) -> None:
+    import pandas as pd
+
+    from src.analysis import tybyria_gcs
+
+    class _GCSLocal:
+        """blob_exists / download_to de tybyria_gcs.GCS sobre uma pasta local."""
+
+        def __init__(self, pasta: str):
+            self.pasta = pasta
+
+        def blob_exists(self, gcs_path: str) -> bool:
+            return os.path.exists(os.path.join(self.pasta, gcs_path))
+
+        def download_to(self, gcs_path: str, local_path: str, usar_cache: bool = True) -> None:
+            shutil.copyfile(os.path.join(self.pasta, gcs_path), local_path)
+
+    rng, cliente = random.Random(seed), ClienteMemoria()
+    linhas = 500
+    scores = [rng.random() if i < 320 else None for i in range(linhas)]
+    df = pd.DataFrame(
+        {
+            tybyria_gcs.TEXT_COL: [f"texto {i}" for i in range(linhas)],
+            tybyria_gcs.SCORE_COL: ["" if s is None else str(s) for s in scores],
+        }
+    )
+    with tempfile.TemporaryDirectory() as pasta:
+        df.to_csv(os.path.join(pasta, "ckpt.csv"), index=False)
+        gcs = _GCSLocal(pasta)
+        local_tmp = os.path.join(pasta, "local.csv")
+        if tybyria_gcs.read_legacy_checkpoint(gcs, "ckpt.csv", local_tmp, linhas + 1):
+            raise SystemExit("❌ checkpoint CSV antigo: aceito com outro número de linhas")
+        feitos = tybyria_gcs.read_legacy_checkpoint(gcs, "ckpt.csv", local_tmp, linhas)
+
+    # mesma sequência de process_one_file quando não há log
+    log = LogScores(cliente, "bucket", PREFIXO)
+    if log.carregar(linhas, HASH) is not None:
+        raise SystemExit("❌ checkpoint CSV antigo: log inesperado no bucket vazio")
+    log.iniciar(linhas, HASH)
+    log.acrescentar(feitos)
+    esperado = {i: s for i, s in enumerate(scores) if s is not None}
+    _conferir("semeado do checkpoint CSV antigo", cliente, linhas, esperado)
+
+
+def muitas_compactacoes(seed: int) -> None:
+    rng, cliente, esperado = random.Random(seed), ClienteMemoria(), {}
+    linhas = 200_000
+    log = LogScores(cliente, "bucket", PREFIXO)
+    log.iniciar(linhas, HASH)
+    lotes = 3 * LIMITE_COMPONENTES
+    _gravar(log, rng, linhas, lotes, 40, esperado)
+    _conferir(f"muitas compactações ({lotes:,} segmentos)", cliente, linhas, esperado)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Log de scores do Tybyria num bucket em memória.")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sem-legado", action="store_true", help="pula o cenário que carrega tybyria_gcs (torch)")
+    args = ap.parse_args()
+
+    cenarios = [retomada, queda_entre_compose_e_remocao, input_diferente, muitas_compactacoes]
+    if not args.sem_legado:
+        cenarios.insert(3, legado)
+    for cenario in cenarios:
+        cenario(args.seed)
+
+
+if __name__ == "__main__":
+    main()
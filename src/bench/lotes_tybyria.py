@@ -0,0 +1,114 @@
+"""
+Mede os lotes por comprimento do Tybyria (src/analysis/lotes_tybyria.py)
+contra o agendamento antigo (ordem do arquivo, BATCH_SIZE fixo, padding=True).
+
+Os textos vêm de --arquivo (CSV com a coluna text_original, ex.: um *_BR.csv)
+ou dos comentários sintéticos de src/bench/amostra.py (comprimento com cauda
+longa, como num dump). Mede:
+  - padding: tokens de verdade / tokens processados nos dois agendamentos;
+  - com torch + transformers: textos/s e tokens/s (de verdade) na CPU, e a
+    maior diferença de score entre os dois (tem que ser ~0: a máscara de
+    atenção ignora o padding).
+Sem transformers, conta tokens por palavra e mostra só o padding.
+
+Uso:
+  python -m src.bench.lotes_tybyria --textos 4000
+  TYBYRIA_MAX_LEN=128 python -m src.bench.lotes_tybyria --arquivo RC_2025-03_BR.csv
+"""
+
+import argparse
+import csv
+import random
+import sys
+import time
+
+from src.analysis.lotes_tybyria import custo_padding, lotes_fixos, montar_lotes
+from src.bench.amostra import gerar_registro
+
+try:
+    import torch
+    from src.analysis import tybyria_gcs
+except ImportError:  # opcional: sem o modelo, só o padding
+    torch = None
+    tybyria_gcs = None
+
+
+def ler_textos(caminho: str, coluna: str, limite: int) -> list:
+    csv.field_size_limit(sys.maxsize)
+    with open(caminho, newline="", encoding="utf-8") as f:
+        textos = [linha[coluna] for linha in csv.DictReader(f) if (linha.get(coluna) or "").strip()]
+    return textos[:limite]
+
+
+def gerar_textos(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [gerar_registro(rng, i, frac_br=1.0)["body"] for i in range(n)]
+
+
+def _linha_padding(rotulo: str, comprimentos: list, lotes: list) -> None:
+    uteis, com_padding = custo_padding(comprimentos, lotes)
+    print(
+        f"{rotulo:<22} {len(lotes):>6,} lotes | {com_padding:>12,} tokens processados | "
+        f"{100 * uteis / max(com_padding, 1):5.1f}% úteis"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lotes por comprimento x lotes fixos no Tybyria.")
+    ap.add_argument("--textos", type=int, default=4000)
+    ap.add_argument("--arquivo", default=None, help="CSV com a coluna de texto (ex.: *_BR.csv)")
+    ap.add_argument("--coluna", default="text_original")
+    ap.add_argument("--lote", type=int, default=32, help="BATCH_SIZE do agendamento antigo")
+    ap.add_argument("--max-len", type=int, default=64)
+    ap.add_argument("--tokens", type=int, default=0, help="orçamento de tokens por lote (0 = lote x max-len)")
+    ap.add_argument("--max-lote", type=int, default=256)
+    ap.add_argument("--so-padding", action="store_true", help="não roda o modelo")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    textos = ler_textos(args.arquivo, args.coluna, args.textos) if args.arquivo else gerar_textos(args.textos, args.seed)
+    orcamento = args.tokens or args.lote * args.max_len
+
+    rodar_modelo = tybyria_gcs is not None and not args.so_padding
+    if rodar_modelo:
+        tybyria_gcs.MAX_LEN = args.max_len
+        rt = tybyria_gcs.load_tybyria_runtime()
+        torch.set_grad_enabled(False)
+        ids = tybyria_gcs.tokenize_texts(rt, textos)
+    else:
+        print("ℹ️ sem torch/transformers (ou --so-padding): tokens ~ palavras + 2, só o padding\n")
+        ids = [[0] * min(len(t.split()) + 2, args.max_len) for t in textos]
+    comprimentos = [len(x) for x in ids]
+
+    fixos = lotes_fixos(len(textos), args.lote)
+    por_comprimento = montar_lotes(comprimentos, orcamento, args.max_lote)
+    print(f"🧪 {len(textos):,} textos | {sum(comprimentos):,} tokens | orçamento {orcamento:,} tokens/lote")
+    _linha_padding(f"fixo x{args.lote}", comprimentos, fixos)
+    _linha_padding("por comprimento", comprimentos, por_comprimento)
+
+    if not rodar_modelo:
+        return
+
+    t0 = time.perf_counter()
+    antigos = []
+    for lote in fixos:
+        antigos.extend(tybyria_gcs.infer_batch(rt, [textos[i] for i in lote]))
+    dt_fixo = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    novos = [0.0] * len(textos)
+    for lote in por_comprimento:
+        for i, score in zip(lote, tybyria_gcs.infer_ids(rt, [ids[i] for i in lote])):
+            novos[i] = score
+    dt_novo = time.perf_counter() - t0
+
+    uteis = sum(comprimentos)
+    print()
+    for rotulo, dt in ((f"fixo x{args.lote}", dt_fixo), ("por comprimento", dt_novo)):
+        print(f"{rotulo:<22} {len(textos) / dt:>9,.1f} textos/s | {uteis / dt:>11,.0f} tokens/s em {dt:,.1f} s")
+    diferenca = max(abs(a - b) for a, b in zip(antigos, novos))
+    print(f"\n⚡ {dt_fixo / dt_novo:.2f}x | maior diferença de score: {diferenca:.2e}")
+
+
+if __name__ == "__main__":
+    main()
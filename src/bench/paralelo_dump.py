@@ -0,0 +1,81 @@
+"""
+Confere e mede o processamento paralelo de um dump (src/reddit/paralelo.py).
+
+Gera um JSONL sintético, roda o caminho serial (iter_registros + processar_registro)
+e o paralelo com N workers, e verifica se o CSV sai byte a byte igual
+(inclusive retomando de um checkpoint no meio do arquivo).
+
+Uso:
+  python -m src.bench.paralelo_dump --linhas 300000 --workers 8
+"""
+
+import argparse
+import csv
+import io
+import time
+
+from src.bench.amostra import gerar_jsonl
+from src.reddit.config import carregar_config_reddit
+from src.reddit.filters import compilar_casador
+from src.reddit.paralelo import processar_stream_paralelo
+from src.reddit.registro import CAMPOS_CSV, processar_registro
+from src.reddit.zst_reader import iter_registros
+
+
+def rodar_serial(dados: bytes, skip_to: int) -> str:
+    cfg = carregar_config_reddit()
+    subreddits_br = set(cfg["subreddits_br"])
+    casador = compilar_casador(cfg)
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CAMPOS_CSV)
+    for obj, _ in iter_registros(io.BytesIO(dados), skip_to=skip_to):
+        row = processar_registro(obj, cfg, subreddits_br, casador)
+        if row is not None:
+            writer.writerow(row)
+    return out.getvalue()
+
+
+def rodar_paralelo(dados: bytes, skip_to: int, workers: int, bloco_mb: float) -> str:
+    out = io.StringIO()
+    processar_stream_paralelo(
+        io.BytesIO(dados),
+        out,
+        workers=workers,
+        skip_to=skip_to,
+        tamanho_bloco=int(bloco_mb * 2**20),
+    )
+    return out.getvalue()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serial x paralelo num dump sintético.")
+    ap.add_argument("--linhas", type=int, default=300_000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--bloco-mb", type=float, default=8)
+    ap.add_argument("--frac-br", type=float, default=0.2)
+    args = ap.parse_args()
+
+    dados = gerar_jsonl(args.linhas, frac_br=args.frac_br)
+    print(f"🧪 {args.linhas:,} linhas sintéticas ({len(dados) / 2**20:.1f} MB)\n")
+
+    for skip_to in (0, args.linhas // 3):
+        t0 = time.perf_counter()
+        serial = rodar_serial(dados, skip_to)
+        t_serial = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        paralelo = rodar_paralelo(dados, skip_to, args.workers, args.bloco_mb)
+        t_paralelo = time.perf_counter() - t0
+
+        igual = "✅ idêntico" if serial == paralelo else "❌ DIFERENTE"
+        print(
+            f"skip_to={skip_to:>9,} | serial {t_serial:6.2f} s | "
+            f"{args.workers} workers {t_paralelo:6.2f} s ({t_serial / t_paralelo:4.2f}x) | {igual}"
+        )
+        if serial != paralelo:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Confere o CSV parcial no GCS de src/reddit/process_one_gcs.py
+(_upload_parcial_gcs) na janela de queda entre o upload/compose do parcial e
+a gravação do checkpoint.
+
+Roda contra o bucket em memória de src/bench/gcs_memoria.py (que recusa
+compose acima de LIMITE_COMPONENTES, como o GCS) e, em cada cenário, exige
+que o parcial no GCS fique idêntico, byte a byte, ao CSV local:
+
+  - normal: checkpoints seguidos, cada um estende o parcial com compose;
+  - queda depois do compose: o parcial ficou maior que o último checkpoint,
+    o CSV local é truncado de volta e reescrito com bytes diferentes;
+  - queda no meio do upload: o parcial ficou com um tamanho qualquer (menor
+    que o último checkpoint);
+  - parcial sem checkpoint: sobrou um parcial de outra execução e o
+    processamento começou do zero;
+  - muitos checkpoints: mais checkpoints que LIMITE_COMPONENTES (um mês RC
+    inteiro em checkpoints de 100k linhas), sem o compose estourar.
+
+Uso:
+  python -m src.bench.parcial_gcs
+"""
+
+import logging
+import os
+import tempfile
+
+from src.bench.gcs_memoria import ClienteMemoria
+from src.reddit.process_one_gcs import _upload_parcial_gcs
+from src.utils.armazenamento_gcs import LIMITE_COMPONENTES
+
+PARCIAL = "processed/RC_2025-03_BR.csv.parcial"
+
+
+class _Execucao:
+    """CSV local + cliente em memória, com o tamanho do último checkpoint como em process_file_gcs."""
+
+    def __init__(self, pasta: str, cliente: ClienteMemoria):
+        self.caminho = os.path.join(pasta, "saida.csv")
+        open(self.caminho, "wb").close()
+        self.cliente = cliente
+        self.tamanho_checkpoint = None
+
+    def escrever(self, dados: bytes) -> int:
+        with open(self.caminho, "ab") as f:
+            f.write(dados)
+        return os.path.getsize(self.caminho)
+
+    def truncar(self, tamanho: int) -> None:
+        with open(self.caminho, "r+b") as f:
+            f.truncate(tamanho)
+
+    def upload(self, tamanho: int) -> None:
+        _upload_parcial_gcs(self.cliente, "bucket", PARCIAL, self.caminho, tamanho, _LOGGER, self.tamanho_checkpoint)
+
+    def checkpoint(self, dados: bytes) -> None:
+        tamanho = self.escrever(dados)
+        self.upload(tamanho)
+        self.tamanho_checkpoint = tamanho
+
+    def conferir(self, cenario: str) -> None:
+        with open(self.caminho, "rb") as f:
+            local = f.read()
+        remoto = self.cliente.b.dados.get(PARCIAL)
+        if remoto != local:
+            raise SystemExit(f"❌ {cenario}: parcial no GCS ({len(remoto or b''):,} bytes) difere do CSV local ({len(local):,} bytes)")
+        b = self.cliente.b
+        print(
+            f"✅ {cenario}: {len(local):,} bytes idênticos | {b.enviados:,} bytes enviados | "
+            f"maior compose com {b.maior_composto:,} componentes"
+        )
+
+
+_LOGGER = logging.getLogger("parcial_gcs")
+
+
+def _linhas(rotulo: str, n: int) -> bytes:
+    return "".join(f"{rotulo},{i},texto {rotulo} {i}\n" for i in range(n)).encode()
+
+
+def normal(pasta: str) -> None:
+    ex = _Execucao(pasta, ClienteMemoria())
+    for i in range(5):
+        ex.checkpoint(_linhas(f"lote{i}", 100))
+    ex.conferir("normal")
+
+
+def queda_depois_do_compose(pasta: str) -> None:
+    ex = _Execucao(pasta, ClienteMemoria())
+    ex.checkpoint(_linhas("a", 100))
+    # parcial estendido, mas a execução cai antes de gravar o checkpoint
+    ex.upload(ex.escrever(_linhas("perdido", 37)))
+    # retomada: o CSV volta ao tamanho do checkpoint e recebe outros bytes
+    ex.truncar(ex.tamanho_checkpoint)
+    ex.checkpoint(_linhas("retomado", 80))
+    ex.conferir("queda depois do compose")
+
+
+def queda_no_meio_do_upload(pasta: str) -> None:
+    ex = _Execucao(pasta, ClienteMemoria())
+    ex.checkpoint(_linhas("a", 100))
+    ex.checkpoint(_linhas("b", 100))
+    dados = ex.cliente.b.dados
+    dados[PARCIAL] = dados[PARCIAL][: ex.tamanho_checkpoint // 3]
+    ex.checkpoint(_linhas("c", 50))
+    ex.conferir("queda no meio do upload")
+
+
+def parcial_sem_checkpoint(pasta: str) -> None:
+    cliente = ClienteMemoria()
+    cliente.b.dados[PARCIAL] = _linhas("outra execução", 10)
+    ex = _Execucao(pasta, cliente)
+    ex.checkpoint(_linhas("novo", 100))
+    ex.conferir("parcial sem checkpoint")
+
+
+def muitos_checkpoints(pasta: str) -> None:
+    ex = _Execucao(pasta, ClienteMemoria())
+    for i in range(LIMITE_COMPONENTES + 200):
+        ex.checkpoint(_linhas(f"lote{i}", 2))
+    ex.conferir("muitos checkpoints")
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    cenarios = (normal, queda_depois_do_compose, queda_no_meio_do_upload, parcial_sem_checkpoint, muitos_checkpoints)
+    for cenario in cenarios:
+        with tempfile.TemporaryDirectory() as pasta:
+            cenario(pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Mede a tokenização com cache de src/analysis/tokens_cache.py:
+
+  - o jeito antigo (tokenizer chamado lote a lote, com padding=True, num processo);
+  - a primeira passada (tokenizer em lote, em --processos processos, gravando o cache);
+  - a segunda passada (mesmos textos: só abre os .npy com mmap);
+  - e confere que os input_ids/attention_mask de um lote saem iguais aos do
+    tokenizer com padding=True.
+
+Os textos vêm de --arquivo (CSV com a coluna de texto) ou dos comentários
+sintéticos de src/bench/amostra.py. O cache vai para uma pasta temporária.
+
+Uso:
+  python -m src.bench.tokens_cache --textos 50000 --processos 4
+  python -m src.bench.tokens_cache --modelo nlptown/bert-base-multilingual-uncased-sentiment --max-len 256
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from src.analysis.tokens_cache import TOKENS_PROCESSOS, obter_tokens
+from src.bench.lotes_tybyria import gerar_textos, ler_textos
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tokenização por lote x cache de tokens em disco.")
+    ap.add_argument("--modelo", default="Veronyka/tybyria-v2.1")
+    ap.add_argument("--textos", type=int, default=50000)
+    ap.add_argument("--arquivo", default=None, help="CSV com a coluna de texto (ex.: *_BR.csv)")
+    ap.add_argument("--coluna", default="text_original")
+    ap.add_argument("--max-len", type=int, default=64)
+    ap.add_argument("--lote", type=int, default=32)
+    ap.add_argument("--processos", type=int, default=TOKENS_PROCESSOS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    textos = ler_textos(args.arquivo, args.coluna, args.textos) if args.arquivo else gerar_textos(args.textos, args.seed)
+    tokenizer = AutoTokenizer.from_pretrained(args.modelo)
+    pad_id = tokenizer.pad_token_id or 0
+    print(f"🧪 {len(textos):,} textos | {args.modelo} | max_len {args.max_len}")
+
+    t0 = time.perf_counter()
+    for i in range(0, len(textos), args.lote):
+        tokenizer(textos[i:i + args.lote], padding=True, truncation=True, max_length=args.max_len)
+    dt_antigo = time.perf_counter() - t0
+    print(f"🐢 lote a lote (padding=True): {dt_antigo:,.2f} s")
+
+    diretorio = tempfile.mkdtemp(prefix="tokens_cache_")
+    try:
+        t0 = time.perf_counter()
+        tokens = obter_tokens(tokenizer, textos, args.max_len, nome="bench", diretorio=diretorio, processos=args.processos)
+        dt_frio = time.perf_counter() - t0
+        print(f"🔤 1ª passada, {args.processos} processo(s): {dt_frio:,.2f} s | {tokens.descrever()}")
+
+        t0 = time.perf_counter()
+        tokens = obter_tokens(tokenizer, textos, args.max_len, nome="bench", diretorio=diretorio, processos=args.processos)
+        dt_quente = time.perf_counter() - t0
+        print(f"⚡ 2ª passada: {dt_quente:,.2f} s | {tokens.descrever()}")
+
+        esperado = tokenizer(textos[:args.lote], padding=True, truncation=True, max_length=args.max_len)
+        input_ids, attention_mask = tokens.lote(range(min(args.lote, len(textos))), pad_id)
+        assert np.array_equal(input_ids, np.array(esperado["input_ids"])), "input_ids diferentes"
+        assert np.array_equal(attention_mask, np.array(esperado["attention_mask"])), "attention_mask diferente"
+        print(f"✅ lote idêntico ao tokenizer | {dt_antigo / dt_frio:.2f}x na 1ª passada, {dt_antigo / max(dt_quente, 1e-9):,.0f}x na 2ª")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
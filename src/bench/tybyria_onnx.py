@@ -0,0 +1,106 @@
+"""
+Paridade e velocidade dos backends do Tybyria na CPU: PyTorch fp32 (a
+referência) x ONNX Runtime fp32 x ONNX Runtime int8 (src/analysis/tybyria_onnx.py).
+
+Os mesmos input_ids (lotes por comprimento de src/analysis/lotes_tybyria.py)
+passam pelos três backends. Para cada um:
+  - textos/s e aceleração sobre o PyTorch;
+  - diferença de score (máxima, média e p99) contra o PyTorch;
+  - concordância de rótulo no TYBYRIA_THRESHOLD (quantos viraram 0 -> 1 ou 1 -> 0),
+    e quantos textos estão a menos de --margem do threshold no PyTorch (onde
+    uma virada é esperada).
+
+Para decidir a troca de backend, use textos reais (--arquivo, um *_BR.csv):
+os sintéticos de src/bench/amostra.py quase nunca passam do threshold.
+--saida grava os scores de cada texto num CSV para inspecionar as viradas.
+
+Uso:
+  python -m src.bench.tybyria_onnx --arquivo RC_2025-03_BR.csv --textos 5000
+  TYBYRIA_MODEL_NAME=/modelos/tybyria-v2.1 python -m src.bench.tybyria_onnx --backends onnx-int8
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+import torch
+
+from src.analysis import tybyria_gcs
+from src.analysis.lotes_tybyria import montar_lotes
+from src.bench.lotes_tybyria import gerar_textos, ler_textos
+
+
+def pontuar(rt, ids: list, lotes: list) -> np.ndarray:
+    scores = np.zeros(len(ids), dtype=np.float64)
+    for lote in lotes:
+        scores[lote] = tybyria_gcs.infer_ids(rt, [ids[i] for i in lote])
+    return scores
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Paridade PyTorch x ONNX Runtime (fp32/int8) do Tybyria.")
+    ap.add_argument("--textos", type=int, default=2000)
+    ap.add_argument("--arquivo", default=None, help="CSV com a coluna de texto (ex.: *_BR.csv)")
+    ap.add_argument("--coluna", default="text_original")
+    ap.add_argument("--backends", default="onnx,onnx-int8", help="comparados com o torch, separados por vírgula")
+    ap.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = padrão)")
+    ap.add_argument("--margem", type=float, default=0.05)
+    ap.add_argument("--saida", default=None, help="CSV com texto e score de cada backend")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    textos = ler_textos(args.arquivo, args.coluna, args.textos) if args.arquivo else gerar_textos(args.textos, args.seed)
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    torch.set_grad_enabled(False)
+    limiar = tybyria_gcs.THRESHOLD
+
+    referencia = tybyria_gcs.load_tybyria_runtime("torch")
+    ids = tybyria_gcs.tokenize_texts(referencia, textos)
+    lotes = montar_lotes([len(x) for x in ids], tybyria_gcs.TOKENS_LOTE, tybyria_gcs.MAX_LOTE)
+    pontuar(referencia, ids, lotes[:1])  # aquecimento
+
+    t0 = time.perf_counter()
+    base = pontuar(referencia, ids, lotes)
+    dt_base = time.perf_counter() - t0
+    rotulos_base = base >= limiar
+    perto = int((np.abs(base - limiar) < args.margem).sum())
+
+    print(
+        f"\n🧪 {len(textos):,} textos | threshold {limiar} | {int(rotulos_base.sum()):,} positivos no torch | "
+        f"{perto:,} a menos de {args.margem} do threshold"
+    )
+    print(f"{'torch':<10} {len(textos) / dt_base:>9,.1f} textos/s | referência")
+
+    colunas = {"torch": base}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        rt = tybyria_gcs.load_tybyria_runtime(backend)
+        pontuar(rt, ids, lotes[:1])
+        t0 = time.perf_counter()
+        scores = pontuar(rt, ids, lotes)
+        dt = time.perf_counter() - t0
+        colunas[backend] = scores
+
+        diferenca = np.abs(scores - base)
+        rotulos = scores >= limiar
+        viradas_01 = int((rotulos & ~rotulos_base).sum())
+        viradas_10 = int((~rotulos & rotulos_base).sum())
+        concordancia = 100 * float((rotulos == rotulos_base).mean())
+        print(
+            f"{backend:<10} {len(textos) / dt:>9,.1f} textos/s | {dt_base / dt:5.2f}x | "
+            f"score: máx {diferenca.max():.2e}, média {diferenca.mean():.2e}, p99 {np.percentile(diferenca, 99):.2e} | "
+            f"rótulo: {concordancia:.2f}% igual ({viradas_01} 0->1, {viradas_10} 1->0)"
+        )
+
+    if args.saida:
+        with open(args.saida, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["text"] + list(colunas))
+            for i, texto in enumerate(textos):
+                w.writerow([texto] + [f"{colunas[b][i]:.6f}" for b in colunas])
+        print(f"\n💾 Scores por texto: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
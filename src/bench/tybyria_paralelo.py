@@ -0,0 +1,78 @@
+"""
+Mede o Tybyria em vários processos (src/analysis/tybyria_paralelo.py) contra
+um processo só com todas as threads do PyTorch (o jeito de antes).
+
+Os mesmos lotes por comprimento passam por cada configuração de --processos
+(threads por worker = núcleos / processos, ou --threads). O bench mostra
+textos/s, a aceleração sobre um processo e a maior diferença de score, que
+tem que ser ~0 (mesmo modelo, mesmos lotes).
+
+As configurações em vários processos rodam antes da referência de um
+processo, porque o processo principal não pode fazer inferência antes do fork
+(ver o docstring de tybyria_paralelo).
+
+Uso:
+  python -m src.bench.tybyria_paralelo --textos 4000 --processos 2,4,8
+  TYBYRIA_BACKEND=onnx-int8 python -m src.bench.tybyria_paralelo --arquivo RC_2025-03_BR.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from src.analysis import tybyria_gcs
+from src.analysis.lotes_tybyria import montar_lotes
+from src.analysis.tokens_cache import preencher
+from src.analysis.tybyria_paralelo import PoolTybyria, nucleos_disponiveis
+from src.bench.lotes_tybyria import gerar_textos, ler_textos
+
+
+def _espalhar(n: int, lotes: list, resultados) -> np.ndarray:
+    scores = np.zeros(n, dtype=np.float64)
+    for lote, lote_scores in zip(lotes, resultados):
+        scores[lote] = lote_scores
+    return scores
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tybyria: um processo x vários processos na CPU.")
+    ap.add_argument("--textos", type=int, default=4000)
+    ap.add_argument("--arquivo", default=None, help="CSV com a coluna de texto (ex.: *_BR.csv)")
+    ap.add_argument("--coluna", default="text_original")
+    ap.add_argument("--processos", default="2,4", help="configurações a medir, separadas por vírgula")
+    ap.add_argument("--threads", type=int, default=0, help="threads por worker (0 = núcleos / processos)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    textos = ler_textos(args.arquivo, args.coluna, args.textos) if args.arquivo else gerar_textos(args.textos, args.seed)
+    rt = tybyria_gcs.load_tybyria_runtime()
+    ids = tybyria_gcs.tokenize_texts(rt, textos)
+    lotes = montar_lotes([len(x) for x in ids], tybyria_gcs.TOKENS_LOTE, tybyria_gcs.MAX_LOTE)
+    pad_id = rt.tokenizer.pad_token_id or 0
+    entradas = [preencher([ids[i] for i in lote], pad_id) for lote in lotes]
+    print(f"🧪 {len(textos):,} textos em {len(lotes):,} lotes | {nucleos_disponiveis()} núcleos | backend {rt.backend}")
+
+    medidas = []
+    for processos in [int(p) for p in args.processos.split(",") if p.strip()]:
+        with PoolTybyria(rt, tybyria_gcs.infer_arrays, processos, args.threads) as pool:
+            list(pool.pontuar(entradas[:processos]))  # aquecimento (modelo/sessão em cada worker)
+            t0 = time.perf_counter()
+            scores = _espalhar(len(textos), lotes, pool.pontuar(entradas))
+            medidas.append((pool.descrever(), time.perf_counter() - t0, scores))
+
+    torch.set_grad_enabled(False)
+    tybyria_gcs.infer_arrays(rt, *entradas[0])
+    t0 = time.perf_counter()
+    base = _espalhar(len(textos), lotes, (tybyria_gcs.infer_arrays(rt, *e) for e in entradas))
+    dt_base = time.perf_counter() - t0
+
+    print(f"{'1 processo x ' + str(torch.get_num_threads()) + ' threads':<32} {len(textos) / dt_base:>9,.1f} textos/s | referência")
+    for rotulo, dt, scores in medidas:
+        diferenca = float(np.abs(scores - base).max())
+        print(f"{rotulo:<32} {len(textos) / dt:>9,.1f} textos/s | {dt_base / dt:5.2f}x | maior diferença de score {diferenca:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Cache dos textos repetidos do dump ("[deleted]", "[removed]", mensagens de
+bot, copypasta...): texto cru -> (texto_limpo, resultado do CasadorTermos).
+
+É um LRU limitado (functools.lru_cache, em C). A chave é o próprio texto:
+o hash de str é calculado uma vez e fica guardado no objeto, e a comparação
+por igualdade no acerto garante que colisão de hash nunca devolve o
+resultado de outro texto.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from src.reddit.config import CACHE_TEXTOS
+from src.reddit.filters import CasadorTermos
+from src.utils.limpeza import limpar_texto
+
+Casamento = Tuple[bool, List[str], List[str]]
+
+
+class CacheTextos:
+    def __init__(self, casador: CasadorTermos, capacidade: int = CACHE_TEXTOS):
+        self.casador = casador
+        self.capacidade = capacidade
+        self._obter = lru_cache(maxsize=capacidade)(self._calcular)
+
+    def _calcular(self, texto_original: str) -> Tuple[str, Casamento]:
+        texto_limpo = limpar_texto(texto_original)
+        return texto_limpo, self.casador.casar(texto_limpo)
+
+    def obter(self, texto_original: str) -> Tuple[str, Casamento]:
+        """(texto_limpo, (ok, matched_termos, matched_cidades)). Não altere as listas devolvidas."""
+        return self._obter(texto_original)
+
+    def contadores(self) -> Tuple[int, int, int]:
+        """(hits, misses, entradas)"""
+        info = self._obter.cache_info()
+        return info.hits, info.misses, info.currsize
+
+
+def resumo_cache(hits: int, misses: int, entradas: Optional[int] = None) -> str:
+    total = hits + misses
+    taxa = 100.0 * hits / total if total else 0.0
+    msg = f"🧠 Cache de textos: {hits:,} hits ({taxa:.1f}%) | {misses:,} misses"
+    if entradas is not None:
+        msg += f" | {entradas:,} entradas"
+    return msg
@@ -0,0 +1,69 @@
+"""
+Pareia o checkpoint com o CSV parcial de saída.
+
+O checkpoint só é gravado depois de flush + fsync do CSV local, e guarda o
+tamanho (bytes) do arquivo naquele momento e um sha256 da cauda dele. Na
+retomada o CSV é conferido contra isso e truncado de volta para o tamanho do
+checkpoint: o que foi escrito depois (e vai ser reprocessado) não duplica, e
+o que veio antes não se perde.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+# Quantos bytes do fim do CSV entram no hash
+TAMANHO_CAUDA = 64 * 1024
+
+
+@dataclass
+class EstadoSaida:
+    tamanho: int     # bytes do CSV já gravados em disco no checkpoint
+    hash_cauda: str  # sha256 dos últimos TAMANHO_CAUDA bytes até `tamanho`
+
+
+def hash_cauda(caminho: str, tamanho: int) -> str:
+    inicio = max(0, tamanho - TAMANHO_CAUDA)
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        return hashlib.sha256(f.read(tamanho - inicio)).hexdigest()
+
+
+def sincronizar_saida(f_out, caminho: str) -> EstadoSaida:
+    """flush + fsync do CSV aberto e o estado dele para ir no checkpoint."""
+    f_out.flush()
+    os.fsync(f_out.fileno())
+    tamanho = os.fstat(f_out.fileno()).st_size
+    return EstadoSaida(tamanho, hash_cauda(caminho, tamanho))
+
+
+def saida_confere(caminho: str, estado: EstadoSaida) -> bool:
+    """True se o CSV local tem pelo menos `estado.tamanho` bytes e a cauda bate."""
+    if not os.path.exists(caminho) or os.path.getsize(caminho) < estado.tamanho:
+        return False
+    return hash_cauda(caminho, estado.tamanho) == estado.hash_cauda
+
+
+def truncar_saida(caminho: str, tamanho: int) -> None:
+    with open(caminho, "r+b") as f:
+        f.truncate(tamanho)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def saida_para_checkpoint(estado: Optional[EstadoSaida]) -> Optional[dict]:
+    return asdict(estado) if estado else None
+
+
+def ler_saida_checkpoint(texto: str) -> Optional[EstadoSaida]:
+    """Estado da saída gravado no checkpoint (None no formato antigo / sem saída)."""
+    texto = (texto or "").strip()
+    if not texto.startswith("{"):
+        return None
+    try:
+        saida = json.loads(texto).get("saida")
+        return EstadoSaida(int(saida["tamanho"]), str(saida["hash_cauda"])) if saida else None
+    except Exception:
+        return None
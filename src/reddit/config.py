@@ -17,6 +17,45 @@ TERMOS_ODIO_PATH = os.path.join(FILTROS_DIR, "termos_odio.txt")
 CIDADES_MG_PATH = os.path.join(FILTROS_DIR, "cidades_mg.txt")
 SUBREDDITS_BR_PATH = os.path.join(CONFIGS_DIR, "subreddits_br.txt")
 
+# Pré-filtro de subreddit nos bytes crus antes do json.loads (ver src/reddit/prefiltro.py)
+# export REDDIT_PREFILTRO_SUBREDDIT=1
+PREFILTRO_SUBREDDIT = os.getenv("REDDIT_PREFILTRO_SUBREDDIT", "0") == "1"
+
+# Backend de JSON das linhas do dump: auto | simdjson | orjson | json (ver src/reddit/json_decoder.py)
+JSON_BACKEND = os.getenv("REDDIT_JSON_BACKEND", "auto")
+# Só materializa id/author/created_utc/subreddit/body/title/selftext (ganho real só com simdjson)
+JSON_PROJECAO = os.getenv("REDDIT_JSON_PROJECAO", "0") == "1"
+
+# Processos por arquivo .zst (1 = serial; ver src/reddit/paralelo.py) e tamanho dos blocos
+WORKERS = int(os.getenv("REDDIT_WORKERS", "1"))
+BLOCO_MB = int(os.getenv("REDDIT_BLOCO_MB", "8"))
+
+# Formato do *_BR enviado ao GCS: csv | parquet (ver src/reddit/saida_parquet.py)
+FORMATO_SAIDA = os.getenv("REDDIT_FORMATO_SAIDA", "csv").lower()
+PARQUET_LINHAS_GRUPO = int(os.getenv("REDDIT_PARQUET_LINHAS_GRUPO", "100000"))
+
+# Entradas do cache de textos repetidos (limpeza + termos; ver src/reddit/cache_textos.py). 0 = desliga
+CACHE_TEXTOS = int(os.getenv("REDDIT_CACHE_TEXTOS", "100000"))
+
+# Idioma do texto (ver src/reddit/idioma.py): off | marcar (coluna lang) | filtrar (só português)
+IDIOMA = os.getenv("REDDIT_IDIOMA", "off").lower()
+IDIOMA_PROB_MINIMA = float(os.getenv("REDDIT_IDIOMA_PROB", "0.80"))
+# Linhas BR por chamada do detector no modo serial (no paralelo o lote é o bloco inteiro)
+IDIOMA_LOTE = int(os.getenv("REDDIT_IDIOMA_LOTE", "1000"))
+
+# Leitura dos .zst (ver src/reddit/fonte_registros.py): quanto comprimido pedir por vez à origem
+# (arquivo, GCS ou stdin) e janela máxima do zstd (dumps com --long precisam de janela grande)
+BUFFER_LEITURA = int(os.getenv("REDDIT_BUFFER_LEITURA_KB", "1024")) * 1024
+ZSTD_MAX_WINDOW = int(os.getenv("ZSTD_MAX_WINDOW", str(2**31)))  # ~2GB
+# gs:// via client: baixa faixas de PREFETCH_MB numa thread, até PREFETCH_PROFUNDIDADE prontas
+# (ver src/reddit/prefetch_gcs.py). 0 = sem prefetch (blob.open na mesma thread)
+PREFETCH_MB = int(os.getenv("REDDIT_PREFETCH_MB", "8"))
+PREFETCH_PROFUNDIDADE = int(os.getenv("REDDIT_PREFETCH_PROFUNDIDADE", "2"))
+# Índice dos .zst (ver src/reddit/zst_inspect.py): quanto do início descomprimir para estimar o
+# tamanho/linhas e se grava o índice ao lado do .zst (<arquivo>.zst.idx.json)
+ZST_AMOSTRA_MB = int(os.getenv("REDDIT_ZST_AMOSTRA_MB", "4"))
+ZST_INDICE_SIDECAR = os.getenv("REDDIT_ZST_INDICE_SIDECAR", "1") == "1"
+
 
 def carregar_lista(caminho_arquivo):
     termos = []
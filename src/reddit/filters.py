@@ -1,5 +1,8 @@
 import re
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+# termo de 1 palavra só com caracteres \w: "\bterm\b" equivale a ser um token inteiro
+_PALAVRA = re.compile(r"\w+", flags=re.UNICODE)
 
 
 def tokenize(texto: str) -> List[str]:
@@ -34,6 +37,22 @@ def match_simples(texto_lower: str, tokens: List[str], termos: List[str]) -> Lis
     return encontrados
 
 
+def match_simples_tokens(texto_lower: str, tokens: set, termos: List[str]) -> List[str]:
+    """
+    Mesmo resultado do match_simples, mas termos só com \w viram lookup no
+    conjunto de tokens ("\bterm\b" nesse caso = ser um token inteiro).
+    Termos com pontuação continuam na regex.
+    """
+    encontrados = []
+    for term in termos:
+        if _PALAVRA.fullmatch(term):
+            if term in tokens:
+                encontrados.append(term)
+        elif re.search(rf"\b{re.escape(term)}\b", texto_lower):
+            encontrados.append(term)
+    return encontrados
+
+
 def match_compostos(texto_lower: str, termos: List[str]) -> List[str]:
     """Match de termos compostos usando substring normal."""
     return [term for term in termos if term in texto_lower]
@@ -44,20 +63,30 @@ def texto_casa_mg_lgbt(
     termos_lgbt: List[str],
     termos_odio: List[str],
     cidades_mg: List[str],
+    por_tokens: bool = False,
 ) -> Tuple[bool, List[str], List[str]]:
     """
     Retorna:
       ok → match válido
       matched_termos → termos LGBT/ódio encontrados
       matched_cidades → cidades MG encontradas
+
+    por_tokens=True: termos de 1 palavra casam pelo conjunto de tokens do texto
+    (mesmo resultado, sem uma regex por termo). Para muitas chamadas com as
+    mesmas listas, prefira o CasadorTermos (compilar_casador).
     """
     if not isinstance(texto, str):
         return False, [], []
 
     texto_lower = texto.lower()
 
-    # Tokenização (não usada diretamente, mas pode ser útil)
+    # Tokenização (usada no modo por_tokens)
     tokens = tokenize(texto)
+    if por_tokens:
+        conjunto = set(tokens)
+        match_s = lambda termos: match_simples_tokens(texto_lower, conjunto, termos)
+    else:
+        match_s = lambda termos: match_simples(texto_lower, tokens, termos)
 
     # --- Separar simples e compostos ---
     lgbt_s, lgbt_c = separar_simples_composto(termos_lgbt)
@@ -65,14 +94,116 @@ def texto_casa_mg_lgbt(
     cid_s, cid_c   = separar_simples_composto(cidades_mg)
 
     # --- Match LGBT e ódio ---
-    matched_lgbt   = match_simples(texto_lower, tokens, lgbt_s) + match_compostos(texto_lower, lgbt_c)
-    matched_odio   = match_simples(texto_lower, tokens, odio_s) + match_compostos(texto_lower, odio_c)
+    matched_lgbt   = match_s(lgbt_s) + match_compostos(texto_lower, lgbt_c)
+    matched_odio   = match_s(odio_s) + match_compostos(texto_lower, odio_c)
     matched_termos = matched_lgbt + matched_odio
 
     # --- Match cidades MG ---
-    matched_cidades = match_simples(texto_lower, tokens, cid_s) + match_compostos(texto_lower, cid_c)
+    matched_cidades = match_s(cid_s) + match_compostos(texto_lower, cid_c)
 
     # --- Lógica final ---
     ok = (len(matched_termos) > 0) and (len(matched_cidades) > 0)
 
     return ok, matched_termos, matched_cidades
+
+
+class _GrupoTermos:
+    """Termos de uma categoria já separados e compilados (ver CasadorTermos)."""
+
+    def __init__(self, termos: List[str]):
+        simples, self.compostos = separar_simples_composto(termos)
+        self.n_simples = len(simples)
+
+        # token -> posições na lista de simples (lista repetida continua repetida na saída)
+        self.palavras: Dict[str, List[int]] = {}
+        # simples com pontuação ("lgbt+", "e-mail"): substring + a mesma borda do "\b" original
+        self.outros: List[Tuple[int, str]] = []
+        for i, term in enumerate(simples):
+            if _PALAVRA.fullmatch(term):
+                self.palavras.setdefault(term, []).append(i)
+            else:
+                self.outros.append((i, term))
+        self.simples = simples
+        self.conjunto_palavras = frozenset(self.palavras)
+
+        # uma busca só diz se algum composto aparece; só então confere um a um
+        self.re_compostos = _alternativa([re.escape(t) for t in self.compostos])
+
+    def casar(self, texto_lower: str, tokens: set) -> List[str]:
+        achados = []
+        # interseção percorre o menor dos dois conjuntos
+        for tok in tokens & self.conjunto_palavras:
+            achados.extend(self.palavras[tok])
+        for i, term in self.outros:
+            if term in texto_lower and _casa_com_borda(texto_lower, term):
+                achados.append(i)
+        achados.sort()
+
+        encontrados = [self.simples[i] for i in achados]
+        if self.re_compostos is not None and self.re_compostos.search(texto_lower):
+            encontrados.extend(t for t in self.compostos if t in texto_lower)
+        return encontrados
+
+
+def _eh_palavra(c: str) -> bool:
+    # mesmo critério do \w do re (str.isalnum() + "_")
+    return c.isalnum() or c == "_"
+
+
+def _casa_com_borda(texto: str, term: str) -> bool:
+    """Equivale a re.search(rf"\b{re.escape(term)}\b", texto), sem compilar regex."""
+    borda_ini = _eh_palavra(term[0])
+    borda_fim = _eh_palavra(term[-1])
+    p = texto.find(term)
+    while p != -1:
+        fim = p + len(term)
+        antes = p > 0 and _eh_palavra(texto[p - 1])
+        depois = fim < len(texto) and _eh_palavra(texto[fim])
+        # "\b" = um lado é \w e o outro não
+        if antes != borda_ini and depois != borda_fim:
+            return True
+        p = texto.find(term, p + 1)
+    return False
+
+
+def _alternativa(padroes: List[str]) -> Optional[re.Pattern]:
+    if not padroes:
+        return None
+    return re.compile("|".join(padroes))
+
+
+class CasadorTermos:
+    """
+    Versão pré-compilada do texto_casa_mg_lgbt: monta tudo uma vez e casa
+    LGBT, ódio e cidades numa passada de tokenização do texto (um lookup por
+    token distinto), em vez de uma regex por termo a cada chamada.
+
+    Devolve exatamente o mesmo (ok, matched_termos, matched_cidades), na mesma ordem.
+    """
+
+    def __init__(self, termos_lgbt: List[str], termos_odio: List[str], cidades_mg: List[str]):
+        self.lgbt = _GrupoTermos(termos_lgbt)
+        self.odio = _GrupoTermos(termos_odio)
+        self.cidades = _GrupoTermos(cidades_mg)
+
+        # para has_lgbt_term / has_hate_term sem varrer as listas
+        self.conjunto_lgbt = frozenset(termos_lgbt)
+        self.conjunto_odio = frozenset(termos_odio)
+
+    def casar(self, texto: str) -> Tuple[bool, List[str], List[str]]:
+        if not isinstance(texto, str):
+            return False, [], []
+
+        texto_lower = texto.lower()
+        tokens = set(_PALAVRA.findall(texto_lower))
+
+        matched_termos = self.lgbt.casar(texto_lower, tokens) + self.odio.casar(texto_lower, tokens)
+        matched_cidades = self.cidades.casar(texto_lower, tokens)
+
+        ok = (len(matched_termos) > 0) and (len(matched_cidades) > 0)
+        return ok, matched_termos, matched_cidades
+
+
+def compilar_casador(cfg: dict) -> CasadorTermos:
+    """CasadorTermos a partir de carregar_config_reddit()."""
+    return CasadorTermos(cfg["termos_lgbt"], cfg["termos_odio"], cfg["cidades_mg"])
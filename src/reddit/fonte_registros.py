@@ -0,0 +1,303 @@
+"""
+Origem única dos registros de um RC_*.zst, seja ele local, no GCS ou no stdin.
+
+Antes cada processador tinha a sua cópia do leitor (open + stream_reader,
+`gsutil cat` num subprocesso, blob.open do google-cloud-storage), com buffers
+e tratamento de erro diferentes. A FonteRegistros junta tudo:
+
+  file:///caminho/RC.zst  ou  /caminho/RC.zst   arquivo local (seek no frame)
+  gs://bucket/caminho/RC.zst                     GCS: transporte "client" (prefetch em faixas
+                                                 numa thread, ver prefetch_gcs.py; ou BlobReader)
+                                                 ou "gsutil" (`gsutil cat -r offset-`)
+  -  ou  stdin://                                stdin (sem seek: retomada só contando "\\n")
+
+Em todas a leitura comprimida é de `buffer_leitura` bytes por vez, a
+descompressão é a do LeitorFramesZst (marca de frame para o checkpoint) com
+`max_window_size` configurável, e a EstatisticasLeitura conta bytes
+comprimidos, bytes descomprimidos e linhas para o log de vazão.
+
+Uso:
+    with FonteRegistros(uri) as fonte:
+        for obj, num_linha in fonte.registros(skip_to, logger, nome, prefiltro, decoder, marca, marcas):
+            ...
+    logger.info(fonte.resumo())
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+import zstandard as zstd
+
+from src.reddit.config import BUFFER_LEITURA, PREFETCH_MB, PREFETCH_PROFUNDIDADE, ZSTD_MAX_WINDOW
+from src.reddit.prefetch_gcs import LeitorPrefetch
+from src.reddit.zst_frames import LeitorFramesZst, MarcaFrame, MarcasFrames, ponto_de_retomada
+from src.reddit.zst_reader import iter_registros
+from src.utils.armazenamento_gcs import cliente_gcs, separar_uri
+
+TRANSPORTES_GCS = ("client", "gsutil")
+
+
+class EstatisticasLeitura:
+    """Bytes comprimidos lidos, bytes descomprimidos e linhas ("\\n") desde a abertura."""
+
+    def __init__(self, offset_inicial: int = 0):
+        self.offset_inicial = offset_inicial  # onde a leitura começou (seek da retomada)
+        self.bytes_comprimidos = 0
+        self.bytes_descomprimidos = 0
+        self.linhas = 0
+        self.inicio = time.perf_counter()
+
+    def resumo(self) -> str:
+        dt = max(time.perf_counter() - self.inicio, 1e-9)
+        mb_in = self.bytes_comprimidos / 2**20
+        mb_out = self.bytes_descomprimidos / 2**20
+        return (
+            f"📊 Leitura: {mb_in:,.1f} MB comprimidos ({mb_in / dt:,.1f} MB/s) -> "
+            f"{mb_out:,.1f} MB ({mb_out / dt:,.1f} MB/s) | {self.linhas:,} linhas "
+            f"({self.linhas / dt:,.0f} linhas/s) em {dt:,.1f} s"
+        )
+
+
+class _ContadorComprimido:
+    """Embrulha o file-like comprimido contando os bytes lidos."""
+
+    def __init__(self, fh, estatisticas: EstatisticasLeitura):
+        self.fh = fh
+        self.estatisticas = estatisticas
+
+    def read(self, size: int = -1) -> bytes:
+        dados = self.fh.read(size)
+        self.estatisticas.bytes_comprimidos += len(dados)
+        return dados
+
+
+class _ContadorDescomprimido:
+    """Embrulha o LeitorFramesZst contando bytes e linhas; repassa a marca de frame."""
+
+    def __init__(self, leitor: LeitorFramesZst, estatisticas: EstatisticasLeitura):
+        self.leitor = leitor
+        self.estatisticas = estatisticas
+
+    @property
+    def inicio_de_frame(self) -> Optional[int]:
+        return self.leitor.inicio_de_frame
+
+    def read(self, size: int = -1) -> bytes:
+        dados = self.leitor.read(size)
+        self.estatisticas.bytes_descomprimidos += len(dados)
+        self.estatisticas.linhas += dados.count(b"\n")
+        return dados
+
+
+class FonteRegistros:
+    def __init__(
+        self,
+        uri: str,
+        buffer_leitura: int = BUFFER_LEITURA,
+        max_window_size: int = ZSTD_MAX_WINDOW,
+        transporte: str = "client",
+        client=None,
+        prefetch_mb: int = PREFETCH_MB,
+        prefetch_profundidade: int = PREFETCH_PROFUNDIDADE,
+    ):
+        """
+        uri: file://, caminho local, gs:// ou "-"/stdin://.
+        buffer_leitura: bytes comprimidos pedidos à origem por leitura.
+        max_window_size: janela máxima do zstd (evita "Frame requires too much memory for decoding").
+        transporte: para gs://, "client" (google-cloud-storage) ou "gsutil".
+        client: storage.Client já criado (senão usa o cliente_gcs() do processo).
+        prefetch_mb / prefetch_profundidade: gs:// via client baixa faixas desse tamanho numa
+            thread, com até essa quantidade prontas na fila (prefetch_mb=0 usa blob.open).
+        """
+        if transporte not in TRANSPORTES_GCS:
+            raise ValueError(f"Transporte GCS desconhecido: {transporte} (use {', '.join(TRANSPORTES_GCS)})")
+        self.uri = uri
+        self.buffer_leitura = buffer_leitura
+        self.max_window_size = max_window_size
+        self.transporte = transporte
+        self.client = client
+        self.prefetch_mb = prefetch_mb
+        self.prefetch_profundidade = prefetch_profundidade
+        self.estatisticas = EstatisticasLeitura()
+        self.prefetch: Optional[LeitorPrefetch] = None
+        self._logger: Optional[logging.Logger] = None
+
+        self._fh = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._stderr = None
+
+    # ---------- origem comprimida ----------
+
+    @property
+    def eh_stdin(self) -> bool:
+        return self.uri in ("-", "stdin://")
+
+    @property
+    def eh_gcs(self) -> bool:
+        return self.uri.startswith("gs://")
+
+    @property
+    def permite_seek(self) -> bool:
+        return not self.eh_stdin
+
+    @property
+    def nome(self) -> str:
+        return "stdin" if self.eh_stdin else os.path.basename(self.uri)
+
+    def _abrir_comprimido(self, offset: int, filename: str):
+        if self.eh_stdin:
+            return sys.stdin.buffer
+
+        if self.eh_gcs:
+            bucket, caminho = separar_uri(self.uri)
+            if self.transporte == "gsutil":
+                cmd = ["gsutil", "cat", self.uri] if not offset else ["gsutil", "cat", "-r", f"{offset}-", self.uri]
+                # stderr num arquivo: um PIPE que ninguém lê pode encher e travar o gsutil
+                self._stderr = tempfile.TemporaryFile()
+                self._proc = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=self._stderr, bufsize=self.buffer_leitura
+                )
+                return self._proc.stdout
+
+            client = self.client or cliente_gcs()
+            if self.prefetch_mb > 0:
+                # get_blob já traz o tamanho, que o prefetch precisa para as faixas
+                blob = client.bucket(bucket).get_blob(caminho)
+                if blob is None:
+                    raise FileNotFoundError(f"Não existe no GCS: {self.uri}")
+                self.prefetch = LeitorPrefetch.de_blob(
+                    blob,
+                    inicio=offset,
+                    tamanho_faixa=self.prefetch_mb * 2**20,
+                    profundidade=self.prefetch_profundidade,
+                    logger=self._logger,
+                    nome=filename or self.nome,
+                )
+                return self.prefetch
+            fh = client.bucket(bucket).blob(caminho).open("rb", chunk_size=self.buffer_leitura)
+        else:
+            caminho = self.uri[len("file://"):] if self.uri.startswith("file://") else self.uri
+            fh = open(caminho, "rb", buffering=self.buffer_leitura)
+
+        if offset:
+            fh.seek(offset)
+        return fh
+
+    # ---------- leitura ----------
+
+    def leitor(
+        self,
+        skip_to: int = 0,
+        marca: Optional[MarcaFrame] = None,
+        logger: Optional[logging.Logger] = None,
+        filename: str = "",
+    ) -> Tuple[_ContadorDescomprimido, int]:
+        """
+        Abre a origem já no frame da marca do checkpoint (se der) e devolve
+        (stream descomprimido frame a frame, linhas completas antes do offset).
+        Serve para o modo paralelo (iter_blocos); registros() usa por baixo.
+        Quem lê o stream até o fim chama conferir_fim() depois, como registros().
+        """
+        offset, linhas_antes = ponto_de_retomada(skip_to, marca)
+        if offset and not self.permite_seek:
+            offset, linhas_antes = 0, 0
+        if offset and logger:
+            logger.info(
+                f"[{filename or self.nome}] ⏩ Seek para o frame em {offset:,} bytes "
+                f"(linha {linhas_antes:,}; faltam {skip_to - linhas_antes:,} para o checkpoint)"
+            )
+
+        self.fechar()
+        self.estatisticas = EstatisticasLeitura(offset)
+        self.prefetch = None
+        self._logger = logger
+        self._fh = self._abrir_comprimido(offset, filename)
+        leitor = LeitorFramesZst(
+            _ContadorComprimido(self._fh, self.estatisticas),
+            zstd.ZstdDecompressor(max_window_size=self.max_window_size),
+            offset_inicial=offset,
+            read_size=self.buffer_leitura,
+        )
+        return _ContadorDescomprimido(leitor, self.estatisticas), linhas_antes
+
+    def registros(
+        self,
+        skip_to: int = 0,
+        logger: Optional[logging.Logger] = None,
+        filename: str = "",
+        prefiltro: Optional[Callable[[bytes], bool]] = None,
+        decoder: Optional[Callable[[bytes], dict]] = None,
+        marca: Optional[MarcaFrame] = None,
+        marcas: Optional[MarcasFrames] = None,
+    ) -> Iterator[Tuple[dict, int]]:
+        """
+        (obj, num_linha) de cada linha JSON, como iter_registros.
+        skip_to / marca: retomada do checkpoint; marcas: recebe o início de cada frame lido.
+        """
+        leitor, linhas_antes = self.leitor(skip_to, marca, logger, filename)
+        yield from iter_registros(
+            leitor,
+            skip_to,
+            logger,
+            filename or self.nome,
+            prefiltro=prefiltro,
+            decoder=decoder,
+            linhas_antes=linhas_antes,
+            marcas=marcas,
+        )
+        self.conferir_fim()
+
+    @property
+    def posicao_comprimida(self) -> int:
+        """Offset no .zst até onde o descompressor já consumiu (para o % de progresso)."""
+        return self.estatisticas.offset_inicial + self.estatisticas.bytes_comprimidos
+
+    # ---------- fim ----------
+
+    def resumo(self) -> str:
+        """Vazão da leitura (e do prefetch, se houver) para o log."""
+        if self.prefetch is None:
+            return self.estatisticas.resumo()
+        return f"{self.estatisticas.resumo()}\n{self.prefetch.resumo()}"
+
+    def conferir_fim(self) -> None:
+        """
+        Depois de ler o stream até o fim: se veio do gsutil e ele falhou, o
+        stream acabou antes da hora (RuntimeError com o stderr do gsutil).
+        """
+        if self._proc is None:
+            return
+        self._proc.stdout.close()
+        code = self._proc.wait()
+        if code != 0:
+            self._stderr.seek(0)
+            erro = self._stderr.read().decode("utf-8", errors="ignore").strip()
+            self.fechar()
+            raise RuntimeError(f"gsutil cat falhou (code={code}) em {self.uri}: {erro}")
+
+    def fechar(self) -> None:
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            if self._proc.stdout:
+                self._proc.stdout.close()
+            self._proc.wait()
+            self._proc = None
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+        if self._fh is not None and not self.eh_stdin:
+            self._fh.close()
+        self._fh = None
+        # self.prefetch fica para o resumo(); a thread dele já foi encerrada pelo close acima
+
+    def __enter__(self) -> "FonteRegistros":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
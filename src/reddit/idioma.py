@@ -0,0 +1,105 @@
+"""
+Etapa de idioma do *_BR: coluna "lang" e, opcionalmente, filtro de português.
+
+Modos (REDDIT_IDIOMA):
+  - off     : como antes, sem coluna nova;
+  - marcar  : acrescenta a coluna "lang" (idioma mais provável do text_clean);
+  - filtrar : acrescenta "lang" e só mantém as linhas em português com
+              probabilidade >= REDDIT_IDIOMA_PROB, para o Tybyria/VADER não
+              gastarem GPU/CPU com texto em outra língua.
+
+A detecção é sempre em lote (detect_many de src/utils/lang/detector.py): no
+modo paralelo cada worker detecta o bloco inteiro; no serial o EscritorIdioma
+junta as linhas BR e detecta de IDIOMA_LOTE em IDIOMA_LOTE.
+
+O conjunto de colunas muda com o modo: não troque REDDIT_IDIOMA no meio de um
+arquivo que vai ser retomado de checkpoint.
+"""
+
+from typing import List, Optional
+
+from src.reddit.config import IDIOMA_LOTE, IDIOMA_PROB_MINIMA
+from src.utils.lang.detector import DetectorIdioma
+
+MODOS = ("off", "marcar", "filtrar")
+
+CAMPO_IDIOMA = "lang"
+
+
+class EtapaIdioma:
+    def __init__(self, modo: str, prob_minima: float = IDIOMA_PROB_MINIMA, detector: Optional[DetectorIdioma] = None):
+        if modo not in MODOS[1:]:
+            raise ValueError(f"Modo de idioma inválido: {modo} (use {', '.join(MODOS)})")
+        self.modo = modo
+        self.prob_minima = prob_minima
+        self.detector = detector if detector is not None else DetectorIdioma()
+        self.descartadas = 0
+
+    def aplicar(self, rows: List[dict]) -> List[dict]:
+        """Preenche "lang" nas linhas (in-place) e, no modo filtrar, devolve só as em português."""
+        if not rows:
+            return rows
+        resultados = self.detector.detect_many([row["text_clean"] for row in rows])
+
+        filtrar = self.modo == "filtrar"
+        saida = []
+        for row, (lang, prob) in zip(rows, resultados):
+            if filtrar and not (lang == "pt" and prob >= self.prob_minima):
+                self.descartadas += 1
+                continue
+            row[CAMPO_IDIOMA] = lang
+            saida.append(row)
+        return saida
+
+
+def _normalizar_modo(modo: str) -> str:
+    return (modo or "off").strip().lower()
+
+
+def etapa_idioma(modo: str, prob_minima: float = IDIOMA_PROB_MINIMA) -> Optional[EtapaIdioma]:
+    """EtapaIdioma do modo pedido, ou None se modo == "off"."""
+    modo = _normalizar_modo(modo)
+    if modo == "off":
+        return None
+    return EtapaIdioma(modo, prob_minima)
+
+
+def campos_saida(campos: List[str], modo: str) -> List[str]:
+    """Colunas do CSV no modo de idioma dado (sem carregar o modelo)."""
+    return list(campos) + ([CAMPO_IDIOMA] if _normalizar_modo(modo) != "off" else [])
+
+
+class EscritorIdioma:
+    """
+    Para os laços seriais (uma linha por vez): junta as linhas BR e passa pela
+    etapa de idioma em lotes antes do writer.writerow. Sem etapa, escreve direto.
+    Chame descarregar() antes de cada checkpoint e no fim do arquivo.
+    """
+
+    def __init__(self, writer, etapa: Optional[EtapaIdioma], lote: int = IDIOMA_LOTE):
+        self.writer = writer
+        self.etapa = etapa
+        self.lote = max(1, lote)
+        self.pendentes: List[dict] = []
+        self.escritas = 0
+
+    def escrever(self, row: dict) -> None:
+        if self.etapa is None:
+            self.writer.writerow(row)
+            self.escritas += 1
+            return
+        self.pendentes.append(row)
+        if len(self.pendentes) >= self.lote:
+            self.descarregar()
+
+    def descarregar(self) -> None:
+        if not self.pendentes:
+            return
+        rows = self.etapa.aplicar(self.pendentes)
+        self.writer.writerows(rows)
+        self.escritas += len(rows)
+        self.pendentes = []
+
+    @property
+    def descartadas(self) -> int:
+        return self.etapa.descartadas if self.etapa is not None else 0
@@ -0,0 +1,137 @@
+"""
+Decoders de JSON para as linhas dos dumps do Reddit.
+
+Backends (o primeiro instalado é usado em "auto"):
+  - simdjson (pysimdjson)
+  - orjson
+  - json (stdlib, sempre disponível)
+
+Todos recebem os bytes crus da linha e devolvem um dict. Se o backend rápido
+recusar a linha (UTF-8 inválido, inteiro gigante, NaN...), cai no json da stdlib
+com decode(errors="ignore"), que é exatamente o comportamento antigo.
+
+Com projecao=True só os campos usados pelo pipeline (CAMPOS_REDDIT) são
+materializados; campos ausentes continuam ausentes (extract_text depende disso).
+"""
+
+import json
+from typing import Callable, Dict, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # opcional
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # opcional
+    simdjson = None
+
+
+CAMPOS_REDDIT = ("id", "author", "created_utc", "subreddit", "body", "title", "selftext")
+
+BACKENDS = ("simdjson", "orjson", "json")
+
+Decoder = Callable[[bytes], dict]
+
+
+def backends_disponiveis() -> list:
+    disponiveis = []
+    if simdjson is not None:
+        disponiveis.append("simdjson")
+    if orjson is not None:
+        disponiveis.append("orjson")
+    disponiveis.append("json")
+    return disponiveis
+
+
+def _loads_stdlib(linha: bytes):
+    return json.loads(linha.decode("utf-8", errors="ignore"))
+
+
+def _projetar(obj, campos: tuple):
+    if not isinstance(obj, dict):
+        return obj
+    return {k: obj[k] for k in campos if k in obj}
+
+
+def _decoder_json(campos: Optional[tuple]) -> Decoder:
+    if campos is None:
+        return _loads_stdlib
+
+    def decode(linha: bytes):
+        return _projetar(_loads_stdlib(linha), campos)
+
+    return decode
+
+
+def _decoder_orjson(campos: Optional[tuple]) -> Decoder:
+    loads = orjson.loads
+
+    def decode(linha: bytes):
+        try:
+            obj = loads(linha)
+        except orjson.JSONDecodeError:
+            obj = _loads_stdlib(linha)
+        return obj if campos is None else _projetar(obj, campos)
+
+    return decode
+
+
+def _decoder_simdjson(campos: Optional[tuple]) -> Decoder:
+    # Parser reaproveita o buffer interno; o documento anterior é invalidado a
+    # cada parse, por isso sempre convertemos para objetos Python antes de sair.
+    parser = simdjson.Parser()
+
+    def decode(linha: bytes):
+        try:
+            doc = parser.parse(linha)
+        except ValueError:
+            obj = _loads_stdlib(linha)
+            return obj if campos is None else _projetar(obj, campos)
+
+        if not isinstance(doc, simdjson.Object):
+            return doc.as_list() if isinstance(doc, simdjson.Array) else doc
+        if campos is None:
+            return doc.as_dict()
+
+        # projeção: só os campos usados viram objetos Python
+        obj: Dict[str, object] = {}
+        for k in campos:
+            if k in doc:
+                v = doc[k]
+                if isinstance(v, simdjson.Object):
+                    v = v.as_dict()
+                elif isinstance(v, simdjson.Array):
+                    v = v.as_list()
+                obj[k] = v
+        return obj
+
+    return decode
+
+
+def obter_decoder(backend: str = "auto", projecao: bool = False, campos: Iterable[str] = CAMPOS_REDDIT) -> Decoder:
+    """
+    Retorna uma função linha_bytes -> dict.
+
+    backend: "auto", "simdjson", "orjson" ou "json".
+    projecao: se True, devolve só os campos em `campos`.
+    """
+    backend = (backend or "auto").strip().lower()
+    campos_proj = tuple(campos) if projecao else None
+
+    if backend == "auto":
+        backend = backends_disponiveis()[0]
+
+    if backend == "simdjson":
+        if simdjson is None:
+            raise ImportError("Backend 'simdjson' pedido, mas pysimdjson não está instalado.")
+        return _decoder_simdjson(campos_proj)
+    if backend == "orjson":
+        if orjson is None:
+            raise ImportError("Backend 'orjson' pedido, mas orjson não está instalado.")
+        return _decoder_orjson(campos_proj)
+    if backend == "json":
+        return _decoder_json(campos_proj)
+
+    raise ValueError(f"Backend JSON desconhecido: {backend} (use auto, {', '.join(BACKENDS)})")
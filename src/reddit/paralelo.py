@@ -0,0 +1,248 @@
+"""
+Processamento multi-core de um único RC_*.zst.
+
+  processo principal (thread do Pool) : descompressão + corte em blocos alinhados por linha
+  workers (multiprocessing.Pool)      : JSON + filtro de subreddit + limpar_texto + CasadorTermos
+                                        (+ idioma em lote, se REDDIT_IDIOMA != off)
+  processo principal                  : escreve os blocos NA ORDEM + checkpoint
+
+Cada worker devolve o pedaço de CSV já formatado com o mesmo csv.DictWriter do
+caminho serial, então o _BR.csv sai byte a byte igual.
+"""
+
+import csv
+import io
+import logging
+import multiprocessing as mp
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+from src.reddit.cache_textos import CacheTextos, resumo_cache
+from src.reddit.config import CACHE_TEXTOS, IDIOMA, IDIOMA_PROB_MINIMA, carregar_config_reddit
+from src.reddit.filters import compilar_casador
+from src.reddit.idioma import campos_saida, etapa_idioma
+from src.reddit.json_decoder import obter_decoder
+from src.reddit.prefiltro import compilar_prefiltro_subreddit
+from src.reddit.registro import CAMPOS_CSV, processar_registros
+from src.reddit.zst_reader import CHUNK_SIZE, decodificar_linha, pular_linhas
+
+# Estado de cada worker (montado uma vez no initializer do Pool)
+_ESTADO: dict = {}
+
+
+def iter_blocos(
+    reader,
+    skip_to: int = 0,
+    tamanho_bloco: int = 8 * 2**20,
+    logger: Optional[logging.Logger] = None,
+    filename: str = "",
+    chunk_size: int = CHUNK_SIZE,
+    linhas_antes: int = 0,
+    marcas=None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Corta o stream descomprimido em blocos de ~tamanho_bloco bytes terminando em "\n".
+    Emite (num_primeira_linha, bloco). A numeração é a mesma de iter_registros.
+
+    As linhas até skip_to são puladas só contando "\n" (sem split/decode).
+    linhas_antes / marcas: como em iter_registros (retomada por frame zstd).
+    """
+    a_pular = max(0, skip_to - linhas_antes)
+    if logger and a_pular:
+        logger.info(f"[{filename}] ⏭️ Pulando {a_pular:,} linhas (só contando quebras)...")
+
+    num_linha = linhas_antes + a_pular + 1  # número da próxima linha a emitir
+    vistas = linhas_antes                   # linhas completas já lidas do stream
+    meio_de_linha = False
+    partes = []
+    tamanho = 0
+
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            break
+
+        if marcas is not None:
+            inicio = getattr(reader, "inicio_de_frame", None)
+            if inicio is not None:
+                marcas.registrar(inicio, vistas, meio_de_linha)
+            meio_de_linha = not chunk.endswith(b"\n")
+            vistas += chunk.count(b"\n")
+
+        if a_pular:
+            chunk, a_pular = pular_linhas(chunk, a_pular)
+            if not chunk:
+                continue
+
+        partes.append(chunk)
+        tamanho += len(chunk)
+        if tamanho < tamanho_bloco:
+            continue
+
+        dados = b"".join(partes)
+        corte = dados.rfind(b"\n") + 1
+        if corte == 0:
+            # linha maior que o bloco: continua acumulando
+            partes = [dados]
+            continue
+
+        bloco = dados[:corte]
+        resto = dados[corte:]
+        partes = [resto] if resto else []
+        tamanho = len(resto)
+
+        yield num_linha, bloco
+
+        antes = num_linha
+        num_linha += bloco.count(b"\n")
+        if logger and num_linha // 1_000_000 > antes // 1_000_000:
+            logger.info(f"[{filename}] 📖 Lendo: {num_linha - 1:,} linhas...")
+
+    if partes:
+        # último bloco (pode terminar sem "\n")
+        yield num_linha, b"".join(partes)
+
+
+def _init_worker(
+    prefiltro_subreddit: bool, json_backend: str, projecao: bool, cache_textos: int, idioma: str, idioma_prob: float
+) -> None:
+    cfg = carregar_config_reddit()
+    subreddits_br = set(cfg.get("subreddits_br") or [])
+    _ESTADO["cfg"] = cfg
+    _ESTADO["subreddits_br"] = subreddits_br
+    _ESTADO["casador"] = compilar_casador(cfg)
+    # cada worker tem o seu cache; os contadores voltam junto com cada bloco
+    _ESTADO["cache"] = CacheTextos(_ESTADO["casador"], cache_textos) if cache_textos > 0 else None
+    _ESTADO["prefiltro"] = compilar_prefiltro_subreddit(subreddits_br) if prefiltro_subreddit else None
+    _ESTADO["decoder"] = obter_decoder(json_backend, projecao=projecao)
+    # o modelo de idioma é carregado uma vez por worker
+    _ESTADO["idioma"] = etapa_idioma(idioma, idioma_prob)
+    _ESTADO["campos"] = campos_saida(CAMPOS_CSV, idioma)
+
+
+def _processar_bloco(item: Tuple[int, bytes]) -> Tuple[str, int, int, Tuple[int, int, int]]:
+    """
+    Worker: processa um bloco e devolve
+    (csv_formatado, encontrados, ultima_linha, (hits, misses, fora_do_idioma) neste bloco).
+    """
+    num_linha, bloco = item
+    cfg = _ESTADO["cfg"]
+    subreddits_br = _ESTADO["subreddits_br"]
+    prefiltro = _ESTADO["prefiltro"]
+    decoder = _ESTADO["decoder"]
+    casador = _ESTADO["casador"]
+    cache = _ESTADO["cache"]
+    idioma = _ESTADO["idioma"]
+    hits0, misses0, _ = cache.contadores() if cache else (0, 0, 0)
+
+    linhas = bloco.split(b"\n")
+    if bloco.endswith(b"\n"):
+        linhas.pop()
+
+    objs = []
+    for linha in linhas:
+        obj = decodificar_linha(linha, prefiltro, decoder)
+        if obj is not None:
+            objs.append(obj)
+
+    # limpeza em lote dos registros BR do bloco
+    rows = processar_registros(objs, cfg, subreddits_br, casador, cache)
+
+    descartadas = 0
+    if idioma is not None:
+        # detecção de idioma do bloco inteiro numa chamada só
+        antes = len(rows)
+        rows = idioma.aplicar(rows)
+        descartadas = antes - len(rows)
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=_ESTADO["campos"])
+    writer.writerows(rows)
+
+    hits, misses, _ = cache.contadores() if cache else (0, 0, 0)
+    return buf.getvalue(), len(rows), num_linha + len(linhas) - 1, (hits - hits0, misses - misses0, descartadas)
+
+
+def processar_stream_paralelo(
+    reader,
+    f_out,
+    workers: int,
+    skip_to: int = 0,
+    logger: Optional[logging.Logger] = None,
+    filename: str = "",
+    prefiltro_subreddit: bool = False,
+    json_backend: str = "auto",
+    projecao: bool = False,
+    tamanho_bloco: int = 8 * 2**20,
+    on_checkpoint: Optional[Callable[[int], None]] = None,
+    checkpoint_every: int = 100_000,
+    linhas_antes: int = 0,
+    marcas=None,
+    cache_textos: int = CACHE_TEXTOS,
+    idioma: str = IDIOMA,
+    idioma_prob: float = IDIOMA_PROB_MINIMA,
+) -> int:
+    """
+    Processa o stream descomprimido `reader` com `workers` processos e escreve
+    as linhas do CSV em `f_out` (já aberto, com header se for o caso), na ordem.
+
+    on_checkpoint(num_linha) é chamado depois que todas as linhas <= num_linha
+    foram escritas em f_out. Retorna o total de registros BR encontrados.
+    linhas_antes / marcas: retomada por frame zstd (ver src/reddit/zst_frames.py).
+    cache_textos: entradas do CacheTextos de cada worker (0 = sem cache).
+    idioma / idioma_prob: etapa de idioma (off | marcar | filtrar; ver src/reddit/idioma.py).
+    O header de f_out tem que usar campos_saida(CAMPOS_CSV, ...) do mesmo modo.
+    """
+    # limita os blocos "em voo" (descomprimidos, esperando worker ou escrita)
+    max_em_voo = workers * 4
+    vagas = threading.Semaphore(max_em_voo)
+    parar = threading.Event()
+
+    def alimentar():
+        for item in iter_blocos(
+            reader, skip_to, tamanho_bloco, logger, filename, linhas_antes=linhas_antes, marcas=marcas
+        ):
+            vagas.acquire()
+            if parar.is_set():
+                return
+            yield item
+
+    encontrados = 0
+    hits = misses = fora_do_idioma = 0
+    proximo_ckpt = (skip_to // checkpoint_every + 1) * checkpoint_every
+
+    pool = mp.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(prefiltro_subreddit, json_backend, projecao, cache_textos, idioma, idioma_prob),
+    )
+    try:
+        for texto_csv, n, ultima_linha, (h, m, d) in pool.imap(_processar_bloco, alimentar()):
+            vagas.release()
+            if texto_csv:
+                f_out.write(texto_csv)
+            encontrados += n
+            hits += h
+            misses += m
+            fora_do_idioma += d
+
+            if on_checkpoint is not None and ultima_linha >= proximo_ckpt:
+                on_checkpoint(ultima_linha)
+                proximo_ckpt = (ultima_linha // checkpoint_every + 1) * checkpoint_every
+                if logger and cache_textos > 0:
+                    logger.info(f"[{filename}] {resumo_cache(hits, misses)}")
+
+        pool.close()
+        if logger and cache_textos > 0:
+            logger.info(f"[{filename}] {resumo_cache(hits, misses)}")
+        if logger and idioma == "filtrar":
+            logger.info(f"[{filename}] 🌐 Idioma: {fora_do_idioma:,} linhas BR fora do português descartadas")
+    finally:
+        # destrava a thread alimentadora (se estiver esperando vaga) antes de derrubar o pool
+        parar.set()
+        for _ in range(max_em_voo):
+            vagas.release()
+        pool.terminate()
+        pool.join()
+
+    return encontrados
@@ -0,0 +1,201 @@
+"""
+Leitura de um blob do GCS com prefetch numa thread.
+
+Com blob.open("rb") o download acontece na mesma thread que descomprime e faz
+o parse: enquanto a rede responde a CPU fica parada, e vice-versa. O
+LeitorPrefetch baixa o blob em faixas de `tamanho_faixa` bytes
+(download_as_bytes(start, end)) numa thread de fundo e deixa até
+`profundidade` faixas prontas numa fila; com profundidade 2 é o "double
+buffer": a próxima faixa chega enquanto a atual é descomprimida.
+
+Erro transitório numa faixa (conexão resetada, 5xx, resposta truncada) faz a
+thread pedir a mesma faixa de novo, com espera crescente, até `tentativas`
+vezes; se ainda assim falhar, o erro é repassado para quem está lendo.
+
+Para testar sem GCS de verdade, o google-cloud-storage respeita
+STORAGE_EMULATOR_HOST (ex.: fake-gcs-server em http://localhost:4443).
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from src.reddit.config import PREFETCH_MB, PREFETCH_PROFUNDIDADE
+
+TENTATIVAS = 5
+ESPERA_INICIAL = 0.5  # segundos; dobra a cada nova tentativa
+
+# (inicio, fim) inclusivo -> bytes, como blob.download_as_bytes(start=, end=)
+BaixarFaixa = Callable[[int, int], bytes]
+
+
+class _Fim:
+    """Marca de fim de arquivo na fila."""
+
+
+class LeitorPrefetch:
+    """
+    File-like de leitura (read) sobre `tamanho` bytes, a partir de `inicio`,
+    baixados por `baixar_faixa` numa thread de fundo.
+    """
+
+    def __init__(
+        self,
+        baixar_faixa: BaixarFaixa,
+        tamanho: int,
+        inicio: int = 0,
+        tamanho_faixa: int = PREFETCH_MB * 2**20,
+        profundidade: int = PREFETCH_PROFUNDIDADE,
+        tentativas: int = TENTATIVAS,
+        espera_inicial: float = ESPERA_INICIAL,
+        logger: Optional[logging.Logger] = None,
+        nome: str = "",
+    ):
+        self.baixar_faixa = baixar_faixa
+        self.tamanho = tamanho
+        self.tamanho_faixa = max(1, tamanho_faixa)
+        self.profundidade = max(1, profundidade)
+        self.tentativas = max(1, tentativas)
+        self.espera_inicial = espera_inicial
+        self.logger = logger
+        self.nome = nome
+
+        # monitoramento
+        self.faixas_baixadas = 0
+        self.novas_tentativas = 0
+        self.esperas_leitor = 0  # vezes em que quem lê achou a fila vazia (rede atrás da CPU)
+
+        self._fila: "queue.Queue" = queue.Queue(maxsize=self.profundidade)
+        self._parar = threading.Event()
+        self._atual = b""
+        self._pos_atual = 0
+        self._acabou = False
+
+        self._thread = threading.Thread(target=self._baixar, args=(inicio,), name=f"prefetch-{nome}", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def de_blob(cls, blob, inicio: int = 0, **kwargs) -> "LeitorPrefetch":
+        """blob: google.cloud.storage.Blob (o tamanho é lido com reload() se ainda não veio)."""
+        if blob.size is None:
+            blob.reload()
+        return cls(
+            lambda i, f: blob.download_as_bytes(start=i, end=f),
+            blob.size,
+            inicio=inicio,
+            nome=kwargs.pop("nome", blob.name),
+            **kwargs,
+        )
+
+    @property
+    def profundidade_fila(self) -> int:
+        """Faixas já baixadas esperando leitura (0 = leitor esperando a rede)."""
+        return self._fila.qsize()
+
+    # ---------- thread de download ----------
+
+    def _colocar(self, item) -> bool:
+        # put com timeout para não ficar preso se o leitor desistir (close)
+        while not self._parar.is_set():
+            try:
+                self._fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _baixar_com_retentativa(self, inicio: int, fim: int) -> bytes:
+        espera = self.espera_inicial
+        tentativa = 1
+        while True:
+            try:
+                dados = self.baixar_faixa(inicio, fim)
+                if len(dados) != fim - inicio + 1:
+                    raise IOError(f"faixa {inicio}-{fim} veio com {len(dados):,} bytes")
+                return dados
+            except Exception as e:
+                if tentativa >= self.tentativas or self._parar.is_set():
+                    raise
+                self.novas_tentativas += 1
+                tentativa += 1
+                if self.logger:
+                    self.logger.warning(
+                        f"[{self.nome}] 🔁 Falha baixando bytes {inicio:,}-{fim:,} ({e}); "
+                        f"tentativa {tentativa}/{self.tentativas} em {espera:.1f}s"
+                    )
+                time.sleep(espera)
+                espera *= 2
+
+    def _baixar(self, inicio: int) -> None:
+        pos = inicio
+        try:
+            while pos < self.tamanho and not self._parar.is_set():
+                fim = min(pos + self.tamanho_faixa, self.tamanho) - 1
+                dados = self._baixar_com_retentativa(pos, fim)
+                self.faixas_baixadas += 1
+                if not self._colocar(dados):
+                    return
+                pos = fim + 1
+            self._colocar(_Fim)
+        except Exception as e:
+            self._colocar(e)
+
+    # ---------- leitura ----------
+
+    def _proxima_faixa(self) -> bool:
+        if self._fila.empty():
+            self.esperas_leitor += 1
+        item = self._fila.get()
+        if item is _Fim:
+            self._acabou = True
+            return False
+        if isinstance(item, Exception):
+            self._acabou = True
+            raise item
+        self._atual = item
+        self._pos_atual = 0
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self._pos_atual >= len(self._atual):
+            if self._acabou or not self._proxima_faixa():
+                return b""
+
+        if size is None or size < 0:
+            partes = [self._atual[self._pos_atual:]]
+            self._pos_atual = len(self._atual)
+            while self._proxima_faixa():
+                partes.append(self._atual)
+                self._pos_atual = len(self._atual)
+            return b"".join(partes)
+
+        # devolve no máximo o que resta da faixa atual (quem lê pede de novo)
+        fim = self._pos_atual + size
+        dados = self._atual[self._pos_atual:fim]
+        self._pos_atual += len(dados)
+        return dados
+
+    def resumo(self) -> str:
+        return (
+            f"📥 Prefetch: {self.faixas_baixadas:,} faixas de {self.tamanho_faixa / 2**20:,.0f} MB | "
+            f"fila {self.profundidade_fila}/{self.profundidade} | leitor esperou a rede {self.esperas_leitor:,}x | "
+            f"{self.novas_tentativas:,} novas tentativas"
+        )
+
+    def close(self) -> None:
+        self._parar.set()
+        # esvazia a fila para destravar um put pendente
+        try:
+            while True:
+                self._fila.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> "LeitorPrefetch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
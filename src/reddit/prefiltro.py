@@ -0,0 +1,105 @@
+"""
+Pré-filtro de subreddit sobre os bytes crus de cada linha do dump.
+
+Só as linhas cujo bytes contêm "subreddit":"<nome>" (nome da lista configurada,
+sem diferenciar maiúsculas) seguem para json.loads. O filtro "de verdade"
+(obj["subreddit"].lower() in subreddits_br) continua rodando depois, então um
+falso positivo só custa um parse; falso negativo não pode acontecer.
+
+Conferência (lê o .zst local inteiro e compara com o caminho de parse completo):
+  python -m src.reddit.prefiltro bases/rede\\ social/reddit/raw/RC_2025-03.zst
+"""
+
+import argparse
+import json
+import re
+import sys
+from typing import Callable, Iterable
+
+import zstandard as zstd
+
+from src.reddit.config import carregar_config_reddit
+from src.reddit.zst_reader import iter_linhas_bytes
+
+
+def compilar_prefiltro_subreddit(subreddits: Iterable[str]) -> Callable[[bytes], bool]:
+    """
+    Retorna uma função linha_bytes -> bool que aceita só linhas com
+    "subreddit":"<um dos nomes>" (regex de bytes pré-compilada, case-insensitive).
+    """
+    nomes = sorted({s.strip().lower() for s in subreddits if s and s.strip()})
+    if not nomes:
+        return lambda linha: False
+
+    alternativas = b"|".join(re.escape(n.encode("utf-8")) for n in nomes)
+    pattern = re.compile(rb'"subreddit"\s*:\s*"(?:' + alternativas + rb')"', re.IGNORECASE)
+    busca = pattern.search
+
+    def prefiltro(linha: bytes) -> bool:
+        return busca(linha) is not None
+
+    return prefiltro
+
+
+def conferir_prefiltro(reader, subreddits: Iterable[str]) -> dict:
+    """
+    Passa por todas as linhas do stream uma vez e, para cada uma, compara:
+      - caminho completo: json.loads + subreddit.lower() in subreddits
+      - caminho rápido: prefiltro(bytes) e, se passar, o mesmo teste acima
+
+    Retorna contagens; "faltando" > 0 indica linha que o prefiltro descartaria
+    mas que o caminho completo gravaria no CSV.
+    """
+    subreddits = {s.lower() for s in subreddits}
+    prefiltro = compilar_prefiltro_subreddit(subreddits)
+
+    stats = {"linhas": 0, "aceitas_completo": 0, "candidatas_prefiltro": 0, "faltando": 0}
+
+    for linha in iter_linhas_bytes(reader):
+        linha = linha.strip()
+        if not linha:
+            continue
+        stats["linhas"] += 1
+
+        passou = prefiltro(linha)
+        if passou:
+            stats["candidatas_prefiltro"] += 1
+
+        try:
+            obj = json.loads(linha.decode("utf-8", errors="ignore"))
+        except Exception:
+            continue
+
+        if (obj.get("subreddit") or "").lower() in subreddits:
+            stats["aceitas_completo"] += 1
+            if not passou:
+                stats["faltando"] += 1
+
+    return stats
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Confere o prefiltro de subreddit contra o parse completo.")
+    ap.add_argument("arquivo_zst", help="Caminho local do RC_*.zst")
+    args = ap.parse_args()
+
+    subreddits = carregar_config_reddit()["subreddits_br"]
+
+    dctx = zstd.ZstdDecompressor(max_window_size=2**31)
+    with open(args.arquivo_zst, "rb") as f, dctx.stream_reader(f) as reader:
+        stats = conferir_prefiltro(reader, subreddits)
+
+    print(f"Linhas: {stats['linhas']:,}")
+    print(f"Aceitas (parse completo): {stats['aceitas_completo']:,}")
+    print(f"Candidatas (prefiltro): {stats['candidatas_prefiltro']:,}")
+
+    if stats["faltando"]:
+        print(f"❌ Prefiltro perderia {stats['faltando']:,} linhas!")
+        return 1
+
+    print("✅ Prefiltro produz as mesmas linhas que o parse completo.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
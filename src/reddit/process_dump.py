@@ -1,49 +1,24 @@
 import csv
 import os
-import json
 import time
 import logging
 import glob
-import zstandard as zstd
 
-from .config import RAW_DIR, PROCESSED_DIR, carregar_config_reddit
+from .config import RAW_DIR, PROCESSED_DIR, PREFILTRO_SUBREDDIT, JSON_BACKEND, JSON_PROJECAO, IDIOMA, carregar_config_reddit
 from src.utils.logger import setup_logger
-from src.reddit.filters import texto_casa_mg_lgbt
+from src.reddit.filters import compilar_casador
+from src.reddit.idioma import EscritorIdioma, campos_saida, etapa_idioma
 from src.utils.limpeza import limpar_texto
+from src.reddit.prefiltro import compilar_prefiltro_subreddit
+from src.reddit.json_decoder import obter_decoder
+from src.reddit.fonte_registros import FonteRegistros
+from src.reddit.zst_frames import MarcasFrames, formatar_checkpoint, ler_checkpoint, ponto_de_retomada
 
 def extract_text(obj):
     if "body" in obj:
         return obj.get("body", "")
     return (obj.get("title", "") or "") + " " + (obj.get("selftext", "") or "")
 
-def iter_zst(filepath, skip_to=0, logger=None, filename=""):
-    dctx = zstd.ZstdDecompressor()
-    with open(filepath, "rb") as f:
-        with dctx.stream_reader(f) as reader:
-            buffer = ""
-            total_lidas = 0
-            while True:
-                chunk = reader.read(2**20)
-                if not chunk: break
-                text = chunk.decode("utf-8", errors="ignore")
-                buffer += text
-                linhas = buffer.split("\n")
-                buffer = linhas[-1]
-                for linha in linhas[:-1]:
-                    total_lidas += 1
-                    if total_lidas <= skip_to:
-                        if total_lidas % 2000000 == 0:
-                            logger.info(f"[{filename}] ⏭️ Pulando: {total_lidas:,} linhas...")
-                        continue
-                    if logger and total_lidas % 1000000 == 0:
-                        logger.info(f"[{filename}] 📖 Lendo: {total_lidas:,} linhas...")
-                    linha = linha.strip()
-                    if not linha: continue
-                    try:
-                        yield json.loads(linha), total_lidas
-                    except:
-                        continue
-
 def main():
     logger = setup_logger("logs/reddit_processamento.log")
     for handler in logger.handlers:
@@ -52,12 +27,21 @@ def main():
     logger.info("==== INÍCIO DA ESTEIRA AUTOMATIZADA COM CHECKPOINT ====")
 
     cfg = carregar_config_reddit()
+
+    casador = compilar_casador(cfg)
     subreddits_br = cfg["subreddits_br"]
+    prefiltro = compilar_prefiltro_subreddit(subreddits_br) if PREFILTRO_SUBREDDIT else None
+    if prefiltro:
+        logger.info("⚡ Pré-filtro de subreddit (bytes) ativado")
+    decoder = obter_decoder(JSON_BACKEND, projecao=JSON_PROJECAO)
+    etapa = etapa_idioma(IDIOMA)
+    if etapa:
+        logger.info(f"🌐 Etapa de idioma: {IDIOMA}")
     
     # Busca todos os arquivos .zst
     arquivos_zst = sorted(glob.glob(os.path.join(RAW_DIR, "*.zst")))
     
-    campos = ["id", "author", "created_utc", "subreddit", "text_original", "text_clean", "has_lgbt_term", "has_hate_term", "has_mg_city"]
+    campos = campos_saida(["id", "author", "created_utc", "subreddit", "text_original", "text_clean", "has_lgbt_term", "has_hate_term", "has_mg_city"], IDIOMA)
 
     for caminho_zst in arquivos_zst:
         nome_f = os.path.basename(caminho_zst)
@@ -66,43 +50,54 @@ def main():
         
         # Determina ponto de partida
         skip_to = 0
+        marca = None
         modo = 'w'
         if os.path.exists(checkpoint_path):
             with open(checkpoint_path, "r") as f:
-                skip_to = int(f.read().strip())
+                skip_to, marca = ler_checkpoint(f.read())
             modo = 'a'
             logger.info(f"[{nome_f}] ⚠️ Retomando da linha {skip_to:,}")
         else:
             logger.info(f"[{nome_f}] 🆕 Iniciando novo arquivo")
 
-        encontrados = 0
+        # com o prefiltro nem toda linha chega aqui, então usa limiar em vez de "% == 0"
+        proximo_ckpt = (skip_to // 100000 + 1) * 100000
+        marcas = MarcasFrames(marca if ponto_de_retomada(skip_to, marca)[0] else None)
         os.makedirs(PROCESSED_DIR, exist_ok=True)
 
-        with open(caminho_csv, modo, newline="", encoding="utf-8") as f_out:
+        # com marca de frame no checkpoint, a fonte faz seek direto pro frame em vez de descomprimir tudo
+        with FonteRegistros(caminho_zst) as fonte, open(caminho_csv, modo, newline="", encoding="utf-8") as f_out:
             writer = csv.DictWriter(f_out, fieldnames=campos)
             if modo == 'w': writer.writeheader()
+            # com a etapa de idioma as linhas BR vão em lote para o detector
+            escritor = EscritorIdioma(writer, etapa)
 
-            for obj, num_linha in iter_zst(caminho_zst, skip_to, logger, nome_f):
+            for obj, num_linha in fonte.registros(skip_to, logger, nome_f, prefiltro, decoder, marca, marcas):
                 subreddit = (obj.get("subreddit") or "").lower()
 
                 if subreddit in subreddits_br:
                     texto_original = extract_text(obj)
                     texto_limpo = limpar_texto(texto_original)
-                    _, m_termos, m_cidades = texto_casa_mg_lgbt(texto_limpo, cfg["termos_lgbt"], cfg["termos_odio"], cfg["cidades_mg"])
+                    _, m_termos, m_cidades = casador.casar(texto_limpo)
 
-                    encontrados += 1
-                    writer.writerow({
+                    escritor.escrever({
                         "id": obj.get("id"), "author": obj.get("author"), "created_utc": obj.get("created_utc"),
                         "subreddit": obj.get("subreddit"), "text_original": texto_original, "text_clean": texto_limpo,
-                        "has_lgbt_term": int(any(t in m_termos for t in cfg["termos_lgbt"])),
-                        "has_hate_term": int(any(t in m_termos for t in cfg["termos_odio"])),
+                        "has_lgbt_term": int(not casador.conjunto_lgbt.isdisjoint(m_termos)),
+                        "has_hate_term": int(not casador.conjunto_odio.isdisjoint(m_termos)),
                         "has_mg_city": int(bool(m_cidades)),
                     })
 
                 # Salva checkpoint a cada 100k linhas
-                if num_linha % 100000 == 0:
+                if num_linha >= proximo_ckpt:
+                    escritor.descarregar()
                     with open(checkpoint_path, "w") as f_cp:
-                        f_cp.write(str(num_linha))
+                        f_cp.write(formatar_checkpoint(num_linha, marcas.melhor_para(num_linha)))
+                    proximo_ckpt = (num_linha // 100000 + 1) * 100000
+
+            escritor.descarregar()
+            encontrados = escritor.escritas
+            logger.info(f"[{nome_f}] {fonte.resumo()}")
 
         # Se terminou o arquivo sem erros, remove o checkpoint
         if os.path.exists(checkpoint_path):
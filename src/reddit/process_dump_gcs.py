@@ -1,15 +1,13 @@
 import csv
 import os
-import json
 import logging
-import io
-import zstandard as zstd
-from google.cloud import storage
 
 from .config import PROCESSED_DIR, carregar_config_reddit
 from src.utils.logger import setup_logger
-from src.reddit.filters import texto_casa_mg_lgbt
+from src.reddit.filters import compilar_casador
 from src.utils.limpeza import limpar_texto
+from src.reddit.fonte_registros import FonteRegistros
+from src.utils.armazenamento_gcs import cliente_gcs, enviar_arquivo
 
 BUCKET_NAME = "lgbtminas-dados"
 RAW_PREFIX = "rede social/raw/"
@@ -49,39 +47,14 @@ def delete_blob_if_exists(client, blob_name):
 
 
 def upload_file(client, local_path, dest_blob):
-    blob = client.bucket(BUCKET_NAME).blob(dest_blob)
-    blob.upload_from_filename(local_path)
+    enviar_arquivo(local_path, f"gs://{BUCKET_NAME}/{dest_blob}", client=client)
 
 
 def iter_zst_from_gcs(client, blob_name, skip_to=0, logger=None, filename=""):
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(blob_name)
-
-    dctx = zstd.ZstdDecompressor()
-    total_lidas = 0
-
-    with blob.open("rb") as stream:
-        with dctx.stream_reader(stream) as reader:
-            text_stream = io.TextIOWrapper(reader, encoding="utf-8", errors="ignore")
-            for linha in text_stream:
-                total_lidas += 1
-
-                if total_lidas <= skip_to:
-                    if logger and total_lidas % 2_000_000 == 0:
-                        logger.info(f"[{filename}] ⏭️ Pulando: {total_lidas:,} linhas...")
-                    continue
-
-                if logger and total_lidas % 1_000_000 == 0:
-                    logger.info(f"[{filename}] 📖 Lendo: {total_lidas:,} linhas...")
-
-                linha = linha.strip()
-                if not linha:
-                    continue
-
-                try:
-                    yield json.loads(linha), total_lidas
-                except Exception:
-                    continue
+    with FonteRegistros(f"gs://{BUCKET_NAME}/{blob_name}", client=client) as fonte:
+        yield from fonte.registros(skip_to, logger, filename)
+        if logger:
+            logger.info(f"[{filename}] {fonte.resumo()}")
 
 
 def main():
@@ -94,8 +67,9 @@ def main():
 
     logger.info("==== INÍCIO DA ESTEIRA (GCS STREAM) COM CHECKPOINT ====")
 
-    client = storage.Client()
+    client = cliente_gcs()
     cfg = carregar_config_reddit()
+    casador = compilar_casador(cfg)
     subreddits_br = cfg["subreddits_br"]
 
     zst_blobs = list_zst_blobs(client)
@@ -141,12 +115,7 @@ def main():
                     texto_original = extract_text(obj)
                     texto_limpo = limpar_texto(texto_original)
 
-                    _, m_termos, m_cidades = texto_casa_mg_lgbt(
-                        texto_limpo,
-                        cfg["termos_lgbt"],
-                        cfg["termos_odio"],
-                        cfg["cidades_mg"]
-                    )
+                    _, m_termos, m_cidades = casador.casar(texto_limpo)
 
                     encontrados += 1
                     writer.writerow({
@@ -156,8 +125,8 @@ def main():
                         "subreddit": obj.get("subreddit"),
                         "text_original": texto_original,
                         "text_clean": texto_limpo,
-                        "has_lgbt_term": int(any(t in m_termos for t in cfg["termos_lgbt"])),
-                        "has_hate_term": int(any(t in m_termos for t in cfg["termos_odio"])),
+                        "has_lgbt_term": int(not casador.conjunto_lgbt.isdisjoint(m_termos)),
+                        "has_hate_term": int(not casador.conjunto_odio.isdisjoint(m_termos)),
                         "has_mg_city": int(bool(m_cidades)),
                     })
 
@@ -1,16 +1,20 @@
 import csv
 import os
-import json
 import logging
-import subprocess
-from typing import Iterator, Tuple, Optional
-
-import zstandard as zstd
+import time
+from typing import Tuple, Optional
 
 from src.utils.logger import setup_logger
-from src.reddit.filters import texto_casa_mg_lgbt
+from src.reddit.filters import compilar_casador
+from src.reddit.idioma import EscritorIdioma, campos_saida, etapa_idioma
 from src.utils.limpeza import limpar_texto
-from src.reddit.config import carregar_config_reddit
+from src.reddit.config import PREFILTRO_SUBREDDIT, JSON_BACKEND, JSON_PROJECAO, IDIOMA, carregar_config_reddit
+from src.reddit.prefiltro import compilar_prefiltro_subreddit
+from src.reddit.json_decoder import obter_decoder
+from src.reddit.fonte_registros import FonteRegistros
+from src.reddit.zst_inspect import IndiceZst, obter_indice
+from src.utils.armazenamento_gcs import cliente_gcs, enviar_arquivo, escrever_texto, ler_texto, listar, remover
+from src.reddit.zst_frames import MarcaFrame, MarcasFrames, formatar_checkpoint, ler_checkpoint, ponto_de_retomada
 
 # ========= CONFIG GCS =========
 BUCKET = "lgbtminas-dados"
@@ -21,9 +25,6 @@ TMP_PREFIX = "rede social/tmp/"
 # Pula estes arquivos (como você pediu)
 SKIP_FILES = {"RC_2025-01.zst", "RC_2025-02.zst"}
 
-# Assinatura do Zstandard (magic bytes)
-ZSTD_MAGIC = bytes([0x28, 0xB5, 0x2F, 0xFD])
-
 # Onde guardar outputs no disco da VM (persistente)
 LOCAL_WORKDIR = os.path.join(os.getcwd(), "_work_reddit")
 LOCAL_OUTDIR = os.path.join(LOCAL_WORKDIR, "processed")
@@ -38,56 +39,33 @@ def extract_text(obj):
     return (obj.get("title", "") or "") + " " + (obj.get("selftext", "") or "")
 
 
-def run_cmd(cmd: list[str]) -> Tuple[int, str, str]:
-    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    out, err = p.communicate()
-    return p.returncode, out, err
-
-
 def gcs_list_raw_zst(logger) -> list[str]:
     # Lista URIs do tipo gs://.../RC_2025-xx.zst
-    code, out, err = run_cmd(["gsutil", "ls", f"gs://{BUCKET}/{RAW_PREFIX}"])
-    if code != 0:
-        raise RuntimeError(f"Falha ao listar raw: {err.strip()}")
-    uris = [line.strip() for line in out.splitlines() if line.strip().endswith(".zst")]
-    return sorted(uris)
-
-
-def gcs_read_first_bytes(uri: str, n: int = 4) -> bytes:
-    # Pega os primeiros n bytes via gsutil cat | head -c n
-    p1 = subprocess.Popen(["gsutil", "cat", uri], stdout=subprocess.PIPE)
-    p2 = subprocess.Popen(["head", "-c", str(n)], stdin=p1.stdout, stdout=subprocess.PIPE)
-    p1.stdout.close()
-    data = p2.communicate()[0] or b""
-    p1.wait()
-    return data
-
-
-def gcs_get_checkpoint(gcs_ckpt_uri: str) -> Optional[int]:
-    # Tenta ler checkpoint do GCS
-    code, out, _ = run_cmd(["gsutil", "cat", gcs_ckpt_uri])
-    if code != 0:
-        return None
-    txt = (out or "").strip().replace(",", "")
-    if not txt:
-        return None
-    try:
-        return int(txt)
-    except ValueError:
-        return None
+    return listar(f"gs://{BUCKET}/{RAW_PREFIX}", sufixo=".zst")
+
 
+def gcs_get_checkpoint(gcs_ckpt_uri: str) -> Tuple[int, Optional[MarcaFrame]]:
+    # Tenta ler checkpoint do GCS (linha + marca do frame zstd, se houver)
+    texto = ler_texto(gcs_ckpt_uri)
+    if texto is None:
+        return 0, None
+    return ler_checkpoint(texto)
 
-def gcs_put_checkpoint(gcs_ckpt_uri: str, value: int, logger):
-    # Escreve checkpoint local e sobe
+
+def gcs_put_checkpoint(gcs_ckpt_uri: str, value: int, logger, marca: Optional[MarcaFrame] = None):
+    # Escreve checkpoint local e sobe (uma requisição, no cliente já autenticado)
+    texto = formatar_checkpoint(value, marca)
     local_ckpt = os.path.join(LOCAL_CKPTDIR, os.path.basename(gcs_ckpt_uri))
     with open(local_ckpt, "w", encoding="utf-8") as f:
-        f.write(str(value))
-    # upload silencioso
-    code, _, err = run_cmd(["gsutil", "-q", "cp", local_ckpt, gcs_ckpt_uri])
-    if code == 0:
-        logger.info(f"☁️ Checkpoint enviado ao GCS: {gcs_ckpt_uri.replace(f'gs://{BUCKET}/','')} = {value:,}")
-    else:
-        logger.warning(f"⚠️ Falha ao subir checkpoint: {err.strip()}")
+        f.write(texto)
+    t0 = time.perf_counter()
+    try:
+        escrever_texto(gcs_ckpt_uri, texto)
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao subir checkpoint: {e}")
+        return
+    ms = (time.perf_counter() - t0) * 1000
+    logger.info(f"☁️ Checkpoint enviado ao GCS: {gcs_ckpt_uri.replace(f'gs://{BUCKET}/','')} = {value:,} ({ms:,.0f} ms)")
 
 
 def gcs_remove_checkpoint(gcs_ckpt_uri: str, logger):
@@ -98,57 +76,11 @@ def gcs_remove_checkpoint(gcs_ckpt_uri: str, logger):
             os.remove(local_ckpt)
     except:
         pass
-    run_cmd(["gsutil", "rm", "-f", gcs_ckpt_uri])
+    remover(gcs_ckpt_uri)
     logger.info("🧹 Checkpoint removido (local e GCS).")
 
 
-def iter_zst_from_gsutil(uri: str, skip_to: int, logger, filename: str) -> Iterator[Tuple[dict, int]]:
-    """
-    Stream:
-      gsutil cat gs://.../file.zst  -> stdout (bytes)
-      zstd stream_reader            -> bytes decomprimidos (texto jsonl)
-    """
-    proc = subprocess.Popen(["gsutil", "cat", uri], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    assert proc.stdout is not None
-
-    dctx = zstd.ZstdDecompressor()
-    with dctx.stream_reader(proc.stdout) as reader:
-        buffer = ""
-        total = 0
-        while True:
-            chunk = reader.read(2**20)  # 1MB
-            if not chunk:
-                break
-            text = chunk.decode("utf-8", errors="ignore")
-            buffer += text
-            linhas = buffer.split("\n")
-            buffer = linhas[-1]
-
-            for linha in linhas[:-1]:
-                total += 1
-                if total <= skip_to:
-                    if total % 2_000_000 == 0:
-                        logger.info(f"[{filename}] ⏭️ Pulando: {total:,} linhas...")
-                    continue
-
-                if total % 1_000_000 == 0:
-                    logger.info(f"[{filename}] 📖 Lendo: {total:,} linhas...")
-
-                linha = linha.strip()
-                if not linha:
-                    continue
-                try:
-                    yield json.loads(linha), total
-                except:
-                    continue
-
-    # consume stderr to avoid zombies
-    proc.stdout.close()
-    _ = proc.stderr.read() if proc.stderr else b""
-    proc.wait()
-
-
-def process_one(uri: str, logger):
+def process_one(uri: str, logger, indice: Optional[IndiceZst] = None):
     nome_f = os.path.basename(uri)
 
     gcs_ckpt_uri = f"gs://{BUCKET}/{TMP_PREFIX}{nome_f.replace('.zst','')}_checkpoint.txt"
@@ -157,7 +89,7 @@ def process_one(uri: str, logger):
     local_csv = os.path.join(LOCAL_OUTDIR, nome_f.replace(".zst", "_BR.csv"))
 
     # carrega checkpoint (GCS tem prioridade)
-    skip_to = gcs_get_checkpoint(gcs_ckpt_uri) or 0
+    skip_to, marca = gcs_get_checkpoint(gcs_ckpt_uri)
 
     modo = "a" if (skip_to > 0 and os.path.exists(local_csv)) else "w"
     if skip_to > 0:
@@ -166,60 +98,72 @@ def process_one(uri: str, logger):
         logger.info(f"[{nome_f}] 🆕 Iniciando novo arquivo")
 
     cfg = carregar_config_reddit()
-    subreddits_br = set(cfg["subreddits_br"])
 
-    campos = [
+    casador = compilar_casador(cfg)
+    subreddits_br = set(cfg["subreddits_br"])
+    prefiltro = compilar_prefiltro_subreddit(subreddits_br) if PREFILTRO_SUBREDDIT else None
+    if prefiltro:
+        logger.info(f"[{nome_f}] ⚡ Pré-filtro de subreddit (bytes) ativado")
+    decoder = obter_decoder(JSON_BACKEND, projecao=JSON_PROJECAO)
+    etapa = etapa_idioma(IDIOMA)
+    if etapa:
+        logger.info(f"[{nome_f}] 🌐 Etapa de idioma: {IDIOMA}")
+
+    campos = campos_saida([
         "id", "author", "created_utc", "subreddit",
         "text_original", "text_clean",
         "has_lgbt_term", "has_hate_term", "has_mg_city"
-    ]
+    ], IDIOMA)
 
-    encontrados = 0
+    # com o prefiltro nem toda linha chega aqui, então usa limiar em vez de "% == 0"
+    proximo_ckpt = (skip_to // 100_000 + 1) * 100_000
+    marcas = MarcasFrames(marca if ponto_de_retomada(skip_to, marca)[0] else None)
 
-    with open(local_csv, modo, newline="", encoding="utf-8") as f_out:
+    # stream: faixas do blob com prefetch -> LeitorFramesZst (com marca de frame, o download já começa no frame)
+    with FonteRegistros(uri, client=cliente_gcs()) as fonte, open(local_csv, modo, newline="", encoding="utf-8") as f_out:
         writer = csv.DictWriter(f_out, fieldnames=campos)
         if modo == "w":
             writer.writeheader()
+        # com a etapa de idioma as linhas BR vão em lote para o detector
+        escritor = EscritorIdioma(writer, etapa)
 
-        for obj, num_linha in iter_zst_from_gsutil(uri, skip_to, logger, nome_f):
+        for obj, num_linha in fonte.registros(skip_to, logger, nome_f, prefiltro, decoder, marca, marcas):
             subreddit = (obj.get("subreddit") or "").lower()
 
             if subreddit in subreddits_br:
                 texto_original = extract_text(obj)
                 texto_limpo = limpar_texto(texto_original)
 
-                _, m_termos, m_cidades = texto_casa_mg_lgbt(
-                    texto_limpo,
-                    cfg["termos_lgbt"],
-                    cfg["termos_odio"],
-                    cfg["cidades_mg"],
-                )
+                _, m_termos, m_cidades = casador.casar(texto_limpo)
 
-                encontrados += 1
-                writer.writerow({
+                escritor.escrever({
                     "id": obj.get("id"),
                     "author": obj.get("author"),
                     "created_utc": obj.get("created_utc"),
                     "subreddit": obj.get("subreddit"),
                     "text_original": texto_original,
                     "text_clean": texto_limpo,
-                    "has_lgbt_term": int(any(t in m_termos for t in cfg["termos_lgbt"])),
-                    "has_hate_term": int(any(t in m_termos for t in cfg["termos_odio"])),
+                    "has_lgbt_term": int(not casador.conjunto_lgbt.isdisjoint(m_termos)),
+                    "has_hate_term": int(not casador.conjunto_odio.isdisjoint(m_termos)),
                     "has_mg_city": int(bool(m_cidades)),
                 })
 
             # checkpoint a cada 100k linhas
-            if num_linha % 100_000 == 0:
-                gcs_put_checkpoint(gcs_ckpt_uri, num_linha, logger)
+            if num_linha >= proximo_ckpt:
+                escritor.descarregar()
+                gcs_put_checkpoint(gcs_ckpt_uri, num_linha, logger, marcas.melhor_para(num_linha))
+                if indice is not None:
+                    logger.info(f"[{nome_f}] {indice.descrever_progresso(fonte.posicao_comprimida, num_linha)}")
+                proximo_ckpt = (num_linha // 100_000 + 1) * 100_000
+
+        escritor.descarregar()
+        encontrados = escritor.escritas
+        logger.info(f"[{nome_f}] {fonte.resumo()}")
 
     logger.info(f"[{nome_f}] ✅ Processamento local concluído. Total BR: {encontrados:,}")
 
-    # upload final via gsutil (mais simples e está funcionando no seu projeto)
-    cmd = ["gsutil", "-q", "cp", local_csv, gcs_out_uri]
-    logger.info(f"☁️ Upload via gsutil: {' '.join(cmd)}")
-    code, _, err = run_cmd(cmd)
-    if code != 0:
-        raise RuntimeError(f"Falha no upload do CSV: {err.strip()}")
+    # upload final: resumível (composto em partes paralelas se for grande), com conferência do crc32c
+    enviar_arquivo(local_csv, gcs_out_uri, logger)
 
     gcs_remove_checkpoint(gcs_ckpt_uri, logger)
     logger.info(f"[{nome_f}] ✅ CSV no GCS: {gcs_out_uri.replace(f'gs://{BUCKET}/','')}")
@@ -258,14 +202,19 @@ def main():
     for uri in candidatos:
         nome = os.path.basename(uri)
 
-        # healthcheck do zst
-        head4 = gcs_read_first_bytes(uri, 4)
-        if head4 != ZSTD_MAGIC:
-            logger.warning(f"[{nome}] ❌ Parece corrompido (magic={head4.hex(' ')}). Pulando.")
+        # healthcheck do zst: magic + frames + tamanho estimado, em poucas leituras por faixa
+        # (fica em <arquivo>.zst.idx.json ao lado do .zst para as próximas rodadas)
+        try:
+            indice = obter_indice(uri, logger=logger)
+        except Exception as e:
+            logger.warning(f"[{nome}] ❌ Não consegui inspecionar o .zst ({e}). Pulando.")
+            continue
+        if not indice.magic_ok:
+            logger.warning(f"[{nome}] ❌ Parece corrompido (magic={indice.magic}). Pulando.")
             continue
 
         try:
-            process_one(uri, logger)
+            process_one(uri, logger, indice)
         except Exception as e:
             logger.exception(f"[{nome}] 💥 Erro no processamento: {e}")
             # não mata a esteira inteira; segue pro próximo
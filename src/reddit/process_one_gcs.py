@@ -2,105 +2,193 @@ import csv
 import json
 import os
 import logging
-import subprocess
 import tempfile
-from typing import Iterator, Tuple, Optional
+from typing import Tuple, Optional
 
 import zstandard as zstd
 from google.cloud import storage
 
+from src.utils.armazenamento_gcs import LIMITE_COMPONENTES, cliente_gcs, enviar_arquivo
 from src.utils.logger import setup_logger
-from src.reddit.config import carregar_config_reddit
-from src.reddit.filters import texto_casa_mg_lgbt
-from src.utils.limpeza import limpar_texto
-
-ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # 28 b5 2f fd
-
-
-def extract_text(obj: dict) -> str:
-    if "body" in obj:
-        return obj.get("body", "") or ""
-    title = obj.get("title", "") or ""
-    selftext = obj.get("selftext", "") or ""
-    return f"{title} {selftext}".strip()
-
-
-def _read_checkpoint_gcs(client: storage.Client, bucket: str, checkpoint_blob_path: str) -> int:
+from src.reddit.config import (
+    PREFILTRO_SUBREDDIT,
+    JSON_BACKEND,
+    JSON_PROJECAO,
+    WORKERS,
+    BLOCO_MB,
+    FORMATO_SAIDA,
+    CACHE_TEXTOS,
+    IDIOMA,
+    carregar_config_reddit,
+)
+from src.reddit.cache_textos import CacheTextos, resumo_cache
+from src.reddit.filters import compilar_casador
+from src.reddit.idioma import EscritorIdioma, campos_saida, etapa_idioma
+from src.reddit.registro import CAMPOS_CSV, processar_registro
+from src.reddit.paralelo import processar_stream_paralelo
+from src.reddit.saida_parquet import csv_para_parquet
+from src.reddit.fonte_registros import FonteRegistros
+from src.reddit.zst_inspect import obter_indice
+from src.reddit.prefiltro import compilar_prefiltro_subreddit
+from src.reddit.json_decoder import obter_decoder
+from src.reddit.checkpoint_saida import (
+    EstadoSaida,
+    ler_saida_checkpoint,
+    saida_confere,
+    saida_para_checkpoint,
+    sincronizar_saida,
+    truncar_saida,
+)
+from src.reddit.zst_frames import (
+    MarcaFrame,
+    MarcasFrames,
+    formatar_checkpoint,
+    ler_checkpoint,
+    ponto_de_retomada,
+)
+
+def _read_checkpoint_gcs(
+    client: storage.Client, bucket: str, checkpoint_blob_path: str
+) -> Tuple[int, Optional[MarcaFrame], Optional[EstadoSaida]]:
     b = client.bucket(bucket).blob(checkpoint_blob_path)
     if not b.exists(client):
-        return 0
-    raw = b.download_as_text().strip()
-    try:
-        return int(raw.replace(",", ""))
-    except Exception:
-        return 0
+        return 0, None, None
+    # aceita o formato antigo (só o número) e o novo (JSON com a marca do frame e o estado do CSV)
+    texto = b.download_as_text()
+    linha, marca = ler_checkpoint(texto)
+    return linha, marca, ler_saida_checkpoint(texto)
 
 
 def _write_checkpoint_gcs(
-    client: storage.Client, bucket: str, checkpoint_blob_path: str, value: int, logger: logging.Logger
+    client: storage.Client,
+    bucket: str,
+    checkpoint_blob_path: str,
+    value: int,
+    logger: logging.Logger,
+    marca: Optional[MarcaFrame] = None,
+    saida: Optional[EstadoSaida] = None,
 ) -> None:
+    # upload de objeto no GCS é atômico: ou fica o checkpoint antigo, ou o novo inteiro
     b = client.bucket(bucket).blob(checkpoint_blob_path)
-    b.upload_from_string(str(value), content_type="text/plain")
-    logger.info(f"☁️ Checkpoint enviado ao GCS: {checkpoint_blob_path} = {value:,}")
-
-
-def _delete_blob_if_exists(client: storage.Client, bucket: str, blob_path: str, logger: logging.Logger) -> None:
-    b = client.bucket(bucket).blob(blob_path)
-    if b.exists(client):
-        b.delete()
-        logger.info(f"🧹 Removido no GCS: {blob_path}")
-
-
-def _is_valid_zst_magic(client: storage.Client, bucket: str, blob_path: str) -> bool:
-    b = client.bucket(bucket).blob(blob_path)
-    # baixa só os 4 primeiros bytes
-    head = b.download_as_bytes(start=0, end=3)
-    return head == ZSTD_MAGIC
-
-
-def iter_zst_stream(reader, skip_to: int, logger: logging.Logger, filename: str) -> Iterator[Tuple[dict, int]]:
+    b.upload_from_string(
+        formatar_checkpoint(value, marca, saida_para_checkpoint(saida)), content_type="application/json"
+    )
+    frame = f" (frame @ {marca.offset:,} bytes)" if marca else ""
+    csv_bytes = f" | CSV {saida.tamanho:,} bytes" if saida else ""
+    logger.info(f"☁️ Checkpoint enviado ao GCS: {checkpoint_blob_path} = {value:,}{frame}{csv_bytes}")
+
+
+def _upload_parcial_gcs(
+    client: storage.Client,
+    bucket: str,
+    parcial_blob_path: str,
+    local_path: str,
+    tamanho: int,
+    logger: logging.Logger,
+    tamanho_anterior: Optional[int] = None,
+) -> None:
+    """
+    Deixa em parcial_blob_path os primeiros `tamanho` bytes do CSV local.
+
+    tamanho_anterior: tamanho do CSV no último checkpoint gravado (None se
+    ainda não há). Só quando o parcial no GCS tem exatamente esse tamanho ele
+    é o prefixo que o checkpoint garante; aí sobe só o trecho novo e
+    concatena com compose. Qualquer outro tamanho (ex.: caiu entre o compose
+    e o checkpoint, ou no meio de um upload) quer dizer que o conteúdo do
+    parcial não é garantido, e o arquivo inteiro sobe de novo.
+
+    Cada compose soma um componente ao parcial e o GCS recusa objetos com
+    mais de LIMITE_COMPONENTES: ao chegar nele, o prefixo inteiro sobe de novo
+    como objeto simples (component_count volta a zerar).
     """
-    Lê um .zst JSONL em stream, emitindo (obj, num_linha).
-    skip_to: pula as primeiras N linhas (checkpoint).
+    b = client.bucket(bucket)
+    atual = b.get_blob(parcial_blob_path)
+    tamanho_gcs = atual.size if atual is not None else None
+    confere = tamanho_gcs is not None and tamanho_gcs == tamanho_anterior and tamanho_anterior <= tamanho
+    if confere and tamanho_anterior == tamanho:
+        return
+    componentes = (atual.component_count or 1) if atual is not None else 0
+    cheio = confere and componentes >= LIMITE_COMPONENTES
+    inicio = tamanho_anterior if confere and not cheio else 0
+
+    with open(local_path, "rb") as f:
+        f.seek(inicio)
+        if inicio == 0:
+            b.blob(parcial_blob_path).upload_from_file(f, size=tamanho, rewind=False)
+        else:
+            trecho = b.blob(f"{parcial_blob_path}.trecho")
+            trecho.upload_from_file(f, size=tamanho - inicio, rewind=False)
+            b.blob(parcial_blob_path).compose([atual, trecho], client=client)
+            trecho.delete()
+
+    if tamanho_gcs is not None and not confere:
+        anterior = f"{tamanho_anterior:,} bytes" if tamanho_anterior is not None else "nenhum"
+        logger.warning(
+            f"☁️ CSV parcial no GCS com {tamanho_gcs:,} bytes, checkpoint anterior: {anterior}; reenviando inteiro"
+        )
+    elif cheio:
+        logger.info(f"☁️ CSV parcial no GCS com {componentes:,} componentes: reenviado inteiro como objeto simples")
+    logger.info(f"☁️ CSV parcial no GCS: {parcial_blob_path} = {tamanho:,} bytes (+{tamanho - inicio:,})")
+
+
+def _restaurar_parcial_gcs(
+    client: storage.Client,
+    bucket: str,
+    parcial_blob_path: str,
+    local_path: str,
+    saida: EstadoSaida,
+    logger: logging.Logger,
+) -> bool:
     """
-    # Permite janela maior pra alguns .zst (evita "Frame requires too much memory for decoding")
-    zstd_max_window = int(os.getenv("ZSTD_MAX_WINDOW", str(2**31)))  # ~2GB default
-    dctx = zstd.ZstdDecompressor(max_window_size=zstd_max_window)
+    Baixa do GCS os primeiros saida.tamanho bytes do CSV parcial para local_path.
+    Retorna True se baixou e a cauda confere com o checkpoint.
+    """
+    b = client.bucket(bucket).get_blob(parcial_blob_path)
+    if b is None or b.size < saida.tamanho:
+        return False
+    if saida.tamanho == 0:
+        open(local_path, "wb").close()
+    else:
+        b.download_to_filename(local_path, start=0, end=saida.tamanho - 1)
+    logger.info(f"⬇️ CSV parcial restaurado do GCS: {parcial_blob_path} ({saida.tamanho:,} bytes)")
+    return saida_confere(local_path, saida)
 
-    with dctx.stream_reader(reader) as zr:
-        buffer = ""
-        total_lidas = 0
 
-        while True:
-            chunk = zr.read(2**20)  # 1MB
-            if not chunk:
-                break
+def caminhos_tmp_gcs(checkpoint_prefix: str, filename: str) -> Tuple[str, str, str]:
+    """(checkpoint, CSV parcial, marca de concluído) de um .zst debaixo de checkpoint_prefix."""
+    return (
+        f"{checkpoint_prefix}{filename.replace('.zst', '_checkpoint.txt')}",
+        f"{checkpoint_prefix}{filename.replace('.zst', '_BR.parcial.csv')}",
+        f"{checkpoint_prefix}{filename.replace('.zst', '_concluido.json')}",
+    )
 
-            text = chunk.decode("utf-8", errors="ignore")
-            buffer += text
-            linhas = buffer.split("\n")
-            buffer = linhas[-1]
 
-            for linha in linhas[:-1]:
-                total_lidas += 1
+def _write_conclusao_gcs(
+    client: storage.Client, bucket: str, conclusao_blob_path: str, out_blob_path: str, tamanho: int, logger: logging.Logger
+) -> None:
+    # gravada só depois do upload da saída: é ela que diz que o mês terminou (e com qual arquivo)
+    texto = json.dumps({"saida": out_blob_path, "bytes": tamanho})
+    client.bucket(bucket).blob(conclusao_blob_path).upload_from_string(texto, content_type="application/json")
+    logger.info(f"☁️ Marca de concluído enviada ao GCS: {conclusao_blob_path} -> {out_blob_path} ({tamanho:,} bytes)")
 
-                if total_lidas <= skip_to:
-                    if total_lidas % 2_000_000 == 0:
-                        logger.info(f"[{filename}] ⏭️ Pulando: {total_lidas:,} linhas...")
-                    continue
 
-                if total_lidas % 1_000_000 == 0:
-                    logger.info(f"[{filename}] 📖 Lendo: {total_lidas:,} linhas...")
+def ler_conclusao_gcs(client: storage.Client, bucket: str, conclusao_blob_path: str) -> Optional[dict]:
+    """{"saida": blob da saída, "bytes": tamanho} da marca de concluído; None se não existe ou não dá para ler."""
+    b = client.bucket(bucket).blob(conclusao_blob_path)
+    if not b.exists(client):
+        return None
+    try:
+        info = json.loads(b.download_as_text())
+        return {"saida": str(info["saida"]), "bytes": int(info["bytes"])}
+    except (ValueError, KeyError, TypeError):
+        return None
 
-                linha = linha.strip()
-                if not linha:
-                    continue
 
-                try:
-                    yield json.loads(linha), total_lidas
-                except Exception:
-                    # linha ruim / incompleta / json quebrado -> ignora
-                    continue
+def _delete_blob_if_exists(client: storage.Client, bucket: str, blob_path: str, logger: logging.Logger) -> None:
+    b = client.bucket(bucket).blob(blob_path)
+    if b.exists(client):
+        b.delete()
+        logger.info(f"🧹 Removido no GCS: {blob_path}")
 
 
 def process_file_gcs(
@@ -110,107 +198,188 @@ def process_file_gcs(
     checkpoint_prefix: str,
     logger: Optional[logging.Logger] = None,
     checkpoint_every: int = 100_000,
+    prefiltro_subreddit: bool = PREFILTRO_SUBREDDIT,
+    json_backend: str = JSON_BACKEND,
+    workers: int = WORKERS,
+    formato_saida: str = FORMATO_SAIDA,
+    cache_textos: int = CACHE_TEXTOS,
+    idioma: str = IDIOMA,
 ) -> bool:
     """
     Processa 1 arquivo .zst (JSONL) do GCS:
       - lê em stream
       - filtra por subreddits_br
       - escreve CSV local /tmp
-      - faz upload para processed/ via gsutil
-      - checkpoint em tmp/ no GCS pra retomar
+      - faz upload para processed/ (resumível; composto em partes paralelas se for grande)
+      - checkpoint em tmp/ no GCS pra retomar (junto com o CSV parcial, pareado pelo tamanho)
+      - marca de concluído em tmp/ (<mês>_concluido.json) depois do upload da saída
+      - prefiltro_subreddit: descarta linhas de outros subreddits antes do json.loads
+      - json_backend: auto | simdjson | orjson | json
+      - workers > 1: parse/filtro/limpeza em N processos (mesmo CSV do serial)
+      - formato_saida: csv | parquet (o parquet é gerado do CSV local no fim)
+      - cache_textos: entradas do cache de textos repetidos (limpeza + termos); 0 = sem cache
+      - idioma: off | marcar (coluna lang) | filtrar (só português); ver src/reddit/idioma.py
 
     Retorna True se finalizou e subiu o CSV; False se falhou (ou arquivo inválido).
     """
     logger = logger or setup_logger("logs/process_one_gcs.log")
 
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    raw_blob = bucket.blob(raw_blob_path)
+    client = cliente_gcs()
 
     filename = os.path.basename(raw_blob_path)
-    out_blob_path = f"{out_prefix_processed}{filename.replace('.zst', '_BR.csv')}"
-    checkpoint_blob_path = f"{checkpoint_prefix}{filename.replace('.zst', '_checkpoint.txt')}"
+    ext_saida = ".parquet" if formato_saida == "parquet" else ".csv"
+    out_blob_path = f"{out_prefix_processed}{filename.replace('.zst', '_BR' + ext_saida)}"
+    checkpoint_blob_path, parcial_blob_path, conclusao_blob_path = caminhos_tmp_gcs(checkpoint_prefix, filename)
 
-    if not raw_blob.exists(client):
+    # a saída em processed/ vai ser refeita: o mês deixa de contar como concluído até o novo upload
+    _delete_blob_if_exists(client, bucket_name, conclusao_blob_path, logger)
+
+    # valida magic header (pula corrompido tipo 01 que começa com 00 00 00...) e já indexa os
+    # frames / estima o tamanho, em poucas leituras por faixa (sidecar <arquivo>.zst.idx.json)
+    try:
+        indice = obter_indice(f"gs://{bucket_name}/{raw_blob_path}", client=client, logger=logger)
+    except FileNotFoundError:
         logger.error(f"❌ Não existe no GCS: gs://{bucket_name}/{raw_blob_path}")
         return False
-
-    # valida magic header (pula corrompido tipo 01 que começa com 00 00 00...)
-    if not _is_valid_zst_magic(client, bucket_name, raw_blob_path):
-        logger.error(f"❌ Arquivo não parece .zst válido (magic header inválido): {filename}")
+    if not indice.magic_ok:
+        logger.error(f"❌ Arquivo não parece .zst válido (magic {indice.magic}): {filename}")
         return False
 
     cfg = carregar_config_reddit()
     subreddits_br = set((cfg.get("subreddits_br") or []))
-
-    skip_to = _read_checkpoint_gcs(client, bucket_name, checkpoint_blob_path)
+    casador = compilar_casador(cfg)
+    cache = CacheTextos(casador, cache_textos) if cache_textos > 0 else None
+    prefiltro = compilar_prefiltro_subreddit(subreddits_br) if prefiltro_subreddit else None
+    if prefiltro:
+        logger.info(f"[{filename}] ⚡ Pré-filtro de subreddit (bytes) ativado")
+    decoder = obter_decoder(json_backend, projecao=JSON_PROJECAO)
+    # no paralelo cada worker monta a sua etapa; aqui só o serial usa a instância
+    etapa = etapa_idioma(idioma) if workers <= 1 else None
+    campos = campos_saida(CAMPOS_CSV, idioma)
+    if idioma != "off":
+        logger.info(f"[{filename}] 🌐 Etapa de idioma: {idioma}")
+
+    skip_to, marca, saida = _read_checkpoint_gcs(client, bucket_name, checkpoint_blob_path)
     if skip_to:
         logger.info(f"[{filename}] ⚠️ Retomando da linha {skip_to:,}")
     else:
         logger.info(f"[{filename}] 🆕 Iniciando do zero")
 
-    campos = [
-        "id",
-        "author",
-        "created_utc",
-        "subreddit",
-        "text_original",
-        "text_clean",
-        "has_lgbt_term",
-        "has_hate_term",
-        "has_mg_city",
-    ]
-
     encontrados = 0
 
-    # grava local em /tmp e depois sobe via gsutil (mais estável que writer direto no GCS)
+    # grava local em /tmp e depois sobe o arquivo pronto (mais estável que writer direto no GCS)
     tmp_out = os.path.join(tempfile.gettempdir(), filename.replace(".zst", "_BR.csv"))
 
-    # se existe checkpoint, mas o tmp local não existe, a gente recomeça do zero
-    # (porque não tem como continuar no mesmo CSV local)
+    if skip_to > 0 and saida is not None:
+        # o CSV local pode estar adiantado (escrito depois do checkpoint) ou ter sumido:
+        # usa o local se a cauda confere, senão o parcial do GCS; e trunca no tamanho do checkpoint
+        if saida_confere(tmp_out, saida):
+            logger.info(f"[{filename}] 🔎 CSV local confere com o checkpoint ({saida.tamanho:,} bytes)")
+        elif not _restaurar_parcial_gcs(client, bucket_name, parcial_blob_path, tmp_out, saida, logger):
+            logger.warning(f"[{filename}] ⚠️ CSV parcial não confere com o checkpoint ({skip_to:,}). Recomeçando do zero.")
+            skip_to = 0
+            marca = None
+        if skip_to > 0:
+            truncar_saida(tmp_out, saida.tamanho)
+
+    # checkpoint antigo (sem estado do CSV) e sem o tmp local: não tem como continuar, recomeça do zero
     if skip_to > 0 and not os.path.exists(tmp_out):
         logger.warning(f"[{filename}] ⚠️ Há checkpoint ({skip_to:,}), mas não achei {tmp_out}. Recomeçando do zero.")
         skip_to = 0
+        marca = None
 
     mode = "a" if (skip_to > 0 and os.path.exists(tmp_out)) else "w"
 
+    # tamanho do CSV no último checkpoint: o parcial no GCS só é estendido se tiver exatamente esse tamanho
+    tamanho_checkpoint = saida.tamanho if (mode == "a" and saida is not None) else None
+
+    # com o prefiltro nem toda linha chega aqui, então usa limiar em vez de "% == 0"
+    proximo_ckpt = (skip_to // checkpoint_every + 1) * checkpoint_every
+
+    # início de cada frame zstd lido -> vai junto no checkpoint para a retomada fazer seek
+    offset_retomada, _ = ponto_de_retomada(skip_to, marca)
+    marcas = MarcasFrames(marca if offset_retomada else None)
+
     try:
-        with raw_blob.open("rb") as gcs_in, open(tmp_out, mode, newline="", encoding="utf-8") as f_out:
+        fonte = FonteRegistros(f"gs://{bucket_name}/{raw_blob_path}", client=client)
+        with fonte, open(tmp_out, mode, newline="", encoding="utf-8") as f_out:
             writer = csv.DictWriter(f_out, fieldnames=campos)
+            escritor = EscritorIdioma(writer, etapa)
             if mode == "w":
                 writer.writeheader()
 
-            for obj, num_linha in iter_zst_stream(gcs_in, skip_to=skip_to, logger=logger, filename=filename):
-                subreddit = (obj.get("subreddit") or "").lower()
-
-                if subreddit in subreddits_br:
-                    texto_original = extract_text(obj)
-                    texto_limpo = limpar_texto(texto_original)
-
-                    _, m_termos, m_cidades = texto_casa_mg_lgbt(
-                        texto_limpo,
-                        cfg["termos_lgbt"],
-                        cfg["termos_odio"],
-                        cfg["cidades_mg"],
-                    )
-
-                    encontrados += 1
-                    writer.writerow(
-                        {
-                            "id": obj.get("id"),
-                            "author": obj.get("author"),
-                            "created_utc": obj.get("created_utc"),
-                            "subreddit": obj.get("subreddit"),
-                            "text_original": texto_original,
-                            "text_clean": texto_limpo,
-                            "has_lgbt_term": int(any(t in m_termos for t in cfg["termos_lgbt"])),
-                            "has_hate_term": int(any(t in m_termos for t in cfg["termos_odio"])),
-                            "has_mg_city": int(bool(m_cidades)),
-                        }
-                    )
-
-                if num_linha % checkpoint_every == 0:
-                    _write_checkpoint_gcs(client, bucket_name, checkpoint_blob_path, num_linha, logger)
+            def salvar_checkpoint(num_linha: int) -> None:
+                nonlocal tamanho_checkpoint
+                # ordem importa: CSV em disco (fsync) -> CSV parcial no GCS -> checkpoint
+                estado = sincronizar_saida(f_out, tmp_out)
+                _upload_parcial_gcs(
+                    client, bucket_name, parcial_blob_path, tmp_out, estado.tamanho, logger, tamanho_checkpoint
+                )
+                _write_checkpoint_gcs(
+                    client,
+                    bucket_name,
+                    checkpoint_blob_path,
+                    num_linha,
+                    logger,
+                    marca=marcas.melhor_para(num_linha),
+                    saida=estado,
+                )
+                tamanho_checkpoint = estado.tamanho
+                logger.info(f"[{filename}] {indice.descrever_progresso(fonte.posicao_comprimida, num_linha)}")
+                if fonte.prefetch is not None:
+                    logger.info(f"[{filename}] {fonte.prefetch.resumo()}")
+
+            if workers > 1:
+                logger.info(f"[{filename}] 🧵 Modo paralelo: {workers} workers, blocos de {BLOCO_MB} MB")
+                leitor, linhas_antes = fonte.leitor(skip_to, marca, logger, filename)
+                encontrados = processar_stream_paralelo(
+                    leitor,
+                    f_out,
+                    workers=workers,
+                    skip_to=skip_to,
+                    logger=logger,
+                    filename=filename,
+                    prefiltro_subreddit=prefiltro_subreddit,
+                    json_backend=json_backend,
+                    projecao=JSON_PROJECAO,
+                    tamanho_bloco=BLOCO_MB * 2**20,
+                    on_checkpoint=salvar_checkpoint,
+                    checkpoint_every=checkpoint_every,
+                    linhas_antes=linhas_antes,
+                    marcas=marcas,
+                    cache_textos=cache_textos,
+                    idioma=idioma,
+                )
+                # EOF do stream paralelo: gsutil truncado/falho não pode virar "arquivo completo"
+                fonte.conferir_fim()
+            else:
+                for obj, num_linha in fonte.registros(
+                    skip_to=skip_to,
+                    logger=logger,
+                    filename=filename,
+                    prefiltro=prefiltro,
+                    decoder=decoder,
+                    marca=marca,
+                    marcas=marcas,
+                ):
+                    row = processar_registro(obj, cfg, subreddits_br, casador, cache)
+                    if row is not None:
+                        escritor.escrever(row)
+
+                    if num_linha >= proximo_ckpt:
+                        # linhas ainda no lote do idioma também são <= num_linha
+                        escritor.descarregar()
+                        salvar_checkpoint(num_linha)
+                        proximo_ckpt = (num_linha // checkpoint_every + 1) * checkpoint_every
+                        if cache is not None:
+                            logger.info(f"[{filename}] {resumo_cache(*cache.contadores())}")
+
+                escritor.descarregar()
+                encontrados = escritor.escritas
+                if cache is not None:
+                    logger.info(f"[{filename}] {resumo_cache(*cache.contadores())}")
+                if etapa is not None and etapa.modo == "filtrar":
+                    logger.info(f"[{filename}] 🌐 Idioma: {escritor.descartadas:,} linhas BR fora do português descartadas")
 
     except zstd.ZstdError as e:
         logger.error(f"❌ ZstdError ao descompactar {filename}: {e}")
@@ -219,21 +388,30 @@ def process_file_gcs(
         logger.error(f"❌ Erro inesperado processando {filename}: {e}", exc_info=True)
         return False
 
+    logger.info(f"[{filename}] {fonte.resumo()}")
     logger.info(f"[{filename}] ✅ Processamento local concluído. Total BR: {encontrados:,}")
 
-    # upload via gsutil (usa as permissões que você já confirmou que funcionam)
-    dest = f"gs://{bucket_name}/{out_blob_path}"
-    cmd = ["gsutil", "-q", "cp", tmp_out, dest]
-    logger.info(f"☁️ Upload via gsutil: {' '.join(cmd)}")
+    arquivo_final = tmp_out
+    if formato_saida == "parquet":
+        arquivo_final = tmp_out.replace(".csv", ".parquet")
+        try:
+            csv_para_parquet(tmp_out, arquivo_final, logger=logger)
+        except Exception as e:
+            logger.error(f"❌ Falha ao gerar Parquet de {filename}: {e}", exc_info=True)
+            return False
 
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    if r.returncode != 0:
-        logger.error(f"❌ Falha no upload gsutil (code={r.returncode})")
-        logger.error((r.stderr or "").strip() or (r.stdout or "").strip())
+    dest = f"gs://{bucket_name}/{out_blob_path}"
+    try:
+        enviar_arquivo(arquivo_final, dest, logger, client=client)
+    except Exception as e:
+        logger.error(f"❌ Falha no upload de {filename} para {dest}: {e}", exc_info=True)
         return False
 
-    # se subiu, remove checkpoint
+    _write_conclusao_gcs(client, bucket_name, conclusao_blob_path, out_blob_path, os.path.getsize(arquivo_final), logger)
+
+    # se subiu, remove checkpoint e o CSV parcial
     _delete_blob_if_exists(client, bucket_name, checkpoint_blob_path, logger)
+    _delete_blob_if_exists(client, bucket_name, parcial_blob_path, logger)
     logger.info("🏁 FIM.")
     return True
 
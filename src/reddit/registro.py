@@ -0,0 +1,99 @@
+from typing import Iterable, List, Optional, Tuple
+
+from src.reddit.cache_textos import CacheTextos, Casamento
+from src.reddit.filters import CasadorTermos, compilar_casador
+from src.utils.limpeza import limpar_texto, limpar_textos
+
+# Colunas do *_BR.csv
+CAMPOS_CSV = [
+    "id",
+    "author",
+    "created_utc",
+    "subreddit",
+    "text_original",
+    "text_clean",
+    "has_lgbt_term",
+    "has_hate_term",
+    "has_mg_city",
+]
+
+
+def extract_text(obj: dict) -> str:
+    if "body" in obj:
+        return obj.get("body", "") or ""
+    title = obj.get("title", "") or ""
+    selftext = obj.get("selftext", "") or ""
+    return f"{title} {selftext}".strip()
+
+
+def processar_registro(
+    obj: dict,
+    cfg: dict,
+    subreddits_br: set,
+    casador: Optional[CasadorTermos] = None,
+    cache: Optional[CacheTextos] = None,
+) -> Optional[dict]:
+    """
+    Aplica filtro de subreddit + limpeza + match de termos num registro do dump.
+    Retorna a linha do CSV (dict com CAMPOS_CSV) ou None se o subreddit não é BR.
+    casador: compilar_casador(cfg) montado uma vez pelo chamador (senão monta a cada registro BR).
+    cache: CacheTextos para não limpar/casar de novo textos repetidos.
+    """
+    subreddit = (obj.get("subreddit") or "").lower()
+    if subreddit not in subreddits_br:
+        return None
+
+    casador = casador or compilar_casador(cfg)
+    texto_original = extract_text(obj)
+    if cache is not None:
+        texto_limpo, casamento = cache.obter(texto_original)
+    else:
+        texto_limpo = limpar_texto(texto_original)
+        casamento = casador.casar(texto_limpo)
+    return _montar_linha(obj, texto_original, texto_limpo, casamento, casador)
+
+
+def processar_registros(
+    objs: Iterable[dict],
+    cfg: dict,
+    subreddits_br: set,
+    casador: Optional[CasadorTermos] = None,
+    cache: Optional[CacheTextos] = None,
+) -> List[dict]:
+    """
+    processar_registro em lote (ex.: um bloco do dump): filtra os subreddits BR
+    e limpa todos os textos de uma vez com limpar_textos (ou pelo cache, se houver).
+    Mesma saída, na mesma ordem.
+    """
+    casador = casador or compilar_casador(cfg)
+    br = [obj for obj in objs if (obj.get("subreddit") or "").lower() in subreddits_br]
+    originais = [extract_text(obj) for obj in br]
+
+    resultados: List[Tuple[str, Casamento]]
+    if cache is not None:
+        resultados = [cache.obter(o) for o in originais]
+    else:
+        resultados = [(l, casador.casar(l)) for l in limpar_textos(originais)]
+
+    return [
+        _montar_linha(obj, o, limpo, casamento, casador)
+        for obj, o, (limpo, casamento) in zip(br, originais, resultados)
+    ]
+
+
+def _montar_linha(
+    obj: dict, texto_original: str, texto_limpo: str, casamento: Casamento, casador: CasadorTermos
+) -> dict:
+    _, m_termos, m_cidades = casamento
+
+    return {
+        "id": obj.get("id"),
+        "author": obj.get("author"),
+        "created_utc": obj.get("created_utc"),
+        "subreddit": obj.get("subreddit"),
+        "text_original": texto_original,
+        "text_clean": texto_limpo,
+        "has_lgbt_term": int(not casador.conjunto_lgbt.isdisjoint(m_termos)),
+        "has_hate_term": int(not casador.conjunto_odio.isdisjoint(m_termos)),
+        "has_mg_city": int(bool(m_cidades)),
+    }
@@ -1,13 +1,23 @@
 import os
 import sys
+import time
+import argparse
 import traceback
 import logging
-from typing import Set, List
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from typing import Dict, Set, List, Optional, Tuple
 
 from google.cloud import storage
 
+try:
+    import psutil
+except ImportError:  # opcional
+    psutil = None
+
+from src.utils.armazenamento_gcs import cliente_gcs
 from src.utils.logger import setup_logger
-from src.reddit.process_one_gcs import process_file_gcs
+from src.reddit.process_one_gcs import caminhos_tmp_gcs, ler_conclusao_gcs, process_file_gcs
 
 
 BUCKET = os.getenv("TYBYRIA_BUCKET", "lgbtminas-dados")
@@ -28,6 +38,21 @@ EXCLUDE_RAW_FILES = os.getenv("EXCLUDE_RAW_FILES", "").strip()
 # Quantos arquivos processar no máximo (0 = todos)
 MAX_FILES = int(os.getenv("MAX_FILES", "0"))
 
+# Quantos meses processar ao mesmo tempo (cada um em um processo separado)
+MAX_PARALLEL_FILES = int(os.getenv("MAX_PARALLEL_FILES", "1"))
+
+# Orçamento de RAM (GB) para os processos simultâneos e estimativa por mês.
+# O .zst pode pedir janela de até ZSTD_MAX_WINDOW (~2GB), então 3GB por arquivo é conservador.
+# Antes de iniciar outro mês, soma o RSS medido de cada mês ativo (processo + filhos), com a
+# estimativa como piso (um mês recém-iniciado ainda não alocou a janela), e espera se não couber.
+MAX_MEM_GB = float(os.getenv("MAX_MEM_GB", "0"))  # 0 = sem limite
+MEM_PER_FILE_GB = float(os.getenv("MEM_PER_FILE_GB", "3"))
+# De quanto em quanto tempo remede a RAM enquanto um mês espera para começar
+MEM_CHECK_SECONDS = float(os.getenv("MEM_CHECK_SECONDS", "30"))
+
+# Logs individuais de cada mês no modo paralelo
+PER_FILE_LOG_DIR = os.getenv("PER_FILE_LOG_DIR", "logs/raw_to_processed")
+
 def parse_excludes(s: str) -> Set[str]:
     if not s:
         return set()
@@ -37,6 +62,10 @@ def list_blobs(client: storage.Client, bucket_name: str, prefix: str) -> List[st
     bucket = client.bucket(bucket_name)
     return [b.name for b in client.list_blobs(bucket, prefix=prefix)]
 
+def list_blob_sizes(client: storage.Client, bucket_name: str, prefix: str) -> Dict[str, int]:
+    bucket = client.bucket(bucket_name)
+    return {b.name: b.size for b in client.list_blobs(bucket, prefix=prefix)}
+
 def raw_to_processed_name(raw_blob_name: str) -> str:
     # raw:  rede social/raw/RC_2024-01.zst
     # proc: rede social/processed/RC_2024-01_BR.csv
@@ -45,7 +74,208 @@ def raw_to_processed_name(raw_blob_name: str) -> str:
         base = base[:-4]
     return f"{PREFIX_PROCESSED}{base}{OUT_SUFFIX}"
 
-def main():
+def processed_done(
+    client: storage.Client, raw_blob_name: str, processed: Dict[str, int], tmp_blobs: Set[str]
+) -> Optional[str]:
+    """
+    Saída (em PROCESSED) de um mês que já terminou; None se ele ainda tem que ser processado.
+
+    Com marca de concluído (gravada por process_file_gcs depois do upload): vale se a saída que
+    ela aponta existe com o mesmo tamanho. Sem marca (meses processados antes dela): a saída
+    CSV/Parquet existe e não há checkpoint em TMP (o checkpoint só é apagado depois do upload).
+    """
+    checkpoint, _, conclusao = caminhos_tmp_gcs(PREFIX_TMP, os.path.basename(raw_blob_name))
+    if conclusao in tmp_blobs:
+        info = ler_conclusao_gcs(client, BUCKET, conclusao)
+        if info is not None and processed.get(info["saida"]) == info["bytes"]:
+            return info["saida"]
+        return None
+
+    if checkpoint in tmp_blobs:
+        return None
+    expected_processed = raw_to_processed_name(raw_blob_name)
+    # o mesmo mês já pode ter saído em Parquet (REDDIT_FORMATO_SAIDA=parquet)
+    expected_parquet = os.path.splitext(expected_processed)[0] + ".parquet"
+    for nome in (expected_processed, expected_parquet):
+        if nome in processed:
+            return nome
+    return None
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Processa os RAW .zst que ainda não estão em PROCESSED (GCS).")
+    ap.add_argument(
+        "--max-parallel-files",
+        type=int,
+        default=MAX_PARALLEL_FILES,
+        help="Quantos meses processar ao mesmo tempo, cada um em um processo (default: 1 = serial).",
+    )
+    ap.add_argument(
+        "--max-mem-gb",
+        type=float,
+        default=MAX_MEM_GB,
+        help="RAM total para os processos simultâneos (0 = sem limite). Conferida com o RSS dos meses ativos antes de iniciar outro.",
+    )
+    ap.add_argument(
+        "--mem-per-file-gb",
+        type=float,
+        default=MEM_PER_FILE_GB,
+        help="Estimativa de RAM de um mês em processamento (piso do RSS medido de cada mês ativo).",
+    )
+    return ap.parse_args(argv)
+
+
+def effective_parallelism(max_parallel: int, max_mem_gb: float, mem_per_file_gb: float) -> int:
+    n = max(1, max_parallel)
+    if max_mem_gb > 0 and mem_per_file_gb > 0:
+        n = min(n, max(1, int(max_mem_gb // mem_per_file_gb)))
+    return n
+
+
+def _rss_tree_proc(pid: int) -> Optional[int]:
+    """RSS (bytes) de pid e descendentes lendo /proc (Linux, sem psutil)."""
+    pagina = os.sysconf("SC_PAGE_SIZE")
+    filhos: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entradas = [e for e in os.listdir("/proc") if e.isdigit()]
+    except OSError:
+        return None
+    for e in entradas:
+        try:
+            with open(f"/proc/{e}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{e}/statm") as f:
+                rss[int(e)] = int(f.read().split()[1]) * pagina
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(int(campos[1]), []).append(int(e))
+    if pid not in rss:
+        return None
+    total, fila = 0, [pid]
+    while fila:
+        atual = fila.pop()
+        total += rss.get(atual, 0)
+        fila.extend(filhos.get(atual, []))
+    return total
+
+
+def rss_tree_gb(pid: int) -> Optional[float]:
+    """RSS (GB) do processo de um mês e dos filhos dele (workers do modo paralelo); None se não der para medir."""
+    if psutil is None:
+        total = _rss_tree_proc(pid)
+        return None if total is None else total / 2**30
+    try:
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 2**30
+
+
+def mem_in_use_gb(pids: List[int], mem_per_file_gb: float) -> float:
+    """RAM dos meses ativos: RSS medido de cada um, com a estimativa por mês como piso."""
+    total = 0.0
+    for pid in pids:
+        rss = rss_tree_gb(pid)
+        total += max(rss if rss is not None else 0.0, mem_per_file_gb)
+    return total
+
+
+def _process_file_worker(raw_blob: str, log_path: str) -> None:
+    """Roda em processo separado (spawn): 1 mês, com log próprio. exit 0=ok, 1=ok=False, 2=exceção."""
+    logger = setup_logger(log_path)
+    for h in logger.handlers:
+        h.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+    try:
+        ok = process_file_gcs(
+            bucket_name=BUCKET,
+            raw_blob_path=raw_blob,
+            out_prefix_processed=PREFIX_PROCESSED,
+            checkpoint_prefix=PREFIX_TMP,
+            logger=logger,
+        )
+    except Exception as e:
+        logger.error(f"❌ Erro em {os.path.basename(raw_blob)}: {e}")
+        logger.error(traceback.format_exc())
+        sys.exit(2)
+
+    sys.exit(0 if ok else 1)
+
+
+def run_parallel(
+    to_process: List[str],
+    n_parallel: int,
+    logger: logging.Logger,
+    max_mem_gb: float = 0,
+    mem_per_file_gb: float = MEM_PER_FILE_GB,
+) -> List[Tuple[str, str, float]]:
+    """
+    Processa até n_parallel meses ao mesmo tempo (um processo por mês).
+    Com max_mem_gb > 0, só inicia outro mês se a RAM dos ativos (mem_in_use_gb) mais
+    mem_per_file_gb couber; senão espera um terminar ou remede a cada MEM_CHECK_SECONDS.
+    Um mês já iniciado não é interrompido se crescer depois.
+    Retorna [(arquivo, status, segundos)].
+    """
+    ctx = mp.get_context("spawn")  # processo limpo: sem herdar client/sockets do GCS do pai
+    os.makedirs(PER_FILE_LOG_DIR, exist_ok=True)
+
+    pendentes = list(to_process)
+    ativos: Dict[int, Tuple[str, mp.Process, float]] = {}
+    resultados: List[Tuple[str, str, float]] = []
+    esperando_mem = False
+
+    while pendentes or ativos:
+        while pendentes and len(ativos) < n_parallel:
+            if max_mem_gb > 0 and ativos:
+                em_uso = mem_in_use_gb([p.pid for _, p, _ in ativos.values()], mem_per_file_gb)
+                if em_uso + mem_per_file_gb > max_mem_gb:
+                    if not esperando_mem:
+                        logger.info(
+                            f"⏳ RAM: {em_uso:.1f} GB em uso por {len(ativos)} mês(es) + {mem_per_file_gb:.1f} GB "
+                            f"passaria de {max_mem_gb:.1f} GB; {os.path.basename(pendentes[0])} espera"
+                        )
+                        esperando_mem = True
+                    break
+            esperando_mem = False
+            raw_blob = pendentes.pop(0)
+            fname = os.path.basename(raw_blob)
+            log_path = os.path.join(PER_FILE_LOG_DIR, fname.replace(".zst", ".log"))
+
+            p = ctx.Process(target=_process_file_worker, args=(raw_blob, log_path), name=fname)
+            p.start()
+            ativos[p.sentinel] = (fname, p, time.time())
+            logger.info(f"➡️ Iniciado: {fname} (pid={p.pid}, log={log_path}) | ativos={len(ativos)}")
+
+        for sentinel in wait(list(ativos.keys()), timeout=MEM_CHECK_SECONDS if esperando_mem else None):
+            fname, p, t0 = ativos.pop(sentinel)
+            p.join()
+            elapsed = time.time() - t0
+
+            if p.exitcode == 0:
+                status = "ok"
+                logger.info(f"✅ Sucesso: {fname} ({elapsed/60:.1f} min)")
+            elif p.exitcode == 1:
+                status = "ok=False"
+                logger.warning(f"⚠️ Processou com ok=False: {fname} ({elapsed/60:.1f} min)")
+            else:
+                status = f"erro (exit={p.exitcode})"
+                logger.error(f"❌ Erro em {fname} (exit={p.exitcode}, {elapsed/60:.1f} min)")
+
+            resultados.append((fname, status, elapsed))
+
+    return resultados
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
     logger = setup_logger("logs/run_missing_raw_to_processed.log")
     for h in logger.handlers:
         h.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
@@ -61,14 +291,15 @@ def main():
     if excludes:
         logger.info(f"Excluindo arquivos RAW: {sorted(excludes)}")
 
-    client = storage.Client()
+    client = cliente_gcs()
 
     # Lista tudo que existe na RAW
     raw_blobs = [x for x in list_blobs(client, BUCKET, PREFIX_RAW) if x.endswith(".zst")]
     raw_blobs_sorted = sorted(raw_blobs)
 
-    # Lista tudo que existe na PROCESSED
-    processed_blobs = set(list_blobs(client, BUCKET, PREFIX_PROCESSED))
+    # Lista tudo que existe na PROCESSED (com tamanho, para conferir a marca de concluído) e na TMP
+    processed_blobs = list_blob_sizes(client, BUCKET, PREFIX_PROCESSED)
+    tmp_blobs = set(list_blobs(client, BUCKET, PREFIX_TMP))
 
     logger.info(f"RAW .zst encontrados: {len(raw_blobs_sorted)}")
     logger.info(f"PROCESSED encontrados: {len(processed_blobs)}")
@@ -81,9 +312,9 @@ def main():
             logger.warning(f"⏭️ Ignorado (exclude): {fname}")
             continue
 
-        expected_processed = raw_to_processed_name(raw_blob)
-        if expected_processed in processed_blobs:
-            logger.info(f"✅ Já existe processed: {os.path.basename(expected_processed)} (skip)")
+        concluido = processed_done(client, raw_blob, processed_blobs, tmp_blobs)
+        if concluido is not None:
+            logger.info(f"✅ Já concluído: {os.path.basename(concluido)} (skip)")
             continue
 
         to_process.append(raw_blob)
@@ -97,6 +328,25 @@ def main():
         logger.info("Nada para processar. Encerrando.")
         return 0
 
+    n_parallel = effective_parallelism(args.max_parallel_files, args.max_mem_gb, args.mem_per_file_gb)
+    if n_parallel > 1:
+        logger.info(
+            f"🧵 Modo paralelo: até {n_parallel} arquivos ao mesmo tempo "
+            f"(pedido={args.max_parallel_files}, max_mem_gb={args.max_mem_gb}, mem_per_file_gb={args.mem_per_file_gb})"
+        )
+        if args.max_mem_gb > 0 and psutil is None and not os.path.isdir("/proc"):
+            logger.warning("⚠️ Sem psutil nem /proc: RAM dos meses ativos = só a estimativa por mês")
+        resultados = run_parallel(to_process, n_parallel, logger, args.max_mem_gb, args.mem_per_file_gb)
+
+        ok = [r for r in resultados if r[1] == "ok"]
+        falhas = [r for r in resultados if r[1] != "ok"]
+        logger.info(f"📋 RESUMO: {len(ok)} sucesso(s), {len(falhas)} falha(s)")
+        for fname, status, elapsed in sorted(resultados):
+            logger.info(f"   • {fname}: {status} ({elapsed/60:.1f} min)")
+
+        logger.info("🏁 FIM: runner terminou.")
+        return 0
+
     # Processa um por um
     for raw_blob in to_process:
         fname = os.path.basename(raw_blob)
@@ -0,0 +1,99 @@
+"""
+Saída *_BR em Parquet (pyarrow), opcional.
+
+O processamento continua escrevendo o CSV local (é nele que o checkpoint se
+apoia); no fim o CSV é convertido em Parquet com colunas tipadas, row groups
+de tamanho fixo (para leitura em stream) e compressão zstd. Os leitores
+(src/utils/tabela.py) aceitam os dois formatos.
+"""
+
+import csv
+import logging
+from typing import Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opcional
+    pa = None
+    pq = None
+
+from src.reddit.config import PARQUET_LINHAS_GRUPO
+from src.reddit.registro import CAMPOS_CSV
+
+# colunas inteiras do *_BR (o resto é string)
+CAMPOS_INT8 = ("has_lgbt_term", "has_hate_term", "has_mg_city")
+CAMPOS_INT64 = ("created_utc",)
+
+
+def esquema_br(campos=CAMPOS_CSV):
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado: pip install pyarrow (ou use REDDIT_FORMATO_SAIDA=csv)")
+    tipos = []
+    for campo in campos:
+        if campo in CAMPOS_INT8:
+            tipos.append((campo, pa.int8()))
+        elif campo in CAMPOS_INT64:
+            tipos.append((campo, pa.int64()))
+        else:
+            tipos.append((campo, pa.string()))
+    return pa.schema(tipos)
+
+
+def _inteiro(valor: str) -> Optional[int]:
+    # created_utc vem como "1700000000" ou "1700000000.0" dependendo do dump
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        try:
+            return int(float(valor))
+        except ValueError:
+            return None
+
+
+def _escrever_grupo(writer, esquema, colunas: dict) -> None:
+    writer.write_table(pa.Table.from_pydict(colunas, schema=esquema))
+    for valores in colunas.values():
+        valores.clear()
+
+
+def csv_para_parquet(
+    caminho_csv: str,
+    caminho_parquet: str,
+    linhas_por_grupo: int = PARQUET_LINHAS_GRUPO,
+    logger: Optional[logging.Logger] = None,
+) -> int:
+    """
+    Converte um *_BR.csv em Parquet. Retorna o número de linhas.
+    As colunas são as do header do CSV (CAMPOS_CSV, mais "lang" com a etapa de idioma).
+    Lê o CSV em stream: só um row group fica em memória por vez.
+    """
+    with open(caminho_csv, "r", encoding="utf-8", newline="") as f_in:
+        leitor = csv.DictReader(f_in)
+        campos = leitor.fieldnames or CAMPOS_CSV
+        esquema = esquema_br(campos)
+        colunas = {campo: [] for campo in campos}
+        total = 0
+
+        with pq.ParquetWriter(caminho_parquet, esquema, compression="zstd") as writer:
+            for row in leitor:
+                for campo in campos:
+                    valor = row.get(campo)
+                    if campo in CAMPOS_INT8 or campo in CAMPOS_INT64:
+                        colunas[campo].append(_inteiro(valor))
+                    else:
+                        colunas[campo].append(valor)
+                total += 1
+
+                if len(colunas["id"]) >= linhas_por_grupo:
+                    _escrever_grupo(writer, esquema, colunas)
+
+            if colunas["id"]:
+                _escrever_grupo(writer, esquema, colunas)
+
+    if logger:
+        logger.info(f"🧱 Parquet gerado: {caminho_parquet} ({total:,} linhas)")
+    return total
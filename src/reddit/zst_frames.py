@@ -0,0 +1,176 @@
+"""
+Leitura de .zst frame a frame, para checkpoints por offset comprimido.
+
+O checkpoint guarda, além da linha, a "marca" do último frame zstd que começou
+antes dela: offset comprimido do frame + quantas linhas completas vieram antes.
+Na retomada a leitura faz seek (arquivo local, BlobReader do GCS ou
+`gsutil cat -r`) direto para esse frame e só conta "\\n" do que falta até a
+linha do checkpoint, em vez de descomprimir o arquivo desde o início.
+
+Se o arquivo tem um frame só (caso comum com `zstd --long`), não há marca útil
+e a retomada cai no pulo rápido que só conta "\\n" desde o início.
+"""
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+# Quanto comprimido alimentar por vez no decompressobj
+READ_SIZE_COMPRIMIDO = 2**18
+
+
+@dataclass
+class MarcaFrame:
+    offset: int        # offset (comprimido) do início do frame
+    linhas_antes: int  # linhas completas ("\n") antes do frame
+    parcial: bool      # True se o frame começa no meio de uma linha
+
+
+class MarcasFrames:
+    """
+    Marcas de frame vistas durante a leitura. Pode ser preenchida pela thread
+    que descomprime e consultada pela que escreve o checkpoint.
+    """
+
+    def __init__(self, inicial: Optional[MarcaFrame] = None):
+        self._lock = threading.Lock()
+        self._marcas: List[MarcaFrame] = [inicial] if inicial else []
+
+    def registrar(self, offset: int, linhas_antes: int, parcial: bool) -> None:
+        with self._lock:
+            self._marcas.append(MarcaFrame(offset, linhas_antes, parcial))
+
+    def melhor_para(self, linha: int) -> Optional[MarcaFrame]:
+        """
+        Última marca a partir da qual dá pra retomar com checkpoint em `linha`.
+        (se o frame começa no meio de uma linha, essa linha precisa já ter sido processada)
+        """
+        with self._lock:
+            escolhida = None
+            idx = -1
+            for i, m in enumerate(self._marcas):
+                if m.linhas_antes + (1 if m.parcial else 0) <= linha:
+                    escolhida, idx = m, i
+                else:
+                    break
+            if idx > 0:
+                # marcas anteriores à escolhida nunca mais serão úteis
+                del self._marcas[:idx]
+            return escolhida
+
+
+class LeitorFramesZst:
+    """
+    File-like de leitura (read) sobre um .zst que descomprime frame a frame.
+
+    Cada read() devolve dados de um único frame; quando o pedaço é o primeiro de
+    um frame, `inicio_de_frame` traz o offset comprimido dele (senão None).
+
+    fh já deve estar posicionado em `offset_inicial`. O frame em offset_inicial
+    não é sinalizado quando offset_inicial > 0 (quem retoma já tem essa marca).
+    """
+
+    def __init__(self, fh, dctx, offset_inicial: int = 0, read_size: int = READ_SIZE_COMPRIMIDO):
+        self.fh = fh
+        self.dctx = dctx
+        self.read_size = read_size
+        self.inicio_de_frame: Optional[int] = None
+
+        self._pos = offset_inicial  # offset comprimido já lido de fh
+        self._pendente = b""        # comprimido lido mas ainda não consumido
+        self._obj = None            # decompressobj do frame atual
+        self._frame_inicio = offset_inicial
+        self._frame_sinalizado = False
+        self._primeiro = True
+        self._offset_inicial = offset_inicial
+
+    def _ler_comprimido(self) -> bytes:
+        dados = self.fh.read(self.read_size)
+        self._pos += len(dados)
+        return dados
+
+    def read(self, size: int = -1) -> bytes:
+        # `size` é só indicativo: devolve o que um decompress produzir
+        while True:
+            if self._obj is None:
+                if not self._pendente:
+                    self._pendente = self._ler_comprimido()
+                    if not self._pendente:
+                        self.inicio_de_frame = None
+                        return b""
+                self._obj = self.dctx.decompressobj()
+                self._frame_inicio = self._pos - len(self._pendente)
+                self._frame_sinalizado = self._primeiro and self._offset_inicial > 0
+                self._primeiro = False
+            elif not self._pendente:
+                self._pendente = self._ler_comprimido()
+                if not self._pendente:
+                    # arquivo acabou no meio de um frame
+                    self.inicio_de_frame = None
+                    return b""
+
+            dados = self._obj.decompress(self._pendente)
+            if self._obj.eof:
+                self._pendente = self._obj.unused_data
+                self._obj = None
+            else:
+                self._pendente = b""
+
+            if not dados:
+                # frame sem saída (ex.: skippable) ou precisa de mais entrada
+                continue
+
+            if self._frame_sinalizado:
+                self.inicio_de_frame = None
+            else:
+                self.inicio_de_frame = self._frame_inicio
+                self._frame_sinalizado = True
+            return dados
+
+
+def ponto_de_retomada(skip_to: int, marca: Optional[MarcaFrame]) -> Tuple[int, int]:
+    """
+    (offset comprimido para o seek, linhas completas antes dele) para retomar em skip_to.
+    Sem marca utilizável: (0, 0) -> lê desde o início, pulando só por contagem de "\n".
+    """
+    if skip_to <= 0 or marca is None:
+        return 0, 0
+    if marca.linhas_antes + (1 if marca.parcial else 0) > skip_to:
+        return 0, 0
+    return marca.offset, marca.linhas_antes
+
+
+def formatar_checkpoint(linha: int, marca: Optional[MarcaFrame], saida: Optional[dict] = None) -> str:
+    """
+    Checkpoint em JSON: {"linha": N, "frame": {...} ou null}.
+    saida: estado do CSV parcial (ver src/reddit/checkpoint_saida.py), se houver.
+    """
+    d = {"linha": linha, "frame": asdict(marca) if marca else None}
+    if saida is not None:
+        d["saida"] = saida
+    return json.dumps(d)
+
+
+def ler_checkpoint(texto: str) -> Tuple[int, Optional[MarcaFrame]]:
+    """
+    Lê o checkpoint. Aceita o formato antigo (só o número da linha, com ou sem vírgulas).
+    Retorna (linha, marca ou None); (0, None) se vazio/ilegível.
+    """
+    texto = (texto or "").strip()
+    if not texto:
+        return 0, None
+
+    if texto.startswith("{"):
+        try:
+            d = json.loads(texto)
+            frame = d.get("frame")
+            marca = MarcaFrame(int(frame["offset"]), int(frame["linhas_antes"]), bool(frame["parcial"])) if frame else None
+            return int(d.get("linha") or 0), marca
+        except Exception:
+            return 0, None
+
+    try:
+        return int(texto.replace(",", "")), None
+    except ValueError:
+        return 0, None
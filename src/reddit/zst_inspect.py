@@ -0,0 +1,485 @@
+"""
+Inspeção de um .zst com poucas leituras por faixa: magic, frames e tamanho
+descomprimido, guardados num índice ao lado do arquivo.
+
+Antes a checagem do magic era um `gsutil cat | head -c 4` (dois
+subprocessos) ou um download_as_bytes próprio, e nada sabia quantos frames o
+arquivo tem nem quanto ele vira descomprimido. Aqui, lendo só faixas:
+
+  1. início (REDDIT_ZST_AMOSTRA_MB): magic, cabeçalho do primeiro frame
+     (janela, tamanho do conteúdo) e uma amostra descomprimida para a razão de
+     compressão e a densidade de linhas;
+  2. fim (64 KB): rodapé do formato "seekable" do zstd (tabela de frames num
+     frame pulável no final); se houver, dá todos os frames exatos numa
+     leitura a mais, no máximo;
+  3. varrer=True (opcional): sem tabela, anda pelos cabeçalhos de frame e de
+     bloco sem descomprimir nada (frames comuns e puláveis). Lê o arquivo
+     inteiro, mas só faz I/O; no GCS vale para arquivos que vão ser
+     processados várias vezes.
+
+O resultado (IndiceZst) vira <arquivo>.zst.idx.json ao lado do .zst (local ou
+no GCS), validado pelo tamanho + generation/mtime, para as etapas seguintes
+planejarem descompressão paralela (dividir) e mostrarem progresso
+(descrever_progresso) sem inspecionar de novo.
+
+Uso:
+    indice = obter_indice("gs://bucket/raw/RC_2025-03.zst", logger=logger)
+    python -m src.reddit.zst_inspect gs://bucket/raw/RC_2025-03.zst [--varrer] [--refazer]
+"""
+
+import argparse
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import zstandard as zstd
+except ImportError:  # opcional (só para a amostra descomprimida)
+    zstd = None
+
+from src.reddit.config import ZST_AMOSTRA_MB, ZST_INDICE_SIDECAR, ZSTD_MAX_WINDOW
+from src.utils.armazenamento_gcs import NotFound, cliente_gcs, escrever_texto, ler_texto, separar_uri
+
+VERSAO_INDICE = 1
+SUFIXO_INDICE = ".idx.json"
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"  # 0xFD2FB528 little-endian
+MAGIC_PULAVEL = 0x184D2A50        # 0x184D2A50..0x184D2A5F (4 bits baixos livres)
+MAGIC_TABELA_SEEK = 0x184D2A5E    # frame pulável com a tabela do formato seekable
+MAGIC_SEEKABLE = 0x8F92EAB1       # últimos 4 bytes do arquivo no formato seekable
+
+TAMANHO_CAUDA = 64 * 1024
+JANELA_VARREDURA_GCS = 8 * 2**20
+JANELA_VARREDURA_LOCAL = 64 * 1024
+
+# (inicio, fim) inclusivo -> bytes, como blob.download_as_bytes(start=, end=)
+LerFaixa = Callable[[int, int], bytes]
+
+
+class ErroZst(ValueError):
+    """Estrutura de frame/bloco inválida."""
+
+
+def _legivel(n: int) -> str:
+    for unidade, fator in (("GB", 2**30), ("MB", 2**20), ("KB", 2**10)):
+        if n >= fator:
+            return f"{n / fator:,.1f} {unidade}"
+    return f"{n:,} B"
+
+
+@dataclass
+class FrameZst:
+    offset: int                          # início do frame no arquivo comprimido
+    tamanho: int                         # bytes comprimidos (cabeçalho e checksum inclusos)
+    descomprimido: Optional[int] = None  # Frame_Content_Size, se o frame trouxer
+    pulavel: bool = False                # frame pulável (metadados; não gera saída)
+
+
+@dataclass
+class IndiceZst:
+    nome: str
+    tamanho: int
+    geracao: str = ""                    # generation do blob ou mtime_ns do arquivo local
+    magic_ok: bool = False
+    magic: str = ""                      # primeiros 4 bytes em hex
+    janela: Optional[int] = None         # janela do primeiro frame (bytes)
+    seekable: bool = False               # tem a tabela de frames do formato seekable
+    completo: bool = False               # `frames` cobre o arquivo inteiro
+    frames: List[FrameZst] = field(default_factory=list)
+    tamanho_descomprimido: Optional[int] = None
+    descomprimido_exato: bool = False    # soma dos tamanhos dos frames (senão, estimado pela amostra)
+    linhas_estimadas: Optional[int] = None
+    leituras: int = 0                    # faixas lidas para montar o índice
+    erro: str = ""
+    versao: int = VERSAO_INDICE
+
+    @property
+    def frames_dados(self) -> List[FrameZst]:
+        return [f for f in self.frames if not f.pulavel]
+
+    def para_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def de_json(cls, texto: str) -> "IndiceZst":
+        d = json.loads(texto)
+        d["frames"] = [FrameZst(**f) for f in d.get("frames") or []]
+        return cls(**d)
+
+    def dividir(self, partes: int) -> List[Tuple[int, int]]:
+        """
+        Até `partes` faixas [inicio, fim) do comprimido, cada uma começando num
+        frame e com tamanhos parecidos: pedaços que dá para descomprimir em
+        paralelo. Sem frames conhecidos (ou um frame só), a faixa é o arquivo todo.
+        """
+        frames = self.frames_dados
+        if not self.completo or len(frames) < 2 or partes <= 1:
+            return [(0, self.tamanho)]
+        total = sum(f.tamanho for f in frames)
+        faixas = []
+        inicio = frames[0].offset
+        acumulado = 0
+        for f in frames:
+            if acumulado >= total * (len(faixas) + 1) / partes and f.offset > inicio:
+                faixas.append((inicio, f.offset))
+                inicio = f.offset
+            acumulado += f.tamanho
+        faixas.append((inicio, self.tamanho))
+        return faixas
+
+    def descrever_progresso(self, offset_comprimido: int, linha: int) -> str:
+        """Linha de log com o % do comprimido já lido e a estimativa de linhas do arquivo."""
+        pct = 100 * min(offset_comprimido, self.tamanho) / max(self.tamanho, 1)
+        total = f" de ~{self.linhas_estimadas:,} linhas" if self.linhas_estimadas else " linhas"
+        return f"📍 {pct:.1f}% do arquivo ({linha:,}{total})"
+
+    def resumo(self) -> str:
+        if not self.magic_ok:
+            return f"❌ {self.nome}: não é .zst (magic={self.magic or 'vazio'})"
+        if self.completo:
+            dados = len(self.frames_dados)
+            frames = f"{dados:,} frames" + (f" (+{len(self.frames) - dados} puláveis)" if len(self.frames) > dados else "")
+        else:
+            frames = "frames não indexados"
+        partes = [f"📐 {self.nome}: {_legivel(self.tamanho)}", frames]
+        if self.seekable:
+            partes.append("seekable")
+        if self.janela:
+            partes.append(f"janela {_legivel(self.janela)}")
+        if self.tamanho_descomprimido:
+            aprox = "" if self.descomprimido_exato else "~"
+            partes.append(f"{aprox}{_legivel(self.tamanho_descomprimido)} descomprimidos")
+        if self.linhas_estimadas:
+            partes.append(f"~{self.linhas_estimadas:,} linhas")
+        partes.append(f"{self.leituras} leituras")
+        if self.erro:
+            partes.append(f"⚠️ {self.erro}")
+        return " | ".join(partes)
+
+
+# ==========================================================
+# leitura por faixas
+# ==========================================================
+class _Cursor:
+    """Bytes em offsets arbitrários com uma janela em memória (uma faixa lida por vez)."""
+
+    def __init__(self, ler_faixa: LerFaixa, tamanho: int, janela: int):
+        self.ler_faixa = ler_faixa
+        self.tamanho = tamanho
+        self.janela = janela
+        self.leituras = 0
+        self._inicio = 0
+        self._buf = b""
+
+    def semear(self, inicio: int, dados: bytes) -> None:
+        self._inicio, self._buf = inicio, dados
+
+    def ler(self, pos: int, n: int) -> bytes:
+        if pos < 0 or pos + n > self.tamanho:
+            raise ErroZst(f"arquivo truncado: precisa de {n} bytes em {pos:,} (tamanho {self.tamanho:,})")
+        rel = pos - self._inicio
+        if rel < 0 or rel + n > len(self._buf):
+            fim = min(self.tamanho, pos + max(n, self.janela)) - 1
+            self._buf = self.ler_faixa(pos, fim)
+            self._inicio = pos
+            self.leituras += 1
+            rel = 0
+        return self._buf[rel:rel + n]
+
+    def u32(self, pos: int) -> int:
+        return int.from_bytes(self.ler(pos, 4), "little")
+
+
+def _cabecalho_frame(c: _Cursor, offset: int) -> Tuple[int, Optional[int], Optional[int], bool]:
+    """(posição do primeiro bloco, Frame_Content_Size, janela, tem checksum) do frame em offset."""
+    descritor = c.ler(offset + 4, 1)[0]
+    flag_fcs = descritor >> 6
+    segmento_unico = bool(descritor & 0x20)
+    checksum = bool(descritor & 0x04)
+    if descritor & 0x08:
+        raise ErroZst(f"bit reservado ligado no frame em {offset:,}")
+    pos = offset + 5
+
+    janela = None
+    if not segmento_unico:
+        wd = c.ler(pos, 1)[0]
+        base = 1 << (10 + (wd >> 3))
+        janela = base + (base >> 3) * (wd & 7)
+        pos += 1
+
+    pos += (0, 1, 2, 4)[descritor & 3]  # Dictionary_ID
+
+    tam_fcs = (1 if segmento_unico else 0, 2, 4, 8)[flag_fcs]
+    fcs = None
+    if tam_fcs:
+        fcs = int.from_bytes(c.ler(pos, tam_fcs), "little") + (256 if tam_fcs == 2 else 0)
+        pos += tam_fcs
+    if segmento_unico:
+        janela = fcs
+    return pos, fcs, janela, checksum
+
+
+def _fim_do_frame(c: _Cursor, offset: int) -> Tuple[int, Optional[int], Optional[int]]:
+    """(offset do fim, Frame_Content_Size, janela) andando pelos cabeçalhos de bloco."""
+    pos, fcs, janela, checksum = _cabecalho_frame(c, offset)
+    while True:
+        cabecalho = int.from_bytes(c.ler(pos, 3), "little")
+        ultimo = cabecalho & 1
+        tipo = (cabecalho >> 1) & 3
+        tamanho = cabecalho >> 3
+        if tipo == 3:
+            raise ErroZst(f"bloco de tipo reservado em {pos:,}")
+        pos += 3 + (1 if tipo == 1 else tamanho)  # RLE: 1 byte repetido `tamanho` vezes
+        if ultimo:
+            break
+    return pos + (4 if checksum else 0), fcs, janela
+
+
+def _varrer_frames(c: _Cursor) -> List[FrameZst]:
+    frames = []
+    pos = 0
+    while pos < c.tamanho:
+        magic = c.u32(pos)
+        if magic == int.from_bytes(ZSTD_MAGIC, "little"):
+            fim, fcs, _ = _fim_do_frame(c, pos)
+            frames.append(FrameZst(pos, fim - pos, fcs))
+        elif magic & 0xFFFFFFF0 == MAGIC_PULAVEL:
+            fim = pos + 8 + c.u32(pos + 4)
+            frames.append(FrameZst(pos, fim - pos, None, pulavel=True))
+        else:
+            raise ErroZst(f"magic desconhecido {magic:#010x} em {pos:,}")
+        if fim > c.tamanho:
+            raise ErroZst(f"frame em {pos:,} passa do fim do arquivo")
+        pos = fim
+    return frames
+
+
+def _tabela_seekable(ler_faixa: LerFaixa, tamanho: int, cauda: bytes) -> Optional[Tuple[List[FrameZst], int]]:
+    """Frames da tabela do formato seekable (+ leituras extras), ou None se não houver."""
+    if len(cauda) < 9 or int.from_bytes(cauda[-4:], "little") != MAGIC_SEEKABLE:
+        return None
+    n = int.from_bytes(cauda[-9:-5], "little")
+    tam_entrada = 12 if cauda[-5] & 0x80 else 8
+    tam_tabela = n * tam_entrada
+    inicio_frame = tamanho - 9 - tam_tabela - 8
+    if inicio_frame < 0:
+        return None
+
+    inicio_cauda = tamanho - len(cauda)
+    leituras = 0
+    if inicio_frame >= inicio_cauda:
+        bloco = cauda[inicio_frame - inicio_cauda:]
+    else:
+        bloco = ler_faixa(inicio_frame, tamanho - 1)
+        leituras = 1
+    if (
+        int.from_bytes(bloco[:4], "little") != MAGIC_TABELA_SEEK
+        or int.from_bytes(bloco[4:8], "little") != tam_tabela + 9
+    ):
+        return None
+
+    frames = []
+    offset = 0
+    for i in range(n):
+        entrada = bloco[8 + i * tam_entrada: 8 + (i + 1) * tam_entrada]
+        comprimido = int.from_bytes(entrada[0:4], "little")
+        descomprimido = int.from_bytes(entrada[4:8], "little")
+        frames.append(FrameZst(offset, comprimido, descomprimido))
+        offset += comprimido
+    if offset != inicio_frame:
+        return None  # tabela não bate com o arquivo
+    frames.append(FrameZst(inicio_frame, tamanho - inicio_frame, None, pulavel=True))
+    return frames, leituras
+
+
+def _amostra(cabeca: bytes) -> Tuple[Optional[float], Optional[float]]:
+    """(bytes descomprimidos por byte comprimido, "\\n" por byte descomprimido) do início do arquivo."""
+    if zstd is None or not cabeca:
+        return None, None
+    obj = zstd.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW).decompressobj()
+    try:
+        saida = obj.decompress(cabeca)
+    except zstd.ZstdError:
+        return None, None
+    if not saida:
+        return None, None
+    consumido = len(cabeca) - len(obj.unused_data) if obj.eof else len(cabeca)
+    return len(saida) / max(consumido, 1), saida.count(b"\n") / len(saida)
+
+
+def inspecionar(
+    ler_faixa: LerFaixa,
+    tamanho: int,
+    nome: str = "",
+    varrer: bool = False,
+    amostra_mb: int = ZST_AMOSTRA_MB,
+    janela_varredura: int = JANELA_VARREDURA_GCS,
+) -> IndiceZst:
+    """Monta o IndiceZst de um .zst de `tamanho` bytes lido por `ler_faixa`."""
+    indice = IndiceZst(nome=nome, tamanho=tamanho)
+    if tamanho < 4:
+        indice.magic = ler_faixa(0, tamanho - 1).hex(" ") if tamanho else ""
+        indice.leituras = 1 if tamanho else 0
+        return indice
+
+    c = _Cursor(ler_faixa, tamanho, janela_varredura)
+    cabeca = ler_faixa(0, min(tamanho, max(amostra_mb, 1) * 2**20) - 1)
+    c.semear(0, cabeca)
+    leituras = 1
+
+    indice.magic = cabeca[:4].hex(" ")
+    indice.magic_ok = cabeca[:4] == ZSTD_MAGIC
+    if not indice.magic_ok:
+        indice.leituras = leituras
+        return indice
+
+    try:
+        _, _, indice.janela, _ = _cabecalho_frame(c, 0)
+
+        if tamanho <= len(cabeca):
+            cauda = cabeca
+        else:
+            cauda = ler_faixa(max(0, tamanho - TAMANHO_CAUDA), tamanho - 1)
+            leituras += 1
+        tabela = _tabela_seekable(ler_faixa, tamanho, cauda)
+        if tabela is not None:
+            indice.frames, extras = tabela
+            indice.seekable = indice.completo = True
+            leituras += extras
+        elif varrer:
+            indice.frames = _varrer_frames(c)
+            indice.completo = True
+    except ErroZst as e:
+        indice.erro = str(e)
+    leituras += c.leituras
+
+    razao, densidade = _amostra(cabeca)
+    dados = indice.frames_dados
+    if indice.completo and dados and all(f.descomprimido is not None for f in dados):
+        indice.tamanho_descomprimido = sum(f.descomprimido for f in dados)
+        indice.descomprimido_exato = True
+    elif razao is not None:
+        indice.tamanho_descomprimido = int(tamanho * razao)
+    if indice.tamanho_descomprimido and densidade is not None:
+        indice.linhas_estimadas = int(indice.tamanho_descomprimido * densidade)
+
+    indice.leituras = leituras
+    return indice
+
+
+# ==========================================================
+# origem (local / GCS) + sidecar
+# ==========================================================
+def _caminho_local(uri: str) -> str:
+    return uri[len("file://"):] if uri.startswith("file://") else uri
+
+
+def _ler_faixa_local(caminho: str) -> LerFaixa:
+    def ler(inicio: int, fim: int) -> bytes:
+        with open(caminho, "rb") as f:
+            f.seek(inicio)
+            return f.read(fim - inicio + 1)
+
+    return ler
+
+
+def _ler_sidecar(uri: str, client) -> Optional[str]:
+    if uri.startswith("gs://"):
+        return ler_texto(uri + SUFIXO_INDICE, client=client)
+    try:
+        with open(_caminho_local(uri) + SUFIXO_INDICE, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _gravar_sidecar(uri: str, indice: IndiceZst, client) -> None:
+    if uri.startswith("gs://"):
+        escrever_texto(uri + SUFIXO_INDICE, indice.para_json(), content_type="application/json", client=client)
+        return
+    caminho = _caminho_local(uri) + SUFIXO_INDICE
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(indice.para_json())
+    os.replace(tmp, caminho)
+
+
+def obter_indice(
+    uri: str,
+    client=None,
+    varrer: bool = False,
+    usar_sidecar: bool = ZST_INDICE_SIDECAR,
+    refazer: bool = False,
+    logger: Optional[logging.Logger] = None,
+) -> IndiceZst:
+    """
+    Índice do .zst em `uri` (caminho local, file:// ou gs://). Usa o sidecar
+    se ele ainda bate com o arquivo (tamanho + generation/mtime e, com
+    varrer=True, se já tem os frames); senão inspeciona e grava o sidecar.
+    """
+    if uri.startswith("gs://"):
+        client = client or cliente_gcs()
+        nome_bucket, nome_blob = separar_uri(uri)
+        blob = client.bucket(nome_bucket).get_blob(nome_blob)
+        if blob is None:
+            raise FileNotFoundError(f"Não existe no GCS: {uri}")
+        tamanho, geracao = blob.size, str(blob.generation or blob.etag or "")
+        ler_faixa = lambda i, f: blob.download_as_bytes(start=i, end=f)
+        janela = JANELA_VARREDURA_GCS
+    else:
+        caminho = _caminho_local(uri)
+        st = os.stat(caminho)
+        tamanho, geracao = st.st_size, str(st.st_mtime_ns)
+        ler_faixa = _ler_faixa_local(caminho)
+        janela = JANELA_VARREDURA_LOCAL
+
+    if usar_sidecar and not refazer:
+        try:
+            texto = _ler_sidecar(uri, client)
+            salvo = IndiceZst.de_json(texto) if texto else None
+        except (ValueError, TypeError, KeyError, NotFound):
+            salvo = None
+        if (
+            salvo is not None
+            and salvo.versao == VERSAO_INDICE
+            and salvo.tamanho == tamanho
+            and salvo.geracao == geracao
+            and (salvo.completo or not varrer or not salvo.magic_ok)
+        ):
+            return salvo
+
+    indice = inspecionar(ler_faixa, tamanho, os.path.basename(uri), varrer=varrer, janela_varredura=janela)
+    indice.geracao = geracao
+    if logger:
+        logger.info(indice.resumo())
+
+    if usar_sidecar:
+        try:
+            _gravar_sidecar(uri, indice, client)
+        except Exception as e:
+            if logger:
+                logger.warning(f"⚠️ Não consegui gravar o índice de {uri}: {e}")
+    return indice
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Magic, frames e tamanho descomprimido de um .zst (local ou gs://).")
+    ap.add_argument("uris", nargs="+")
+    ap.add_argument("--varrer", action="store_true", help="sem tabela seekable, anda por todos os frames")
+    ap.add_argument("--refazer", action="store_true", help="ignora o sidecar existente")
+    ap.add_argument("--sem-sidecar", action="store_true", help="não lê nem grava <arquivo>.zst.idx.json")
+    ap.add_argument("--partes", type=int, default=0, help="mostra a divisão em N faixas para descompressão paralela")
+    args = ap.parse_args()
+
+    for uri in args.uris:
+        indice = obter_indice(uri, varrer=args.varrer, usar_sidecar=not args.sem_sidecar, refazer=args.refazer)
+        print(indice.resumo())
+        if args.partes:
+            for inicio, fim in indice.dividir(args.partes):
+                print(f"   {inicio:>15,} - {fim:>15,} ({(fim - inicio) / 2**20:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import json
+import logging
+from typing import Callable, Iterator, Optional, Tuple
+
+# Tamanho de leitura do stream descomprimido (1MB)
+CHUNK_SIZE = 2**20
+
+
+def pular_linhas(chunk: bytes, n: int) -> Tuple[bytes, int]:
+    """
+    Pula até n linhas do chunk só contando "\n" (sem split/decode).
+    Retorna (o que sobrou do chunk depois da n-ésima quebra, quantas linhas ainda faltam pular).
+    """
+    total = chunk.count(b"\n")
+    if total < n:
+        return b"", n - total
+
+    pos = -1
+    for _ in range(n):
+        pos = chunk.find(b"\n", pos + 1)
+    return chunk[pos + 1:], 0
+
+
+def iter_linhas_bytes(
+    reader,
+    chunk_size: int = CHUNK_SIZE,
+    pular: int = 0,
+    marcas=None,
+    linhas_antes: int = 0,
+) -> Iterator[bytes]:
+    """
+    Lê um stream binário (ex.: zstd stream_reader) e emite cada linha como bytes crus,
+    sem o "\n" final.
+
+    Cada chunk é quebrado uma única vez com bytes.split (em C); só o pedaço final
+    incompleto é carregado para o próximo chunk. Nada é decodificado aqui.
+
+    pular: descarta as primeiras N linhas só contando "\n" (retomada rápida).
+    marcas / linhas_antes: se o reader for um LeitorFramesZst, registra em `marcas`
+        o início de cada frame com a contagem de linhas (ver src/reddit/zst_frames.py);
+        linhas_antes é quantas linhas completas existem antes do início do stream.
+    """
+    resto = b""
+    linhas = linhas_antes
+    meio_de_linha = False
+
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            break
+
+        if marcas is not None:
+            inicio = getattr(reader, "inicio_de_frame", None)
+            if inicio is not None:
+                marcas.registrar(inicio, linhas, meio_de_linha)
+            meio_de_linha = not chunk.endswith(b"\n")
+
+        if pular:
+            antes = pular
+            chunk, pular = pular_linhas(chunk, pular)
+            linhas += antes - pular
+            if not chunk:
+                continue
+
+        partes = chunk.split(b"\n")
+        if resto:
+            partes[0] = resto + partes[0]
+        resto = partes.pop()
+        linhas += len(partes)
+
+        yield from partes
+
+    # última linha sem "\n" no fim do arquivo
+    if resto:
+        yield resto
+
+
+def decodificar_linha(
+    linha: bytes,
+    prefiltro: Optional[Callable[[bytes], bool]] = None,
+    decoder: Optional[Callable[[bytes], dict]] = None,
+) -> Optional[dict]:
+    """
+    strip + prefiltro + JSON de uma linha crua.
+    Retorna None se a linha é vazia, foi descartada pelo prefiltro ou o JSON é inválido.
+    """
+    linha = linha.strip()
+    if not linha:
+        return None
+
+    if prefiltro is not None and not prefiltro(linha):
+        return None
+
+    try:
+        # decode só das linhas que sobreviveram ao prefiltro
+        if decoder is None:
+            return json.loads(linha.decode("utf-8", errors="ignore"))
+        return decoder(linha)
+    except Exception:
+        # linha ruim / incompleta / json quebrado -> ignora
+        return None
+
+
+def iter_registros(
+    reader,
+    skip_to: int = 0,
+    logger: Optional[logging.Logger] = None,
+    filename: str = "",
+    prefiltro: Optional[Callable[[bytes], bool]] = None,
+    chunk_size: int = CHUNK_SIZE,
+    decoder: Optional[Callable[[bytes], dict]] = None,
+    linhas_antes: int = 0,
+    marcas=None,
+) -> Iterator[Tuple[dict, int]]:
+    """
+    Lê um JSONL (já descomprimido) em stream, emitindo (obj, num_linha).
+
+    skip_to: pula as primeiras N linhas (checkpoint), só contando "\n".
+    prefiltro: função barata sobre os bytes crus da linha; se retornar False,
+               a linha é descartada sem decode/json.loads.
+    decoder: função bytes -> dict (ver src/reddit/json_decoder.py);
+             padrão: json da stdlib com decode(errors="ignore").
+    linhas_antes: linhas que já ficaram antes do início do reader (retomada a
+                  partir de um frame no meio do arquivo).
+    marcas: MarcasFrames a preencher com o início de cada frame zstd.
+    """
+    pular = max(0, skip_to - linhas_antes)
+    if logger and pular:
+        logger.info(f"[{filename}] ⏭️ Pulando {pular:,} linhas (só contando quebras)...")
+
+    total_lidas = linhas_antes + pular
+
+    for linha in iter_linhas_bytes(reader, chunk_size, pular=pular, marcas=marcas, linhas_antes=linhas_antes):
+        total_lidas += 1
+
+        if logger and total_lidas % 1_000_000 == 0:
+            logger.info(f"[{filename}] 📖 Lendo: {total_lidas:,} linhas...")
+
+        obj = decodificar_linha(linha, prefiltro, decoder)
+        if obj is None:
+            continue
+
+        yield obj, total_lidas
@@ -0,0 +1,230 @@
+"""
+Acesso ao GCS dentro do processo, com um storage.Client compartilhado.
+
+Os scripts chamavam `gsutil ls/cat/cp/rm` num subprocesso: cada chamada sobe
+um Python novo e autentica de novo, e um checkpoint de poucos bytes levava
+segundos. Aqui:
+
+  - cliente_gcs() devolve um storage.Client por processo (criado na primeira
+    chamada; num processo filho do fork cria outro) com o pool de conexões
+    HTTP ampliado para GCS_POOL_CONEXOES, já que download em fatias, prefetch
+    e upload composto usam várias threads no mesmo cliente;
+  - listar / ler_bytes / ler_texto / escrever_texto / remover recebem URIs
+    gs://bucket/caminho; checkpoint é um upload_from_string (uma requisição);
+  - enviar_arquivo sobe arquivos com upload resumível em pedaços de
+    GCS_UPLOAD_CHUNK_MB (pedaço que falha é reenviado, não o arquivo todo);
+    acima de GCS_UPLOAD_COMPOSTO_MB o arquivo vai em GCS_UPLOAD_PARTES partes
+    paralelas juntadas com compose (o "parallel composite upload" do gsutil).
+    No fim confere tamanho e crc32c com o arquivo local.
+
+Objeto composto não tem md5, só crc32c: para baixar com `gsutil cp` é preciso
+o crcmod compilado; pelo google-cloud-storage (download_gcs.py) não muda nada.
+
+Para testar sem GCS de verdade, com STORAGE_EMULATOR_HOST definido (ex.:
+fake-gcs-server em http://localhost:4443) o cliente é criado com credenciais
+anônimas; todas as funções também aceitam `client=` (um fake, nos testes).
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from google.cloud import storage
+    from google.cloud.storage.retry import DEFAULT_RETRY
+except ImportError:  # opcional
+    storage = None
+    DEFAULT_RETRY = None
+
+try:
+    from google.api_core.exceptions import NotFound
+except ImportError:  # opcional
+    class NotFound(Exception):
+        """Substituto sem o google-api-core (só para o except abaixo funcionar com clientes fake)."""
+
+try:
+    from requests.adapters import HTTPAdapter
+except ImportError:  # opcional
+    HTTPAdapter = None
+
+from src.utils.download_gcs import conferir_integridade
+
+POOL_CONEXOES = int(os.getenv("GCS_POOL_CONEXOES", "32"))
+UPLOAD_CHUNK_MB = int(os.getenv("GCS_UPLOAD_CHUNK_MB", "32"))  # múltiplo de 256 KB, como o GCS exige
+UPLOAD_COMPOSTO_MB = int(os.getenv("GCS_UPLOAD_COMPOSTO_MB", "150"))
+UPLOAD_PARTES = int(os.getenv("GCS_UPLOAD_PARTES", "8"))
+
+LIMITE_COMPOSE = 32  # máximo de objetos de origem num compose
+LIMITE_COMPONENTES = 1024  # máximo de componentes de um objeto composto (component_count)
+
+
+# ==========================================================
+# cliente
+# ==========================================================
+_clientes: Dict[int, object] = {}
+_lock = threading.Lock()
+
+
+def _ampliar_pool(client, pool_conexoes: int) -> None:
+    # a sessão do google-auth guarda 10 conexões por host; com mais threads do
+    # que isso as excedentes abrem (e fecham) uma conexão TLS a cada pedido
+    if HTTPAdapter is None or pool_conexoes <= 10:
+        return
+    adaptador = HTTPAdapter(pool_connections=pool_conexoes, pool_maxsize=pool_conexoes)
+    client._http.mount("https://", adaptador)
+    client._http.mount("http://", adaptador)  # emulador
+
+
+def _criar_cliente(pool_conexoes: int):
+    if storage is None:
+        raise ImportError("google-cloud-storage não instalado (pip install google-cloud-storage).")
+    if os.getenv("STORAGE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+
+        client = storage.Client(
+            project=os.getenv("GOOGLE_CLOUD_PROJECT", "emulador"), credentials=AnonymousCredentials()
+        )
+    else:
+        client = storage.Client()
+    _ampliar_pool(client, pool_conexoes)
+    return client
+
+
+def cliente_gcs(pool_conexoes: int = POOL_CONEXOES):
+    """storage.Client compartilhado do processo atual (as conexões não atravessam um fork)."""
+    pid = os.getpid()
+    with _lock:
+        client = _clientes.get(pid)
+        if client is None:
+            _clientes.clear()  # o do processo pai, herdado no fork
+            client = _clientes[pid] = _criar_cliente(pool_conexoes)
+    return client
+
+
+# ==========================================================
+# URIs e objetos pequenos
+# ==========================================================
+def separar_uri(uri: str) -> Tuple[str, str]:
+    """gs://bucket/caminho -> (bucket, caminho)."""
+    if not uri.startswith("gs://"):
+        raise ValueError(f"URI do GCS inválida: {uri}")
+    bucket, _, caminho = uri[len("gs://"):].partition("/")
+    if not bucket or not caminho:
+        raise ValueError(f"URI do GCS inválida: {uri}")
+    return bucket, caminho
+
+
+def _blob(uri: str, client=None, **kwargs):
+    bucket, caminho = separar_uri(uri)
+    return (client or cliente_gcs()).bucket(bucket).blob(caminho, **kwargs)
+
+
+def listar(uri_prefixo: str, sufixo: str = "", client=None) -> List[str]:
+    """
+    URIs gs:// dos objetos logo abaixo de uri_prefixo (como `gsutil ls`, sem
+    descer nas "pastas"), terminando em `sufixo`, em ordem.
+    """
+    bucket, _, prefixo = uri_prefixo[len("gs://"):].partition("/")
+    client = client or cliente_gcs()
+    blobs = client.list_blobs(bucket, prefix=prefixo, delimiter="/")
+    return sorted(f"gs://{bucket}/{b.name}" for b in blobs if b.name.endswith(sufixo) and b.name != prefixo)
+
+
+def ler_bytes(uri: str, inicio: int = 0, fim: Optional[int] = None, client=None) -> bytes:
+    """Bytes [inicio, fim] (inclusivo) do objeto; fim=None vai até o final."""
+    return _blob(uri, client).download_as_bytes(start=inicio, end=fim)
+
+
+def ler_texto(uri: str, client=None) -> Optional[str]:
+    """Conteúdo do objeto como texto, ou None se não existir."""
+    try:
+        return _blob(uri, client).download_as_text(encoding="utf-8")
+    except NotFound:
+        return None
+
+
+def escrever_texto(uri: str, texto: str, content_type: str = "text/plain", client=None) -> None:
+    """Grava o objeto numa requisição só (atômico: fica o conteúdo antigo ou o novo inteiro)."""
+    _blob(uri, client).upload_from_string(texto, content_type=content_type, retry=DEFAULT_RETRY)
+
+
+def remover(uri: str, client=None) -> bool:
+    """Apaga o objeto; False se ele não existia."""
+    try:
+        _blob(uri, client).delete()
+        return True
+    except NotFound:
+        return False
+
+
+# ==========================================================
+# upload de arquivos
+# ==========================================================
+def _partes(tamanho: int, partes: int) -> List[Tuple[int, int]]:
+    """(inicio, tamanho) de `partes` pedaços contíguos cobrindo [0, tamanho)."""
+    passo = -(-tamanho // partes)
+    return [(i, min(passo, tamanho - i)) for i in range(0, tamanho, passo)]
+
+
+def _enviar_parte(bucket, nome: str, caminho: str, inicio: int, tamanho: int, chunk: int):
+    parte = bucket.blob(nome, chunk_size=chunk)
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        parte.upload_from_file(f, size=tamanho, rewind=False, retry=DEFAULT_RETRY)
+    return parte
+
+
+def enviar_arquivo(
+    caminho: str,
+    uri: str,
+    logger: Optional[logging.Logger] = None,
+    client=None,
+    partes: int = UPLOAD_PARTES,
+    composto_mb: int = UPLOAD_COMPOSTO_MB,
+    chunk_mb: int = UPLOAD_CHUNK_MB,
+) -> None:
+    """
+    Sobe `caminho` para `uri` (resumível; composto em partes paralelas acima
+    de composto_mb) e confere tamanho/crc32c. Levanta exceção se falhar.
+    """
+    nome_bucket, nome = separar_uri(uri)
+    bucket = (client or cliente_gcs()).bucket(nome_bucket)
+    tamanho = os.path.getsize(caminho)
+    chunk = max(1, chunk_mb) * 2**20
+    partes = min(max(1, partes), LIMITE_COMPOSE)
+
+    t0 = time.perf_counter()
+    if partes <= 1 or tamanho < max(composto_mb * 2**20, partes):
+        destino = bucket.blob(nome, chunk_size=chunk)
+        destino.upload_from_filename(caminho, retry=DEFAULT_RETRY)
+        detalhe = "resumível"
+    else:
+        fatias = _partes(tamanho, partes)
+        nomes = [f"{nome}.parte-{i:02d}" for i in range(len(fatias))]
+        try:
+            with ThreadPoolExecutor(max_workers=len(fatias)) as pool:
+                futuros = [
+                    pool.submit(_enviar_parte, bucket, n, caminho, inicio, tam, chunk)
+                    for n, (inicio, tam) in zip(nomes, fatias)
+                ]
+                origens = [futuro.result() for futuro in futuros]
+            destino = bucket.blob(nome)
+            destino.compose(origens, retry=DEFAULT_RETRY)
+        finally:
+            for n in nomes:
+                try:
+                    bucket.blob(n).delete()
+                except NotFound:
+                    pass
+        detalhe = f"{len(fatias)} partes em paralelo + compose"
+    dt = max(time.perf_counter() - t0, 1e-9)
+
+    conferir_integridade(caminho, destino, logger)
+    if logger:
+        logger.info(
+            f"☁️ {uri}: {tamanho / 2**20:,.1f} MB em {dt:,.1f} s "
+            f"({tamanho / 2**20 / dt:,.1f} MB/s, {detalhe}) ✅ íntegro"
+        )
@@ -1,5 +1,4 @@
 import csv
-import io
 import os
 import re
 from collections import Counter
@@ -7,6 +6,8 @@ from typing import Dict, List, Optional, Tuple
 
 from google.cloud import storage
 
+from src.utils.tabela import LeitorTabela, preferir_parquet
+
 # =======================
 # CONSTANTES
 # =======================
@@ -28,8 +29,8 @@ SUBREDDIT_COL_CANDIDATES = [
 ]
 
 # Regex para aceitar somente:
-# RC_2023-01_BR.csv, RC_2024-12_BR.csv, etc.
-VALID_FILENAME_RE = re.compile(r"^RC_\d{4}-\d{2}_BR\.csv$", re.IGNORECASE)
+# RC_2023-01_BR.csv, RC_2024-12_BR.csv, RC_2025-03_BR.parquet, etc.
+VALID_FILENAME_RE = re.compile(r"^RC_\d{4}-\d{2}_BR\.(csv|parquet)$", re.IGNORECASE)
 
 
 def is_blank_row(row: Dict[str, str]) -> bool:
@@ -59,6 +60,7 @@ def detect_subreddit_col(fieldnames: List[str]) -> Optional[str]:
 
 
 def iter_csv_blobs(client: storage.Client, bucket: storage.Bucket, prefix: str):
+    blobs = {}
     for blob in client.list_blobs(bucket, prefix=prefix):
         name = blob.name
 
@@ -71,11 +73,15 @@ def iter_csv_blobs(client: storage.Client, bucket: storage.Bucket, prefix: str):
         if base.lower().endswith("_old.csv"):
             continue
 
-        # Aceita somente RC_YYYY-MM_BR.csv
+        # Aceita somente RC_YYYY-MM_BR.csv / .parquet
         if not VALID_FILENAME_RE.match(base):
             continue
 
-        yield blob
+        blobs[name] = blob
+
+    # mesmo mês em CSV e Parquet: conta só o Parquet
+    for name in preferir_parquet(list(blobs)):
+        yield blobs[name]
 
 
 def count_subreddits_in_csv_blob(blob: storage.Blob) -> Tuple[Counter, int, Optional[str]]:
@@ -89,12 +95,14 @@ def count_subreddits_in_csv_blob(blob: storage.Blob) -> Tuple[Counter, int, Opti
     non_blank_records = 0
 
     with blob.open("rb") as f:
-        text = io.TextIOWrapper(f, encoding="utf-8", errors="replace", newline="")
-        reader = csv.DictReader(text)
-        sub_col = detect_subreddit_col(reader.fieldnames or [])
+        leitor = LeitorTabela(f, blob.name)
+        sub_col = detect_subreddit_col(leitor.campos)
+
+        # no Parquet lê só a coluna de subreddit (e lá não existe linha em branco)
+        colunas = [sub_col] if (leitor.parquet and sub_col) else None
 
-        for row in reader:
-            if not row or is_blank_row(row):
+        for row in leitor.linhas(colunas):
+            if not row or (not leitor.parquet and is_blank_row(row)):
                 continue
 
             non_blank_records += 1
@@ -0,0 +1,296 @@
+"""
+Download de blobs grandes do GCS: fatias em paralelo + conferência de crc32c
++ cache local.
+
+Antes cada script fazia blob.download_to_filename (um stream só) e baixava o
+mesmo CSV de vários GB de novo a cada rodada. Aqui:
+
+  - o blob é dividido em fatias de GCS_DOWNLOAD_FATIA_MB baixadas por
+    GCS_DOWNLOAD_PARTES threads, cada uma escrevendo direto na sua posição do
+    arquivo (sem juntar nada em memória); fatia que falha é pedida de novo;
+  - no fim o arquivo inteiro é conferido com o crc32c do blob (google-crc32c,
+    que vem com o google-cloud-storage; sem ele, só o tamanho é conferido);
+  - o arquivo baixado fica num cache local endereçado por conteúdo: a chave é
+    bucket + nome + generation (cada sobrescrita no GCS gera outra
+    generation, então uma entrada nunca fica velha). O destino é um hardlink
+    para a entrada (ou cópia, se estiver em outro disco). O cache é limitado a
+    GCS_CACHE_GB e descarta as entradas usadas há mais tempo (LRU pelo mtime,
+    que é atualizado a cada acerto). GCS_CACHE_GB=0 desliga o cache.
+
+Uso:
+    baixar_blob(client.bucket(bucket), nome_blob, caminho_local, logger=logger)
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+try:
+    import google_crc32c
+except ImportError:  # opcional
+    google_crc32c = None
+
+DOWNLOAD_PARTES = int(os.getenv("GCS_DOWNLOAD_PARTES", "8"))
+DOWNLOAD_FATIA_MB = int(os.getenv("GCS_DOWNLOAD_FATIA_MB", "64"))
+CACHE_DIR = os.getenv("GCS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "lgbtminas_gcs"))
+CACHE_GB = float(os.getenv("GCS_CACHE_GB", "50"))
+
+TENTATIVAS = 5
+ESPERA_INICIAL = 0.5  # segundos; dobra a cada nova tentativa
+LEITURA_CRC = 8 * 2**20
+
+
+class ErroIntegridade(IOError):
+    """O arquivo baixado não bate com o tamanho/crc32c do blob."""
+
+
+def _log(logger: Optional[logging.Logger], msg: str) -> None:
+    if logger:
+        logger.info(msg)
+
+
+# ==========================================================
+# crc32c
+# ==========================================================
+def crc32c_arquivo(caminho: str) -> Optional[str]:
+    """crc32c do arquivo no formato do GCS (base64 dos 4 bytes big-endian), ou None sem google-crc32c."""
+    if google_crc32c is None:
+        return None
+    soma = google_crc32c.Checksum()
+    with open(caminho, "rb") as f:
+        while True:
+            bloco = f.read(LEITURA_CRC)
+            if not bloco:
+                break
+            soma.update(bloco)
+    return base64.b64encode(soma.digest()).decode("ascii")
+
+
+def conferir_integridade(caminho: str, blob, logger: Optional[logging.Logger] = None) -> None:
+    tamanho = os.path.getsize(caminho)
+    if blob.size is not None and tamanho != blob.size:
+        raise ErroIntegridade(f"{blob.name}: baixados {tamanho:,} bytes, o blob tem {blob.size:,}")
+
+    if not blob.crc32c:
+        return
+    crc = crc32c_arquivo(caminho)
+    if crc is None:
+        if logger:
+            logger.warning(f"⚠️ google-crc32c não instalado: {blob.name} conferido só pelo tamanho")
+        return
+    if crc != blob.crc32c:
+        raise ErroIntegridade(f"{blob.name}: crc32c {crc} != {blob.crc32c} do GCS")
+
+
+# ==========================================================
+# download em fatias
+# ==========================================================
+def _fatias(tamanho: int, tamanho_fatia: int) -> List[Tuple[int, int]]:
+    """(inicio, fim) inclusivos cobrindo [0, tamanho)."""
+    return [(i, min(i + tamanho_fatia, tamanho) - 1) for i in range(0, tamanho, tamanho_fatia)]
+
+
+def _baixar_fatia(blob, caminho: str, inicio: int, fim: int, logger: Optional[logging.Logger]) -> None:
+    espera = ESPERA_INICIAL
+    tentativa = 1
+    while True:
+        try:
+            with open(caminho, "r+b") as f:
+                f.seek(inicio)
+                blob.download_to_file(f, start=inicio, end=fim)
+                escritos = f.tell() - inicio
+            if escritos != fim - inicio + 1:
+                raise IOError(f"fatia {inicio:,}-{fim:,} veio com {escritos:,} bytes")
+            return
+        except Exception as e:
+            if tentativa >= TENTATIVAS:
+                raise
+            tentativa += 1
+            if logger:
+                logger.warning(
+                    f"🔁 [{blob.name}] falha na fatia {inicio:,}-{fim:,} ({e}); "
+                    f"tentativa {tentativa}/{TENTATIVAS} em {espera:.1f}s"
+                )
+            time.sleep(espera)
+            espera *= 2
+
+
+def baixar_em_fatias(
+    blob,
+    caminho: str,
+    partes: int = DOWNLOAD_PARTES,
+    fatia_mb: int = DOWNLOAD_FATIA_MB,
+    logger: Optional[logging.Logger] = None,
+) -> None:
+    """
+    Baixa `blob` (com size/crc32c carregados, ex.: bucket.get_blob) para `caminho`
+    em fatias paralelas e confere a integridade. Blob pequeno vai num pedido só.
+    """
+    tamanho = blob.size or 0
+    fatias = _fatias(tamanho, max(1, fatia_mb) * 2**20)
+
+    # arquivo já no tamanho final: cada thread escreve na sua faixa
+    with open(caminho, "wb") as f:
+        f.truncate(tamanho)
+
+    t0 = time.perf_counter()
+    if len(fatias) <= 1 or partes <= 1:
+        for inicio, fim in fatias:
+            _baixar_fatia(blob, caminho, inicio, fim, logger)
+    else:
+        with ThreadPoolExecutor(max_workers=min(partes, len(fatias))) as pool:
+            for futuro in [pool.submit(_baixar_fatia, blob, caminho, i, f, logger) for i, f in fatias]:
+                futuro.result()
+    dt = max(time.perf_counter() - t0, 1e-9)
+
+    conferir_integridade(caminho, blob, logger)
+    _log(
+        logger,
+        f"⬇️ {blob.name}: {tamanho / 2**20:,.1f} MB em {dt:,.1f} s ({tamanho / 2**20 / dt:,.1f} MB/s, "
+        f"{len(fatias)} fatias, {min(partes, max(len(fatias), 1))} em paralelo) ✅ íntegro",
+    )
+
+
+# ==========================================================
+# cache local
+# ==========================================================
+class CacheDownloads:
+    """Arquivos baixados do GCS, um por (bucket, nome, generation), com limite de tamanho (LRU)."""
+
+    def __init__(self, diretorio: str = CACHE_DIR, limite_gb: float = CACHE_GB):
+        self.diretorio = diretorio
+        self.limite = int(limite_gb * 2**30)
+        self._lock = threading.Lock()
+
+    def chave(self, blob) -> str:
+        identidade = f"{blob.bucket.name}/{blob.name}#{blob.generation or blob.etag}"
+        return hashlib.sha256(identidade.encode("utf-8")).hexdigest()
+
+    def caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], chave)
+
+    def obter(self, blob) -> Optional[str]:
+        caminho = self.caminho(self.chave(blob))
+        if not os.path.exists(caminho):
+            return None
+        os.utime(caminho)  # marca como usado agora (LRU)
+        return caminho
+
+    def guardar(self, blob, baixar) -> str:
+        """
+        baixar(caminho_tmp) grava o blob conferido em caminho_tmp; a entrada só
+        aparece no cache (os.replace) depois disso, então nunca fica pela metade.
+        """
+        caminho = self.caminho(self.chave(blob))
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".parcial")
+        os.close(fd)
+        try:
+            baixar(tmp)
+            os.replace(tmp, caminho)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.despejar(manter=caminho)
+        return caminho
+
+    def _entradas(self) -> List[Tuple[float, int, str]]:
+        entradas = []
+        for raiz, _, arquivos in os.walk(self.diretorio):
+            for nome in arquivos:
+                if nome.endswith(".parcial"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                entradas.append((st.st_mtime, st.st_size, caminho))
+        return entradas
+
+    def despejar(self, manter: Optional[str] = None) -> int:
+        """Remove as entradas menos usadas até caber no limite. Retorna quantas removeu."""
+        with self._lock:
+            entradas = sorted(self._entradas())
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            removidas = 0
+            for _, tamanho, caminho in entradas:
+                if total <= self.limite:
+                    break
+                if caminho == manter:
+                    continue
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+                removidas += 1
+            return removidas
+
+
+_cache_padrao: Optional[CacheDownloads] = None
+
+
+def cache_padrao() -> Optional[CacheDownloads]:
+    global _cache_padrao
+    if CACHE_GB <= 0:
+        return None
+    if _cache_padrao is None:
+        _cache_padrao = CacheDownloads()
+    return _cache_padrao
+
+
+def _entregar(origem: str, destino: str) -> None:
+    """Hardlink da entrada do cache no destino (cópia se for outro disco)."""
+    if os.path.exists(destino):
+        os.remove(destino)
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copyfile(origem, destino)
+
+
+def baixar_blob(
+    bucket,
+    nome_blob: str,
+    destino: str,
+    logger: Optional[logging.Logger] = None,
+    usar_cache: bool = True,
+    partes: int = DOWNLOAD_PARTES,
+    fatia_mb: int = DOWNLOAD_FATIA_MB,
+) -> str:
+    """
+    Baixa gs://<bucket>/<nome_blob> para `destino` (fatias paralelas + crc32c),
+    passando pelo cache local se ligado. Retorna `destino`.
+    usar_cache=False para blobs que mudam a toda hora (checkpoints).
+    """
+    blob = bucket.get_blob(nome_blob)  # já traz size, generation e crc32c
+    if blob is None:
+        raise FileNotFoundError(f"Não achei: gs://{bucket.name}/{nome_blob}")
+
+    pasta = os.path.dirname(destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+    cache = cache_padrao() if usar_cache else None
+    if cache is None:
+        # destino pode ser um hardlink de uma entrada do cache: nunca escrever por cima dele
+        if os.path.exists(destino):
+            os.remove(destino)
+        baixar_em_fatias(blob, destino, partes, fatia_mb, logger)
+        return destino
+
+    em_cache = cache.obter(blob)
+    if em_cache is not None:
+        _log(logger, f"💾 {nome_blob}: do cache local (generation {blob.generation}), sem download")
+    else:
+        em_cache = cache.guardar(blob, lambda tmp: baixar_em_fatias(blob, tmp, partes, fatia_mb, logger))
+    _entregar(em_cache, destino)
+    return destino
@@ -4,11 +4,13 @@ import os
 import csv
 import time
 import tempfile
-import subprocess
 
 from google.cloud import storage
 
+from src.utils.armazenamento_gcs import cliente_gcs, enviar_arquivo
+from src.utils.download_gcs import baixar_blob
 from src.utils.logger import setup_logger
+from src.utils.tabela import LeitorTabela, eh_tabela, preferir_parquet
 
 
 BUCKET = os.getenv("TYBYRIA_BUCKET", "lgbtminas-dados")
@@ -44,7 +46,7 @@ def normalize_subreddit(value: str) -> str:
 def list_csv_files(client: storage.Client, bucket: str, prefix: str):
     for blob in client.list_blobs(bucket, prefix=prefix):
         name = blob.name
-        if not name.endswith(".csv"):
+        if not eh_tabela(name):
             continue
         if name.endswith(OUTPUT_SUFFIX):
             continue
@@ -78,15 +80,15 @@ def filter_one_file(client: storage.Client, logger, input_blob_name: str):
             os.path.splitext(filename)[0] + OUTPUT_SUFFIX
         )
 
-        client.bucket(bucket).blob(input_blob_name).download_to_filename(local_in)
+        baixar_blob(client.bucket(bucket), input_blob_name, local_in, logger=logger)
 
         total_rows = 0
         kept_rows = 0
 
-        with open(local_in, "r", encoding="utf-8", newline="") as fin, open(local_out, "w", encoding="utf-8", newline="") as fout:
-            reader = csv.DictReader(fin)
+        with open(local_in, "rb") as fin, open(local_out, "w", encoding="utf-8", newline="") as fout:
+            leitor = LeitorTabela(fin, filename)
 
-            fieldnames = reader.fieldnames or []
+            fieldnames = leitor.campos
             if SUBREDDIT_COL not in fieldnames:
                 raise ValueError(
                     f"Coluna '{SUBREDDIT_COL}' não existe em {filename}. Colunas encontradas: {fieldnames}"
@@ -95,7 +97,7 @@ def filter_one_file(client: storage.Client, logger, input_blob_name: str):
             writer = csv.DictWriter(fout, fieldnames=fieldnames)
             writer.writeheader()
 
-            for row in reader:
+            for row in leitor.linhas():
                 total_rows += 1
 
                 subreddit_value = normalize_subreddit(row.get(SUBREDDIT_COL, ""))
@@ -109,10 +111,7 @@ def filter_one_file(client: storage.Client, logger, input_blob_name: str):
         )
 
         gcs_out = f"gs://{bucket}/{out_blob_name}"
-        cmd = ["gsutil", "-q", "cp", local_out, gcs_out]
-
-        logger.info(f"☁️ Upload via gsutil: {' '.join(cmd)}")
-        subprocess.check_call(cmd)
+        enviar_arquivo(local_out, gcs_out, logger, client=client)
 
         logger.info(f"✅ Arquivo salvo: {gcs_out}")
 
@@ -128,12 +127,13 @@ def main():
     logger.info(f"OUTPUT_SUFFIX={OUTPUT_SUFFIX}")
     logger.info(f"TARGET_SUBREDDITS={sorted(TARGET_SUBREDDITS)}")
 
-    client = storage.Client()
+    client = cliente_gcs()
 
     all_files = []
     for prefix in PREFIXES:
-        files = list(list_csv_files(client, BUCKET, prefix))
-        logger.info(f"🧾 Prefixo {prefix}: encontrados {len(files)} CSVs")
+        # CSV ou Parquet; se o mesmo arquivo existe nos dois, fica o Parquet
+        files = preferir_parquet(list(list_csv_files(client, BUCKET, prefix)))
+        logger.info(f"🧾 Prefixo {prefix}: encontrados {len(files)} arquivos (CSV/Parquet)")
         all_files.extend(files)
 
     logger.info(f"🧾 Total de arquivos a avaliar: {len(all_files)}")
@@ -1,12 +1,12 @@
 import os
-import csv
-import io
 from typing import Dict, List, Callable, Optional
 from statistics import mean
 
 from google.cloud import storage
 import matplotlib.pyplot as plt
 
+from src.utils.tabela import LeitorTabela, preferir_parquet, sem_extensao
+
 
 # =======================
 # CONSTANTES
@@ -64,7 +64,10 @@ def collect_scores(
     raw_min: Optional[float] = None,
     raw_max: Optional[float] = None,
 ) -> List[float]:
-    blobs = list(client.list_blobs(bucket_name, prefix=prefix))
+    # aceita a mesma tabela em CSV ou Parquet (se tiver os dois, lê o Parquet)
+    sufixos = (file_suffix, sem_extensao(file_suffix) + ".parquet")
+    blobs = {b.name: b for b in client.list_blobs(bucket_name, prefix=prefix)}
+    nomes = preferir_parquet([n for n in blobs if n.lower().endswith(sufixos)])
 
     scores: List[float] = []
     used_files = 0
@@ -74,29 +77,24 @@ def collect_scores(
     out_of_range_raw = 0
     out_of_range_final = 0
 
-    for blob in blobs:
-        name = blob.name
-        lname = name.lower()
-
-        if not lname.endswith(file_suffix):
-            continue
+    for name in nomes:
+        blob = blobs[name]
 
         used_files += 1
         print(f"📄 [{label}] Lendo: gs://{bucket_name}/{name}")
 
         with blob.open("rb") as f:
-            reader = csv.DictReader(
-                io.TextIOWrapper(f, encoding="utf-8", errors="replace")
-            )
+            leitor = LeitorTabela(f, name)
 
-            if not reader.fieldnames or score_col not in reader.fieldnames:
+            if score_col not in leitor.campos:
                 print(f"⚠️ [{label}] Pulando {name}: não tem coluna '{score_col}'")
                 continue
 
-            for row in reader:
+            # no Parquet lê só a coluna do score
+            for row in leitor.linhas(colunas=[score_col]):
                 total_rows += 1
 
-                if is_blank_row(row):
+                if not leitor.parquet and is_blank_row(row):
                     blank_rows += 1
                     continue
 
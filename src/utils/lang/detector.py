@@ -1,7 +1,217 @@
-from langdetect import detect, detect_langs, DetectorFactory
+"""
+Identificação de idioma (is_portuguese / get_lang / detect_many).
 
-# para resultados reproduzíveis
-DetectorFactory.seed = 0
+Backends (o primeiro disponível é usado em "auto"):
+  - fasttext: modelo lid.176 (.bin ou .ftz) num arquivo local, prediz o lote
+    inteiro numa chamada só (ordens de grandeza mais rápido que o langdetect);
+  - langdetect: o comportamento antigo, um texto por vez (seed fixa).
+
+Por cima do backend, o DetectorIdioma:
+  - responde ("none", 0.0) sem chamar o modelo para texto vazio ou com menos
+    de LANG_MIN_CHARS caracteres (curto demais para qualquer modelo acertar);
+  - guarda os resultados num LRU indexado pelo hash (blake2b) do texto, assim
+    "[deleted]", copypasta e respostas repetidas só passam pelo modelo uma vez
+    e o cache não segura os textos longos na memória.
+
+Configuração por variável de ambiente:
+  LANG_BACKEND=auto|fasttext|langdetect
+  LANG_FASTTEXT_MODELO=models/lid.176.ftz
+  LANG_MIN_CHARS=3
+  LANG_CACHE=100000   (0 = desliga)
+"""
+
+import os
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fasttext
+except ImportError:  # opcional
+    fasttext = None
+
+try:
+    from langdetect import detect_langs, DetectorFactory
+
+    # para resultados reproduzíveis
+    DetectorFactory.seed = 0
+except ImportError:  # opcional
+    detect_langs = None
+
+
+LANG_BACKEND = os.getenv("LANG_BACKEND", "auto")
+LANG_FASTTEXT_MODELO = os.getenv("LANG_FASTTEXT_MODELO", "models/lid.176.ftz")
+LANG_MIN_CHARS = int(os.getenv("LANG_MIN_CHARS", "3"))
+LANG_CACHE = int(os.getenv("LANG_CACHE", "100000"))
+
+BACKENDS = ("fasttext", "langdetect")
+
+Resultado = Tuple[str, float]
+
+SEM_IDIOMA: Resultado = ("none", 0.0)
+ERRO: Resultado = ("err", 0.0)
+
+
+def backends_disponiveis(modelo_fasttext: str = LANG_FASTTEXT_MODELO) -> list:
+    disponiveis = []
+    if fasttext is not None and os.path.exists(modelo_fasttext):
+        disponiveis.append("fasttext")
+    if detect_langs is not None:
+        disponiveis.append("langdetect")
+    return disponiveis
+
+
+class BackendLangdetect:
+    nome = "langdetect"
+
+    def detectar_lote(self, textos: Sequence[str]) -> List[Resultado]:
+        resultados = []
+        for texto in textos:
+            try:
+                # langs é algo como: [pt:0.92, es:0.05, ...]
+                best = detect_langs(texto)[0]
+                resultados.append((best.lang, best.prob))
+            except Exception:
+                resultados.append(ERRO)
+        return resultados
+
+
+class BackendFastText:
+    nome = "fasttext"
+
+    _PREFIXO = "__label__"
+
+    def __init__(self, caminho_modelo: str = LANG_FASTTEXT_MODELO):
+        if not os.path.exists(caminho_modelo):
+            raise FileNotFoundError(
+                f"Modelo fastText não encontrado: {caminho_modelo} "
+                "(baixe o lid.176.ftz/.bin e aponte LANG_FASTTEXT_MODELO para ele)"
+            )
+        self.caminho_modelo = caminho_modelo
+        self.modelo = fasttext.load_model(caminho_modelo)
+
+    def detectar_lote(self, textos: Sequence[str]) -> List[Resultado]:
+        # o predict do fastText trabalha por linha: quebra de linha no meio do texto dá erro
+        linhas = [t.replace("\n", " ").replace("\r", " ") for t in textos]
+        try:
+            rotulos, probs = self.modelo.predict(linhas, k=1)
+        except Exception:
+            return [ERRO] * len(linhas)
+
+        n = len(self._PREFIXO)
+        resultados = []
+        for rotulo, prob in zip(rotulos, probs):
+            if not len(rotulo):
+                resultados.append(ERRO)
+                continue
+            # a softmax do fastText às vezes passa de 1.0 por arredondamento
+            resultados.append((rotulo[0][n:], min(float(prob[0]), 1.0)))
+        return resultados
+
+
+def obter_backend(backend: str = LANG_BACKEND, modelo_fasttext: str = LANG_FASTTEXT_MODELO):
+    """backend: "auto", "fasttext" ou "langdetect"."""
+    backend = (backend or "auto").strip().lower()
+
+    if backend == "auto":
+        disponiveis = backends_disponiveis(modelo_fasttext)
+        if not disponiveis:
+            raise ImportError("Nenhum backend de idioma disponível (instale fasttext + modelo lid.176, ou langdetect).")
+        backend = disponiveis[0]
+
+    if backend == "fasttext":
+        if fasttext is None:
+            raise ImportError("Backend 'fasttext' pedido, mas fasttext não está instalado.")
+        return BackendFastText(modelo_fasttext)
+    if backend == "langdetect":
+        if detect_langs is None:
+            raise ImportError("Backend 'langdetect' pedido, mas langdetect não está instalado.")
+        return BackendLangdetect()
+
+    raise ValueError(f"Backend de idioma desconhecido: {backend} (use auto, {', '.join(BACKENDS)})")
+
+
+def _chave(texto: str) -> bytes:
+    return blake2b(texto.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+
+class DetectorIdioma:
+    def __init__(self, backend=None, min_chars: int = LANG_MIN_CHARS, capacidade_cache: int = LANG_CACHE):
+        self.backend = backend if backend is not None else obter_backend()
+        self.min_chars = min_chars
+        self.capacidade_cache = capacidade_cache
+        self._cache: "OrderedDict[bytes, Resultado]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def detect_many(self, textos: Iterable[str]) -> List[Resultado]:
+        """(lang, prob) de cada texto, na mesma ordem. Textos repetidos no lote vão uma vez só ao modelo."""
+        textos = list(textos)
+        resultados: List[Optional[Resultado]] = [None] * len(textos)
+        pendentes: Dict[bytes, List[int]] = {}
+        textos_pendentes: List[str] = []
+
+        for i, texto in enumerate(textos):
+            if not isinstance(texto, str):
+                resultados[i] = SEM_IDIOMA
+                continue
+            texto = texto.strip()
+            if len(texto) < max(self.min_chars, 1):
+                resultados[i] = SEM_IDIOMA
+                continue
+
+            chave = _chave(texto)
+            em_cache = self._cache.get(chave) if self.capacidade_cache else None
+            if em_cache is not None:
+                self._cache.move_to_end(chave)
+                self.hits += 1
+                resultados[i] = em_cache
+                continue
+
+            self.misses += 1
+            if chave not in pendentes:
+                pendentes[chave] = []
+                textos_pendentes.append(texto)
+            pendentes[chave].append(i)
+
+        if textos_pendentes:
+            detectados = self.backend.detectar_lote(textos_pendentes)
+            for (chave, posicoes), resultado in zip(pendentes.items(), detectados):
+                for i in posicoes:
+                    resultados[i] = resultado
+                self._guardar(chave, resultado)
+
+        return resultados
+
+    def detect(self, texto: str) -> Resultado:
+        return self.detect_many([texto])[0]
+
+    def _guardar(self, chave: bytes, resultado: Resultado):
+        if not self.capacidade_cache or resultado == ERRO:
+            return
+        self._cache[chave] = resultado
+        if len(self._cache) > self.capacidade_cache:
+            self._cache.popitem(last=False)
+
+
+_detector_padrao: Optional[DetectorIdioma] = None
+
+
+def detector_padrao() -> DetectorIdioma:
+    """Detector do processo (criado na primeira chamada, para não carregar o modelo à toa)."""
+    global _detector_padrao
+    if _detector_padrao is None:
+        _detector_padrao = DetectorIdioma()
+    return _detector_padrao
+
+
+def detect_many(textos: Iterable[str]) -> List[Resultado]:
+    """(lang, prob) de cada texto usando o detector padrão."""
+    return detector_padrao().detect_many(textos)
+
+
+def is_portuguese_many(textos: Iterable[str], threshold: float = 0.80) -> List[bool]:
+    return [lang == "pt" and prob >= threshold for lang, prob in detect_many(textos)]
 
 
 def is_portuguese(texto: str, threshold: float = 0.80) -> bool:
@@ -9,30 +219,11 @@ def is_portuguese(texto: str, threshold: float = 0.80) -> bool:
     Retorna True se o texto for detectado como português (pt)
     com confiança >= threshold.
     """
-    if not isinstance(texto, str) or not texto.strip():
-        return False
-
-    try:
-        langs = detect_langs(texto)
-        # langs é algo como: [pt:0.92, es:0.05, ...]
-        best = langs[0]
-        lang = best.lang
-        prob = best.prob
-        return lang == "pt" and prob >= threshold
-    except Exception:
-        return False
+    return is_portuguese_many([texto], threshold)[0]
 
 
 def get_lang(texto: str):
     """
     Retorna (lang, prob) para debug.
     """
-    if not isinstance(texto, str) or not texto.strip():
-        return "none", 0.0
-
-    try:
-        langs = detect_langs(texto)
-        best = langs[0]
-        return best.lang, best.prob
-    except Exception:
-        return "err", 0.0
+    return detect_many([texto])[0]
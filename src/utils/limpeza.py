@@ -1,33 +1,71 @@
 import re
-import unicodedata
-import pandas
+from typing import Iterable, List
 
-def limpar_texto(texto: str) -> str:
-    if not isinstance(texto, str):
-        return ""
 
-    # Remove URLs
-    texto = re.sub(r"http\S+|www\S+|https\S+", "", texto)
+# Padrões compilados uma vez (antes eram 4 re.sub por texto)
+_RE_URL = re.compile(r"http\S+|www\S+|https\S+")
+
+
+class _TabelaLimpeza(dict):
+    r"""
+    Tabela do str.translate que troca por espaço tudo que o limpar_texto
+    descarta: pontuação/símbolos/emojis ([^\w\s]) e dígitos (\d).
+    Cada code point é classificado uma vez, na primeira vez que aparece.
+    """
+
+    def __missing__(self, cp: int) -> int:
+        c = chr(cp)
+        # mesmos critérios do re: \w = isalnum() ou "_", \s = isspace(), \d = isdecimal()
+        descarta = c.isdecimal() or not (c.isalnum() or c == "_" or c.isspace())
+        valor = 32 if descarta else cp
+        self[cp] = valor
+        return valor
+
+
+# Faixas já classificadas na importação: latim, pontuação/símbolos e emojis
+_FAIXAS_PRONTAS = ((0x0000, 0x024F), (0x2000, 0x2BFF), (0xFE00, 0xFE0F), (0x1F000, 0x1FAFF))
+
 
-    # Remove emojis e símbolos
-    texto = "".join(
-        c for c in texto
-        if unicodedata.category(c)[0] != "So"
-    )
+def _montar_tabela() -> _TabelaLimpeza:
+    tabela = _TabelaLimpeza()
+    for inicio, fim in _FAIXAS_PRONTAS:
+        for cp in range(inicio, fim + 1):
+            tabela.__missing__(cp)
+    return tabela
 
-    # Remove pontuação
-    texto = re.sub(r"[^\w\s]", " ", texto)
 
-    # Remove números
-    texto = re.sub(r"\d+", " ", texto)
+_TABELA = _montar_tabela()
 
-    # Lowercase
-    texto = texto.lower()
+
+def limpar_texto(texto: str) -> str:
+    if not isinstance(texto, str):
+        return ""
+
+    # Remove URLs (só roda a regex se puder ter URL)
+    if "http" in texto or "www" in texto:
+        texto = _RE_URL.sub("", texto)
+
+    # Remove emojis, símbolos, pontuação e números (numa passada só), depois lowercase.
+    # Obs.: a ordem importa, o lower() vem depois (ex.: "İ".lower() gera um acento combinante que fica)
+    texto = texto.translate(_TABELA).lower()
 
     # Remove espaços duplicados
-    texto = re.sub(r"\s+", " ", texto).strip()
+    return " ".join(texto.split())
+
 
-    return texto
+def limpar_textos(textos: Iterable[str]) -> List[str]:
+    """limpar_texto em lote (ex.: os textos de um bloco de registros do dump)."""
+    tabela = _TABELA
+    url = _RE_URL
+    limpos = []
+    for texto in textos:
+        if not isinstance(texto, str):
+            limpos.append("")
+            continue
+        if "http" in texto or "www" in texto:
+            texto = url.sub("", texto)
+        limpos.append(" ".join(texto.translate(tabela).lower().split()))
+    return limpos
 
 
 def limpar_dataframe_resultados(df, coluna_texto='text_original'):
@@ -35,13 +73,13 @@ def limpar_dataframe_resultados(df, coluna_texto='text_original'):
     Remove linhas onde o texto está vazio ou é apenas espaço,
     e remove duplicados para limpar a base de análise.
     """
-    # 1. Remove linhas onde a coluna de texto é NaN
-    df = df.dropna(subset=[coluna_texto])
-    
-    # 2. Remove linhas onde o texto está vazio "" ou tem apenas espaços "  "
-    df = df[df[coluna_texto].str.strip() != ""]
-    
-    # 3. (Opcional) Remove duplicados exatos para não enviesar a estatística
-    df = df.drop_duplicates(subset=[coluna_texto])
-    
+    # import local: o limpar_texto roda nos workers do dump e não precisa de numpy
+    from src.utils.limpeza_df import mascara_primeira_ocorrencia, mascara_texto_nao_vazio
+
+    # 1+2. Remove linhas com texto NaN, vazio "" ou só espaços "  " (numa passada, sem copiar a coluna)
+    df = df[mascara_texto_nao_vazio(df[coluna_texto])]
+
+    # 3. (Opcional) Remove duplicados exatos para não enviesar a estatística (compara hash, não a string)
+    df = df[mascara_primeira_ocorrencia(df[coluna_texto])]
+
     return df
\ No newline at end of file
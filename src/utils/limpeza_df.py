@@ -0,0 +1,166 @@
+"""
+Limpeza de DataFrames de texto (base do limpar_dataframe_resultados e do
+clean_df_for_tybyria) sem copiar a coluna de texto várias vezes.
+
+Antes cada passo (astype(str), strip, replace, filtro, drop_duplicates)
+gerava uma cópia inteira da coluna em objetos Python. Aqui:
+  - com a coluna em string[pyarrow] (ver dtype_texto), strip / "nan" / vazio
+    são kernels do pyarrow.compute sobre o buffer Arrow (utf8_trim_whitespace,
+    not_equal, is_in), sem um objeto Python por linha;
+  - sem pyarrow (ou coluna object) fica o caminho vetorizado do pandas (.str);
+  - ler_csv_limpo lê o CSV em blocos com pyarrow.csv e filtra cada bloco
+    (pc.filter) antes do próximo: o arquivo inteiro nunca fica na memória
+    junto com a versão limpa, como no read_csv + filtro + cópia do DataFrame;
+  - o drop_duplicates compara um hash uint64 por linha
+    (pd.util.hash_pandas_object) em vez das strings inteiras.
+
+Paridade, tempo e pico de memória contra o caminho antigo: src/bench/limpeza_df.py.
+"""
+
+import csv
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # opcional
+    pa = None
+    pc = None
+    pacsv = None
+
+# bloco de leitura do ler_csv_limpo: o pico fica em poucos blocos + as linhas já limpas
+BLOCO_CSV_MB = 8
+
+
+def dtype_texto(arrow: bool = True):
+    """dtype para colunas de texto no read_csv: string[pyarrow] se der, senão str."""
+    return "string[pyarrow]" if (arrow and pa is not None) else str
+
+
+def _array_arrow(serie: pd.Series):
+    """A coluna como array Arrow (sem copiar) se ela já é texto em Arrow; senão None."""
+    if pa is None:
+        return None
+    dtype = serie.dtype
+    em_arrow = (isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow") or (
+        isinstance(dtype, pd.ArrowDtype) and (pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype))
+    )
+    if not em_arrow:
+        return None
+    arr = pa.array(serie)
+    return arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+
+
+def mascara_texto_nao_vazio(serie: pd.Series) -> np.ndarray:
+    """
+    True onde o valor não é nulo e não é string vazia/só espaço
+    (= notna() & (str.strip() != "") do pandas, sem criar a coluna "stripada" em Python).
+    """
+    arr = _array_arrow(serie)
+    if arr is not None:
+        mascara = pc.not_equal(pc.utf8_trim_whitespace(arr), "")
+        return pc.fill_null(mascara, False).to_numpy(zero_copy_only=False)
+    try:
+        # valor não-string (ex.: número) passa, como no str.strip() != "" (NaN != "")
+        return (serie.notna() & (serie.str.strip() != "")).to_numpy(dtype=bool)
+    except AttributeError:  # coluna sem nenhuma string: .str não existe
+        return serie.notna().to_numpy(dtype=bool)
+
+
+def _normalizar_arrow(arr, vazios: Tuple[str, ...]):
+    """(textos com strip, máscara das linhas mantidas) de um array Arrow de strings."""
+    texto = pc.utf8_trim_whitespace(arr)
+    mantidas = pc.and_(
+        pc.not_equal(texto, ""),
+        pc.invert(pc.is_in(texto, value_set=pa.array(list(vazios), type=texto.type))),
+    )
+    return texto, pc.fill_null(mantidas, False)
+
+
+def normalizar_textos(serie: pd.Series, vazios: Tuple[str, ...] = ("nan",)) -> Tuple[np.ndarray, object]:
+    """
+    strip, valores em `vazios` viram "" e vazio/nulo é descartado.
+    Devolve (máscara das linhas mantidas, textos normalizados só dessas linhas,
+    como array do mesmo tipo da coluna). Mesmo resultado de
+    astype(str).str.strip().replace("nan", "") + filtro notna() & != "".
+    """
+    arr = _array_arrow(serie)
+    if arr is not None:
+        texto, mantidas = _normalizar_arrow(arr, vazios)
+        return mantidas.to_numpy(zero_copy_only=False), pd.array(pc.filter(texto, mantidas), dtype=serie.dtype)
+
+    texto = serie.astype(str).str.strip()
+    mantidas = (texto.notna() & (texto != "") & ~texto.isin(vazios)).to_numpy(dtype=bool)
+    return mantidas, texto.array[mantidas]
+
+
+def hash_textos(serie: pd.Series) -> np.ndarray:
+    """Hash uint64 de cada valor (para deduplicar sem comparar strings inteiras)."""
+    return pd.util.hash_pandas_object(serie, index=False).to_numpy()
+
+
+def mascara_primeira_ocorrencia(serie: pd.Series) -> np.ndarray:
+    """True na primeira ocorrência de cada texto (= ~duplicated(keep="first"), via hash)."""
+    return ~pd.Series(hash_textos(serie)).duplicated(keep="first").to_numpy()
+
+
+def substituir_coluna(df: pd.DataFrame, coluna: str, textos, dtype: Optional[object] = None) -> None:
+    """Troca a coluna de texto (já filtrada) mantendo o dtype original (object ou string[pyarrow])."""
+    dtype = dtype if dtype is not None else df[coluna].dtype
+    if isinstance(dtype, (pd.StringDtype, pd.ArrowDtype)):
+        df[coluna] = pd.array(textos, dtype=dtype)
+    else:
+        df[coluna] = np.asarray(textos, dtype=object)
+
+
+def filtrar_tabela_texto(tabela, coluna: str, vazios: Tuple[str, ...] = ("nan",)):
+    """normalizar_textos numa pa.Table: só as linhas mantidas, com `coluna` já normalizada."""
+    i = tabela.schema.get_field_index(coluna)
+    texto, mantidas = _normalizar_arrow(tabela.column(i), vazios)
+    return tabela.filter(mantidas).set_column(i, coluna, pc.filter(texto, mantidas))
+
+
+def ler_csv_limpo(
+    caminho: str, coluna: str, vazios: Tuple[str, ...] = ("nan",), bloco_mb: int = BLOCO_CSV_MB
+) -> Optional[pd.DataFrame]:
+    """
+    CSV -> DataFrame só com as linhas em que `coluna` sobra não vazia depois
+    do normalizar_textos, lido e filtrado bloco a bloco. Todas as colunas em
+    string[pyarrow], vazio = "" (o contrato do read_csv(dtype="string[pyarrow]",
+    keep_default_na=False) usado antes). O índice é 0..n-1.
+
+    None sem pyarrow; KeyError se o CSV não tem `coluna`.
+    """
+    if pacsv is None:
+        return None
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        nomes = next(csv.reader(f), [])
+    if coluna not in nomes:
+        raise KeyError(coluna)
+
+    leitor = pacsv.open_csv(
+        caminho,
+        read_options=pacsv.ReadOptions(block_size=bloco_mb * 2**20),
+        # textos do Reddit têm quebra de linha dentro das aspas
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            # large_string é o que o string[pyarrow] do pandas guarda: o to_pandas não converte nada
+            column_types={nome: pa.large_string() for nome in nomes},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    partes = []
+    for lote in leitor:
+        partes.append(filtrar_tabela_texto(pa.Table.from_batches([lote]), coluna, vazios))
+        del lote
+        # devolve ao sistema o que o bloco bruto usou, antes de ler o próximo
+        pa.default_memory_pool().release_unused()
+    tabela = pa.concat_tables(partes) if partes else leitor.schema.empty_table()
+    del partes
+    # string[pyarrow] embrulha os buffers do Arrow, sem copiar
+    return tabela.to_pandas(types_mapper={pa.large_string(): pd.StringDtype("pyarrow")}.get)
@@ -0,0 +1,83 @@
+"""
+Leitura de tabelas *_BR / *_vader / *_tybyria em CSV ou Parquet.
+
+LeitorTabela abre um arquivo (caminho local ou file-like binário, ex.
+blob.open("rb")) e devolve as linhas como dicts, como o csv.DictReader.
+Em Parquet, `linhas(colunas=[...])` lê só as colunas pedidas (os jobs que
+só precisam de subreddit ou de um score nem tocam nas colunas de texto).
+"""
+
+import csv
+import io
+import os
+from typing import Iterator, List, Optional
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # opcional
+    pq = None
+
+EXTENSOES = (".csv", ".parquet")
+
+# linhas por lote lido do Parquet
+LOTE_PARQUET = 65_536
+
+
+def eh_parquet(nome: str) -> bool:
+    return nome.lower().endswith(".parquet")
+
+
+def eh_tabela(nome: str) -> bool:
+    return nome.lower().endswith(EXTENSOES)
+
+
+def sem_extensao(nome: str) -> str:
+    """RC_2025-02_BR.csv / RC_2025-02_BR.parquet -> RC_2025-02_BR"""
+    base, ext = os.path.splitext(nome)
+    return base if ext.lower() in EXTENSOES else nome
+
+
+def preferir_parquet(nomes: List[str]) -> List[str]:
+    """Se a mesma tabela existe em CSV e Parquet, fica só com o Parquet."""
+    com_parquet = {sem_extensao(n) for n in nomes if eh_parquet(n)}
+    return [n for n in nomes if eh_parquet(n) or sem_extensao(n) not in com_parquet]
+
+
+class LeitorTabela:
+    """
+    Leitor de CSV/Parquet com a mesma cara do csv.DictReader.
+
+      leitor = LeitorTabela(blob.open("rb"), blob.name)
+      leitor.campos              # colunas do arquivo
+      for row in leitor.linhas(colunas=["subreddit"]): ...
+    """
+
+    def __init__(self, fonte, nome: Optional[str] = None):
+        nome = nome or (fonte if isinstance(fonte, str) else "")
+        self.parquet = eh_parquet(nome)
+
+        if self.parquet:
+            if pq is None:
+                raise RuntimeError(f"pyarrow não instalado: não dá pra ler {nome}")
+            self._pf = pq.ParquetFile(fonte)
+            self.campos: List[str] = list(self._pf.schema_arrow.names)
+        else:
+            if isinstance(fonte, str):
+                fonte = open(fonte, "rb")
+            texto = io.TextIOWrapper(fonte, encoding="utf-8", errors="replace", newline="")
+            self._reader = csv.DictReader(texto)
+            self.campos = list(self._reader.fieldnames or [])
+
+    def linhas(self, colunas: Optional[List[str]] = None) -> Iterator[dict]:
+        """
+        Linhas como dicts. colunas: projeção (só tem efeito real no Parquet;
+        no CSV a linha inteira é parseada de qualquer jeito).
+        """
+        if not self.parquet:
+            yield from self._reader
+            return
+
+        if colunas is not None:
+            colunas = [c for c in colunas if c in self.campos]
+        for lote in self._pf.iter_batches(batch_size=LOTE_PARQUET, columns=colunas):
+            yield from lote.to_pylist()